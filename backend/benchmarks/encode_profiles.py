@@ -0,0 +1,132 @@
+"""
+Encode profile benchmark.
+Encodes the same synthetic 9:16 clip with every profile in ENCODE_PROFILES
+and records encode fps, CPU time, output size and SSIM against the source.
+
+Usage (from backend/):
+    python benchmarks/encode_profiles.py --duration 10 --output /app/videos/encode_benchmark.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.encode_profiles import ENCODE_PROFILES, video_codec_args
+
+
+def make_source(path: Path, duration: float, fps: int = 30):
+    """Render a lossless 1080x1920 test pattern with motion and noise."""
+    cmd = [
+        'ffmpeg', '-f', 'lavfi',
+        '-i', f'testsrc2=s=1080x1920:r={fps}:d={duration}',
+        '-vf', 'noise=alls=8:allf=t',
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-qp', '0',
+        '-pix_fmt', 'yuv420p',
+        str(path), '-y'
+    ]
+    subprocess.run(cmd, check=True, capture_output=True)
+
+
+def children_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def ssim_score(encoded: Path, reference: Path) -> float:
+    """SSIM (0-1) of the encode, upscaled back to the reference size."""
+    cmd = [
+        'ffmpeg', '-i', str(encoded), '-i', str(reference),
+        '-lavfi', '[0:v]scale=1080:1920:flags=bicubic[a];[a][1:v]ssim',
+        '-f', 'null', '-'
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    match = re.search(r'All:([0-9.]+)', result.stderr)
+    return float(match.group(1)) if match else 0.0
+
+
+def benchmark_profile(name: str, source: Path, workdir: Path, duration: float, fps: int) -> dict:
+    settings = ENCODE_PROFILES[name]
+    output = workdir / f"{name}.mp4"
+    width, height = settings["width"], settings["height"]
+
+    cmd = [
+        'ffmpeg', '-i', str(source),
+        '-vf', f'scale={width}:{height},fps={settings["fps"]}',
+        *video_codec_args(settings),
+        '-pix_fmt', 'yuv420p',
+        '-an',
+        str(output), '-y'
+    ]
+
+    cpu_before = children_cpu_seconds()
+    started = time.perf_counter()
+    subprocess.run(cmd, check=True, capture_output=True)
+    wall = time.perf_counter() - started
+    cpu = children_cpu_seconds() - cpu_before
+
+    frames = int(duration * settings["fps"])
+    return {
+        "profile": name,
+        "resolution": f"{width}x{height}",
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu, 3),
+        "encode_fps": round(frames / wall, 2) if wall else None,
+        "output_bytes": output.stat().st_size,
+        "kbps": round(output.stat().st_size * 8 / 1000 / duration, 1),
+        "ssim": round(ssim_score(output, source), 5)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark encode profiles on this host")
+    parser.add_argument("--duration", type=float, default=10.0, help="Source clip length in seconds")
+    parser.add_argument("--profiles", nargs="*", default=list(ENCODE_PROFILES), help="Profiles to run")
+    parser.add_argument(
+        "--output",
+        default=os.getenv("ENCODE_BENCHMARK_PATH", str(Path(os.getenv("VIDEO_OUTPUT_DIR", "/app/videos")) / "encode_benchmark.json")),
+        help="Where to write the JSON report"
+    )
+    args = parser.parse_args()
+
+    fps = 30
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = Path(tmpdir)
+        source = workdir / "source.mkv"
+        make_source(source, args.duration, fps)
+
+        results = []
+        for name in args.profiles:
+            result = benchmark_profile(name, source, workdir, args.duration, fps)
+            results.append(result)
+            print(
+                f"{name:>11}: {result['encode_fps']:>7} fps  {result['cpu_seconds']:>7}s cpu  "
+                f"{result['kbps']:>8} kbps  ssim {result['ssim']}"
+            )
+
+    report = {
+        "host": platform.node(),
+        "cpu_count": os.cpu_count(),
+        "created_at": datetime.utcnow().isoformat(),
+        "source_duration": args.duration,
+        "results": results
+    }
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Karaoke subtitle burn-in benchmark.
+Renders the same fake word timeline with the classic (one event per word)
+and compact (two events per group) generators and measures how fast
+FFmpeg's subtitles filter burns each into a 1080x1920 video.
+
+Usage (from backend/):
+    python benchmarks/karaoke_burnin.py --words 150 --duration 60
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.ffmpeg_service import FFmpegService
+
+
+GENERATORS = {
+    "classic": FFmpegService.create_karaoke_subtitles,
+    "compact": FFmpegService.create_karaoke_subtitles_compact
+}
+
+
+def fake_timestamps(num_words: int, duration: float) -> tuple:
+    """Evenly paced words with a short pause after each, like TTS output."""
+    words = [f"Wort{i}" for i in range(num_words)]
+    slot = duration / num_words
+    timestamps = [
+        {'word': word, 'start': i * slot, 'end': i * slot + slot * 0.85}
+        for i, word in enumerate(words)
+    ]
+    return " ".join(words), timestamps
+
+
+def burn_in(subtitle_path: Path, duration: float, fps: int) -> float:
+    """Burn subtitles onto a black 1080x1920 clip, discard output, return wall time."""
+    cmd = [
+        'ffmpeg', '-f', 'lavfi',
+        '-i', f'color=c=black:s=1080x1920:r={fps}:d={duration}',
+        '-vf', f'subtitles={subtitle_path}',
+        '-f', 'null', '-'
+    ]
+    started = time.perf_counter()
+    subprocess.run(cmd, check=True, capture_output=True)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare karaoke subtitle burn-in speed")
+    parser.add_argument("--words", type=int, default=150, help="Number of spoken words")
+    parser.add_argument("--duration", type=float, default=60.0, help="Video length in seconds")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=3, help="Runs per format (best is reported)")
+    parser.add_argument("--output", help="Optional path for a JSON report")
+    args = parser.parse_args()
+
+    script_text, timestamps = fake_timestamps(args.words, args.duration)
+    frames = int(args.duration * args.fps)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, generator in GENERATORS.items():
+            subtitle_path = Path(tmpdir) / f"{name}.ass"
+            generator(subtitle_path, script_text, timestamps, args.duration)
+
+            with open(subtitle_path, 'r', encoding='utf-8') as f:
+                events = sum(1 for line in f if line.startswith('Dialogue:'))
+
+            best = min(burn_in(subtitle_path, args.duration, args.fps) for _ in range(args.runs))
+            results.append({
+                "format": name,
+                "events": events,
+                "ass_bytes": subtitle_path.stat().st_size,
+                "wall_seconds": round(best, 3),
+                "burn_in_fps": round(frames / best, 1)
+            })
+            print(f"{name:>8}: {events:>5} events  {results[-1]['burn_in_fps']:>8} fps")
+
+    report = {"words": args.words, "duration": args.duration, "fps": args.fps, "results": results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Load driver for the full video pipeline.
+Registers test users, then each virtual user repeatedly generates a script,
+submits it to /videos/generate and polls the video until it finishes.
+Run the backend against benchmarks/stub_servers.py to keep external calls local.
+
+Reports throughput (finished videos per minute) and p50/p95/max latency of
+script generation, the generate request, and submit-to-finished.
+
+Usage (from backend/):
+    python benchmarks/load_driver.py --api http://127.0.0.1:8001/api --users 8 --videos 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import aiohttp
+
+FINISHED_STATUSES = {"completed", "failed", "preview_ready", "cancelled"}
+POLL_SECONDS = 1.0
+
+
+def percentile(values: list, q: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))
+    return round(ordered[index], 3)
+
+
+def summarize(values: list) -> dict:
+    return {
+        "count": len(values),
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "max": round(max(values), 3) if values else None
+    }
+
+
+class LoadStats:
+    def __init__(self):
+        self.script_seconds = []
+        self.submit_seconds = []
+        self.video_seconds = []
+        self.statuses = {}
+        self.rejected = 0  # 429 answers from admission control
+        self.errors = []
+
+    def add_status(self, status: str):
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+
+async def register(session: aiohttp.ClientSession, api: str) -> str:
+    email = f"load-{uuid.uuid4().hex[:10]}@example.test"
+    async with session.post(f"{api}/auth/register", json={
+        "email": email, "password": uuid.uuid4().hex, "name": "Load Test"
+    }) as response:
+        response.raise_for_status()
+        return (await response.json())["token"]
+
+
+async def submit_video(session: aiohttp.ClientSession, api: str, headers: dict, body: dict, stats: LoadStats) -> dict:
+    """POST /videos/generate, waiting out admission-control rejections."""
+    while True:
+        started = time.perf_counter()
+        async with session.post(f"{api}/videos/generate", json=body, headers=headers) as response:
+            if response.status == 429:
+                stats.rejected += 1
+                await asyncio.sleep(float(response.headers.get("Retry-After", 5)))
+                continue
+            response.raise_for_status()
+            stats.submit_seconds.append(time.perf_counter() - started)
+            return await response.json()
+
+
+async def wait_for_video(session: aiohttp.ClientSession, api: str, headers: dict, video_id: str, timeout: float) -> str:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        async with session.get(f"{api}/videos/{video_id}", headers=headers) as response:
+            response.raise_for_status()
+            status = (await response.json())["status"]
+        if status in FINISHED_STATUSES:
+            return status
+        await asyncio.sleep(POLL_SECONDS)
+    return "timeout"
+
+
+async def virtual_user(session: aiohttp.ClientSession, args, stats: LoadStats):
+    token = await register(session, args.api)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for i in range(args.videos):
+        try:
+            started = time.perf_counter()
+            async with session.post(f"{args.api}/scripts/generate", json={
+                "topic": f"Hoffnung im Alltag {i}"
+            }, headers=headers) as response:
+                response.raise_for_status()
+                script = await response.json()
+            stats.script_seconds.append(time.perf_counter() - started)
+
+            body = {"script_id": script["id"], "preview": args.preview}
+            if args.encode_profile:
+                body["encode_profile"] = args.encode_profile
+            submitted = time.perf_counter()
+            video = await submit_video(session, args.api, headers, body, stats)
+            status = await wait_for_video(session, args.api, headers, video["id"], args.timeout)
+
+            stats.add_status(status)
+            if status in ("completed", "preview_ready"):
+                stats.video_seconds.append(time.perf_counter() - submitted)
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError) as e:
+            stats.errors.append(f"{type(e).__name__}: {e}")
+
+
+async def run(args) -> dict:
+    stats = LoadStats()
+    timeout = aiohttp.ClientTimeout(total=120)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        started = time.perf_counter()
+        users = []
+        for _ in range(args.users):
+            users.append(asyncio.create_task(virtual_user(session, args, stats)))
+            await asyncio.sleep(args.ramp / max(args.users, 1))
+        await asyncio.gather(*users)
+        elapsed = time.perf_counter() - started
+
+    finished = len(stats.video_seconds)
+    return {
+        "created_at": datetime.utcnow().isoformat(),
+        "settings": {
+            "users": args.users,
+            "videos_per_user": args.videos,
+            "preview": args.preview,
+            "encode_profile": args.encode_profile
+        },
+        "elapsed_seconds": round(elapsed, 1),
+        "videos_per_minute": round(finished / elapsed * 60, 2) if elapsed else None,
+        "script_generate": summarize(stats.script_seconds),
+        "video_submit": summarize(stats.submit_seconds),
+        "video_end_to_end": summarize(stats.video_seconds),
+        "statuses": stats.statuses,
+        "rejected_429": stats.rejected,
+        "errors": stats.errors[:20]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive concurrent script + video generation against the API")
+    parser.add_argument("--api", default=os.getenv("LOAD_API_URL", "http://127.0.0.1:8001/api"))
+    parser.add_argument("--users", type=int, default=4, help="Concurrent virtual users")
+    parser.add_argument("--videos", type=int, default=2, help="Videos per user")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which users start")
+    parser.add_argument("--preview", action="store_true", help="Request preview renders")
+    parser.add_argument("--encode-profile", choices=["draft", "standard", "archive", "fast_final"])
+    parser.add_argument("--timeout", type=float, default=900.0, help="Seconds to wait for one video")
+    parser.add_argument("--output", help="Optional path for a JSON report")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    print(f"{report['videos_per_minute']} videos/min over {report['elapsed_seconds']}s")
+    for key in ("script_generate", "video_submit", "video_end_to_end"):
+        s = report[key]
+        print(f"{key:>17}: n={s['count']:<4} p50 {s['p50']}s  p95 {s['p95']}s  max {s['max']}s")
+    print(f"statuses: {report['statuses']}  429s: {report['rejected_429']}  errors: {len(report['errors'])}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+End-to-end render pipeline benchmark on synthetic media.
+Generates B-roll clips (testsrc2 at mixed resolutions), a speech stand-in
+(sine tones over pink noise) and fake word timestamps with lavfi, then runs
+FFmpegService.create_shorts_video for every encode profile and script length.
+No Pexels or ElevenLabs access is needed.
+
+The JSON report holds wall time, CPU time, output size and a per-span
+breakdown for each case, plus the git commit, so runs can be compared:
+
+Usage (from backend/):
+    python benchmarks/render_pipeline.py --output /tmp/bench_main.json
+    python benchmarks/render_pipeline.py --baseline /tmp/bench_main.json --output /tmp/bench_branch.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.encode_profiles import ENCODE_PROFILES
+from services.ffmpeg_service import FFmpegService
+from services.tracing import RenderTrace
+
+# Source sizes of the synthetic B-roll, like the mix Pexels returns
+CLIP_SIZES = ["1920x1080", "1080x1920", "1280x720", "3840x2160", "720x1280", "2560x1440"]
+CLIP_SECONDS = 4
+WORDS_PER_SECOND = 2.5  # Typical TTS speaking rate
+
+
+def ffmpeg(*args: str):
+    subprocess.run(['ffmpeg', '-v', 'error', '-y', *args], check=True, capture_output=True)
+
+
+def make_broll(workdir: Path, count: int, fps: int = 30) -> list:
+    """Short testsrc2 clips cycling through CLIP_SIZES."""
+    clips = []
+    for i in range(count):
+        size = CLIP_SIZES[i % len(CLIP_SIZES)]
+        path = workdir / f"broll_{i}_{size}.mp4"
+        ffmpeg(
+            '-f', 'lavfi', '-i', f'testsrc2=s={size}:r={fps}:d={CLIP_SECONDS}',
+            '-vf', 'noise=alls=6:allf=t',
+            '-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '18',
+            '-pix_fmt', 'yuv420p',
+            str(path)
+        )
+        clips.append(path)
+    return clips
+
+
+def make_speech(path: Path, duration: float):
+    """A speech stand-in: a tone that changes pitch every ~0.4s over quiet pink noise."""
+    ffmpeg(
+        '-f', 'lavfi', '-i', f"sine=f=220:d={duration}",
+        '-f', 'lavfi', '-i', f"anoisesrc=c=pink:a=0.05:d={duration}",
+        '-filter_complex', "[0:a]vibrato=f=2.5:d=0.8[tone];[tone][1:a]amix=inputs=2:duration=first",
+        '-c:a', 'libmp3lame', '-b:a', '128k',
+        str(path)
+    )
+
+
+def make_music(path: Path, duration: float):
+    """A background music stand-in: two-note chord."""
+    ffmpeg(
+        '-f', 'lavfi', '-i', f"sine=f=330:d={duration}",
+        '-f', 'lavfi', '-i', f"sine=f=440:d={duration}",
+        '-filter_complex', "amix=inputs=2",
+        '-c:a', 'libmp3lame', '-b:a', '128k',
+        str(path)
+    )
+
+
+def fake_timestamps(num_words: int, duration: float) -> tuple:
+    """Words of varying length, evenly paced, with a short gap after each."""
+    words = [("szó" * (1 + i % 3)) + str(i) for i in range(num_words)]
+    slot = duration / num_words
+    timestamps = [
+        {'word': word, 'start': i * slot, 'end': i * slot + slot * 0.85}
+        for i, word in enumerate(words)
+    ]
+    return " ".join(words), timestamps
+
+
+def children_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def summarize_spans(spans: list) -> dict:
+    """Wall and CPU seconds per span name (normalize_clip spans are summed)."""
+    summary = {}
+    for s in spans:
+        entry = summary.setdefault(s["name"], {"count": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0})
+        entry["count"] += 1
+        entry["wall_seconds"] = round(entry["wall_seconds"] + s["wall_seconds"], 3)
+        entry["cpu_seconds"] = round(entry["cpu_seconds"] + s["cpu_seconds"], 3)
+    return summary
+
+
+async def run_case(
+    workdir: Path,
+    broll: list,
+    profile: str,
+    words: int,
+    subtitle_format: str,
+    music: bool,
+    multi_output: bool
+) -> dict:
+    duration = round(words / WORDS_PER_SECOND, 2)
+    case = f"{profile}_{words}w"
+    audio_path = workdir / f"{case}_speech.mp3"
+    make_speech(audio_path, duration)
+    music_path = None
+    if music:
+        music_path = workdir / f"{case}_music.mp3"
+        make_music(music_path, duration)
+    script_text, timestamps = fake_timestamps(words, duration)
+    output_path = workdir / f"{case}.mp4"
+
+    trace = RenderTrace(case)
+    token = trace.activate()
+    cpu_before = children_cpu_seconds()
+    started = time.perf_counter()
+    try:
+        extra_outputs = await FFmpegService.create_shorts_video(
+            output_path=output_path,
+            audio_path=audio_path,
+            broll_clips=broll,
+            word_timestamps=timestamps,
+            script_text=script_text,
+            background_music=str(music_path) if music_path else None,
+            duration=duration,
+            profile=profile,
+            multi_output=multi_output,
+            subtitle_format=subtitle_format
+        )
+    finally:
+        token.var.reset(token)
+    wall = time.perf_counter() - started
+    cpu = children_cpu_seconds() - cpu_before
+
+    result = {
+        "case": case,
+        "profile": profile,
+        "words": words,
+        "duration": duration,
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu, 3),
+        "realtime_factor": round(duration / wall, 2) if wall else None,
+        "output_bytes": output_path.stat().st_size,
+        "extra_output_bytes": {name: path.stat().st_size for name, path in extra_outputs.items()},
+        "spans": summarize_spans(trace.to_list())
+    }
+
+    for path in [output_path, audio_path, music_path, *extra_outputs.values()]:
+        if path:
+            path.unlink(missing_ok=True)
+    for leftover in workdir.glob(f"{case}_concat*"):
+        leftover.unlink(missing_ok=True)
+    workdir.joinpath(f"{case}.ass").unlink(missing_ok=True)
+    return result
+
+
+def git_commit() -> str:
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results: list, baseline_path: str):
+    """Print wall/CPU/size changes against a previous report, matched by case."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {r["case"]: r for r in baseline.get("results", [])}
+    print(f"\nAgainst {baseline_path} (commit {baseline.get('commit')}):")
+    for result in results:
+        before = previous.get(result["case"])
+        if not before:
+            print(f"{result['case']:>24}: not in baseline")
+            continue
+        changes = []
+        for key in ("wall_seconds", "cpu_seconds", "output_bytes"):
+            if before[key]:
+                changes.append(f"{key.split('_')[0]} {(result[key] / before[key] - 1) * 100:+.1f}%")
+        print(f"{result['case']:>24}: " + "  ".join(changes))
+
+
+async def run(args) -> list:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = Path(tmpdir)
+        broll = make_broll(workdir, args.clips)
+
+        results = []
+        for profile in args.profiles:
+            for words in args.words:
+                best = None
+                for _ in range(args.runs):
+                    result = await run_case(
+                        workdir, broll, profile, words, args.subtitle_format, args.music, args.multi_output
+                    )
+                    if best is None or result["wall_seconds"] < best["wall_seconds"]:
+                        best = result
+                results.append(best)
+                print(
+                    f"{best['case']:>24}: {best['wall_seconds']:>8}s wall  {best['cpu_seconds']:>8}s cpu  "
+                    f"{best['realtime_factor']:>6}x realtime  {best['output_bytes'] // 1024:>7} KiB"
+                )
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the render pipeline on synthetic media")
+    parser.add_argument("--profiles", nargs="*", default=list(ENCODE_PROFILES), help="Encode profiles to run")
+    parser.add_argument("--words", nargs="*", type=int, default=[40, 120, 240], help="Script lengths in words")
+    parser.add_argument("--clips", type=int, default=6, help="Number of synthetic B-roll clips")
+    parser.add_argument("--subtitle-format", default="classic", choices=["classic", "compact"])
+    parser.add_argument("--music", action="store_true", help="Mix in a background music track")
+    parser.add_argument("--multi-output", action="store_true", help="Also write renditions and a poster")
+    parser.add_argument("--runs", type=int, default=1, help="Runs per case (best is reported)")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument(
+        "--output",
+        default=os.getenv("RENDER_BENCHMARK_PATH", str(Path(os.getenv("VIDEO_OUTPUT_DIR", "/app/videos")) / "render_benchmark.json")),
+        help="Where to write the JSON report"
+    )
+    args = parser.parse_args()
+
+    unknown = [p for p in args.profiles if p not in ENCODE_PROFILES]
+    if unknown:
+        parser.error(f"Unknown encode profiles: {', '.join(unknown)}")
+
+    results = asyncio.run(run(args))
+
+    report = {
+        "commit": git_commit(),
+        "host": platform.node(),
+        "cpu_count": os.cpu_count(),
+        "created_at": datetime.utcnow().isoformat(),
+        "settings": {
+            "clips": args.clips,
+            "subtitle_format": args.subtitle_format,
+            "music": args.music,
+            "multi_output": args.multi_output,
+            "runs": args.runs
+        },
+        "results": results
+    }
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
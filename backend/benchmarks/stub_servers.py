@@ -0,0 +1,296 @@
+"""
+Local stand-ins for ElevenLabs, Pexels and OpenAI, for load testing the
+full /videos/generate path without external calls.
+
+One aiohttp server answers:
+- POST /v1/text-to-speech/{voice_id}   MP3 (sine tone) streamed at a set speed
+- POST /v1/audio/transcriptions        verbose_json with evenly spaced words
+- POST /v1/chat/completions            deterministic German script
+- GET  /videos/search                  Pexels-shaped results pointing at /files/
+- GET  /files/{name}                   local clips with throttled bandwidth
+
+Point the backend at it (the server prints these on start):
+    ELEVENLABS_BASE_URL=http://127.0.0.1:8900
+    PEXELS_API_URL=http://127.0.0.1:8900
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1
+
+Usage (from backend/):
+    python benchmarks/stub_servers.py --tts-latency 0.4 --bandwidth-mbps 40
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+CHARS_PER_SECOND = 15  # Speaking rate of the fake TTS (matches the render estimator)
+CHUNK_BYTES = 16 * 1024
+
+SCRIPT_SENTENCES = [
+    "Du bist nicht allein, auch wenn es sich heute so anfühlt.",
+    "Gott sieht jeden Schritt, den du im Stillen gehst.",
+    "Atme tief ein und lass los, was du nicht tragen musst.",
+    "Deine Geschichte ist noch nicht zu Ende geschrieben.",
+    "Vertraue dem Weg, auch wenn du das Ziel nicht siehst.",
+    "Heute ist ein guter Tag, um neu anzufangen.",
+    "Stärke wächst dort, wo wir aufhören zu kämpfen und beginnen zu glauben."
+]
+
+
+def make_clip(path: Path, size: str, duration: int = 8):
+    subprocess.run([
+        'ffmpeg', '-v', 'error', '-y',
+        '-f', 'lavfi', '-i', f'testsrc2=s={size}:r=30:d={duration}',
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '23', '-pix_fmt', 'yuv420p',
+        str(path)
+    ], check=True, capture_output=True)
+
+
+def make_tone(path: Path, seconds: int):
+    subprocess.run([
+        'ffmpeg', '-v', 'error', '-y',
+        '-f', 'lavfi', '-i', f'sine=f=220:d={seconds}',
+        '-c:a', 'libmp3lame', '-b:a', '128k',
+        str(path)
+    ], check=True, capture_output=True)
+
+
+class StubState:
+    """Settings plus the generated media shared by all handlers."""
+
+    def __init__(self, args, workdir: Path):
+        self.args = args
+        self.workdir = workdir
+        self.clips = []
+        self.tones = {}  # seconds: mp3 path
+        self.requests = {}  # route: count
+
+    def prepare_clips(self):
+        if self.args.clips_dir:
+            self.clips = sorted(Path(self.args.clips_dir).glob("*.mp4"))
+        if not self.clips:
+            sizes = ["1080x1920", "720x1280", "1440x2560"]
+            for i in range(self.args.clips):
+                path = self.workdir / f"clip_{i}.mp4"
+                make_clip(path, sizes[i % len(sizes)])
+                self.clips.append(path)
+
+    async def tone(self, seconds: int) -> Path:
+        """An MP3 of the given length, generated once and reused."""
+        if seconds not in self.tones:
+            path = self.workdir / f"tone_{seconds}.mp3"
+            await asyncio.to_thread(make_tone, path, seconds)
+            self.tones[seconds] = path
+        return self.tones[seconds]
+
+    def count(self, route: str):
+        self.requests[route] = self.requests.get(route, 0) + 1
+
+
+async def stream_file(request: web.Request, path: Path, content_type: str, bytes_per_second: float) -> web.StreamResponse:
+    """Send a file in chunks, sleeping between them to hold the given rate."""
+    response = web.StreamResponse(headers={"Content-Type": content_type})
+    response.content_length = path.stat().st_size
+    await response.prepare(request)
+    with open(path, 'rb') as f:
+        while chunk := f.read(CHUNK_BYTES):
+            started = time.monotonic()
+            await response.write(chunk)
+            if bytes_per_second:
+                await asyncio.sleep(max(0.0, len(chunk) / bytes_per_second - (time.monotonic() - started)))
+    await response.write_eof()
+    return response
+
+
+async def text_to_speech(request: web.Request) -> web.StreamResponse:
+    state: StubState = request.app["state"]
+    state.count("tts")
+    body = await request.json()
+    seconds = max(1, round(len(body.get("text", "")) / CHARS_PER_SECOND))
+    path = await state.tone(seconds)
+
+    await asyncio.sleep(state.args.tts_latency)
+    # Audio is "generated" tts_speed times faster than real time
+    rate = path.stat().st_size / seconds * state.args.tts_speed
+    return await stream_file(request, path, "audio/mpeg", rate)
+
+
+async def transcription(request: web.Request) -> web.Response:
+    state: StubState = request.app["state"]
+    state.count("whisper")
+    reader = await request.multipart()
+    size, filename = 0, ""
+    async for part in reader:
+        if part.name == "file":
+            filename = part.filename or ""
+            while chunk := await part.read_chunk():
+                size += len(chunk)
+
+    # The pipeline uploads 44.1kHz stereo 16-bit WAV (or the MP3 if conversion failed)
+    duration = (size - 44) / 176400 if filename.endswith(".wav") else size * 8 / 128000
+    duration = max(duration, 1.0)
+    count = max(1, int(duration * CHARS_PER_SECOND / 6))
+    slot = duration / count
+    words = [
+        {"word": f"Wort{i}", "start": round(i * slot, 3), "end": round(i * slot + slot * 0.85, 3)}
+        for i in range(count)
+    ]
+
+    await asyncio.sleep(state.args.whisper_latency)
+    return web.json_response({
+        "task": "transcribe",
+        "language": "german",
+        "duration": duration,
+        "text": " ".join(w["word"] for w in words),
+        "words": words
+    })
+
+
+async def chat_completion(request: web.Request) -> web.Response:
+    state: StubState = request.app["state"]
+    state.count("chat")
+    body = await request.json()
+    prompt = "".join(m.get("content", "") for m in body.get("messages", []))
+    seed = int(hashlib.sha256(prompt.encode()).hexdigest(), 16)
+    contents = [
+        " ".join(SCRIPT_SENTENCES[(seed + choice * 4 + i) % len(SCRIPT_SENTENCES)] for i in range(4))
+        for choice in range(body.get("n") or 1)
+    ]
+    content = contents[0]
+
+    if body.get("stream"):
+        return await stream_chat_completion(request, body, seed, content)
+
+    await asyncio.sleep(state.args.chat_latency)
+    return web.json_response({
+        "id": f"chatcmpl-stub-{seed % 10**12}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o-mini"),
+        "choices": [
+            {
+                "index": index,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }
+            for index, text in enumerate(contents)
+        ],
+        "usage": {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": sum(len(text) for text in contents) // 4,
+            "total_tokens": (len(prompt) + sum(len(text) for text in contents)) // 4
+        }
+    })
+
+
+async def stream_chat_completion(request: web.Request, body: dict, seed: int, content: str) -> web.StreamResponse:
+    """Send the completion as SSE chunks: first word after a fifth of --chat-latency, the rest spread over it."""
+    state: StubState = request.app["state"]
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+
+    words = content.split(" ")
+    latency = state.args.chat_latency
+    await asyncio.sleep(latency / 5)
+    for i, word in enumerate(words):
+        chunk = {
+            "id": f"chatcmpl-stub-{seed % 10**12}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "choices": [{
+                "index": 0,
+                "delta": {"content": word if i == 0 else " " + word},
+                "finish_reason": "stop" if i == len(words) - 1 else None
+            }]
+        }
+        await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await asyncio.sleep(latency * 4 / 5 / len(words))
+    await response.write(b"data: [DONE]\n\n")
+    await response.write_eof()
+    return response
+
+
+async def pexels_search(request: web.Request) -> web.Response:
+    state: StubState = request.app["state"]
+    state.count("pexels_search")
+    per_page = int(request.query.get("per_page", 15))
+    base = f"{request.scheme}://{request.host}"
+
+    videos = []
+    for i in range(per_page):
+        clip = state.clips[i % len(state.clips)]
+        videos.append({
+            "id": i,
+            "duration": 8,
+            "video_files": [
+                {"quality": "hd", "width": 1080, "height": 1920, "link": f"{base}/files/{clip.name}?v={i}"},
+                {"quality": "sd", "width": 540, "height": 960, "link": f"{base}/files/{clip.name}?v={i}&sd=1"}
+            ]
+        })
+
+    await asyncio.sleep(state.args.pexels_latency)
+    return web.json_response({"page": 1, "per_page": per_page, "total_results": per_page, "videos": videos})
+
+
+async def serve_clip(request: web.Request) -> web.StreamResponse:
+    state: StubState = request.app["state"]
+    state.count("download")
+    name = request.match_info["name"]
+    clip = next((c for c in state.clips if c.name == name), None)
+    if clip is None:
+        raise web.HTTPNotFound()
+    return await stream_file(request, clip, "video/mp4", state.args.bandwidth_mbps * 125_000)
+
+
+async def stats(request: web.Request) -> web.Response:
+    return web.json_response(request.app["state"].requests)
+
+
+def build_app(state: StubState) -> web.Application:
+    app = web.Application(client_max_size=200 * 1024 * 1024)
+    app["state"] = state
+    app.router.add_post("/v1/text-to-speech/{voice_id}", text_to_speech)
+    app.router.add_post("/v1/text-to-speech/{voice_id}/stream", text_to_speech)
+    app.router.add_post("/v1/audio/transcriptions", transcription)
+    app.router.add_post("/v1/chat/completions", chat_completion)
+    app.router.add_get("/videos/search", pexels_search)
+    app.router.add_get("/files/{name}", serve_clip)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve local stand-ins for ElevenLabs, Pexels and OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--tts-latency", type=float, default=0.5, help="Seconds before the first audio byte")
+    parser.add_argument("--tts-speed", type=float, default=10.0, help="Audio seconds streamed per wall second")
+    parser.add_argument("--whisper-latency", type=float, default=1.0)
+    parser.add_argument("--chat-latency", type=float, default=1.5)
+    parser.add_argument("--pexels-latency", type=float, default=0.3)
+    parser.add_argument("--bandwidth-mbps", type=float, default=50.0, help="Per-download bandwidth (0: unthrottled)")
+    parser.add_argument("--clips", type=int, default=5, help="Synthetic clips to generate")
+    parser.add_argument("--clips-dir", help="Serve the .mp4 files of this directory instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state = StubState(args, Path(tmpdir))
+        state.prepare_clips()
+
+        base = f"http://{args.host}:{args.port}"
+        print("Point the backend at the stubs with:")
+        print(f"    ELEVENLABS_BASE_URL={base}")
+        print(f"    PEXELS_API_URL={base}")
+        print(f"    OPENAI_BASE_URL={base}/v1")
+        print(f"Request counts: {base}/stats")
+        web.run_app(build_app(state), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
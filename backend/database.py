@@ -3,10 +3,12 @@ import os
 from dotenv import load_dotenv
 from pathlib import Path
 
+from services.telemetry import mongo_command_listener
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[mongo_command_listener()])
 db = client[os.environ['DB_NAME']]
\ No newline at end of file
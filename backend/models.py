@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, field_validator, ConfigDict
+from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict
 from typing import Optional, List, Literal
 from datetime import datetime
 import uuid
@@ -38,6 +38,23 @@ class ScriptGenerateRequest(BaseModel):
             raise ValueError("Topic must be at least 3 characters")
         return v
 
+class ScriptBatchGenerateRequest(BaseModel):
+    topics: List[str] = Field(default_factory=list)  # One group of scripts per topic
+    topic: Optional[str] = None  # Or a single topic
+    n: int = 1  # Variants per topic
+    mode: Literal["STATE_BASED", "FAITH_EXPLICIT"] = "FAITH_EXPLICIT"
+    keywords: List[str] = Field(default_factory=list)
+    
+    @model_validator(mode='after')
+    def validate_batch(self):
+        if any(len(t.strip()) < 3 for t in self.topics + [self.topic or "..."]):
+            raise ValueError("Topic must be at least 3 characters")
+        if self.n < 1 or self.n > 10:
+            raise ValueError("n must be between 1 and 10")
+        if len(self.topics or [self.topic]) * self.n > 50:
+            raise ValueError("A batch can contain at most 50 scripts")
+        return self
+
 class Script(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -51,6 +68,7 @@ class Script(BaseModel):
     character_count: int
     keywords: List[str] = Field(default_factory=list)
     hook_id: Optional[str] = None
+    pre_generated: bool = False  # Taken from the user's pool filled by the pre-generation worker
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 # ===== HOOK MODELS =====
@@ -108,17 +126,68 @@ class VideoGenerateRequest(BaseModel):
     voice_settings: Optional[dict] = None
     background_music: Optional[str] = None
     b_roll_search: Optional[str] = None
+    preview: bool = False  # Fast 540x960 draft; promote it later with /videos/{id}/promote
+    encode_profile: Optional[Literal["draft", "standard", "archive", "fast_final"]] = None  # Final render; default: DEFAULT_ENCODE_PROFILE
+    renditions: bool = False  # Also render the 720p dashboard copy and a poster JPEG
+
+class VideoEstimateRequest(BaseModel):
+    script_id: Optional[str] = None
+    script_text: Optional[str] = None  # Estimate an unsaved script
+    preview: bool = False
+    encode_profile: Optional[Literal["draft", "standard", "archive", "fast_final"]] = None
+    renditions: bool = False
+    
+    @model_validator(mode='after')
+    def validate_script(self):
+        if not self.script_id and not self.script_text:
+            raise ValueError("script_id or script_text is required")
+        return self
+
+class VideoBatchGenerateRequest(BaseModel):
+    script_ids: List[str]
+    voice_id: Optional[str] = None
+    voice_settings: Optional[dict] = None
+    background_music: Optional[str] = None
+    b_roll_search: Optional[str] = None
+    encode_profile: Optional[Literal["draft", "standard", "archive", "fast_final"]] = None
+    renditions: bool = False
+    
+    @field_validator('script_ids')
+    @classmethod
+    def validate_script_ids(cls, v):
+        if not v:
+            raise ValueError("At least one script_id is required")
+        if len(v) > 100:
+            raise ValueError("A batch can contain at most 100 scripts")
+        # Keep order, drop duplicates
+        return list(dict.fromkeys(v))
 
 class Video(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str
     script_id: str
-    status: Literal["queued", "processing", "completed", "failed"] = "queued"
+    batch_id: Optional[str] = None
+    status: Literal["queued", "processing", "preview_ready", "completed", "failed", "cancelled"] = "queued"
+    render_profile: str = "final"
+    encode_profile: Optional[str] = None
+    settings: dict = Field(default_factory=dict)  # Render settings, reused on promote
     video_url: Optional[str] = None
+    preview_url: Optional[str] = None
+    renditions: dict = Field(default_factory=dict)  # Extra renditions by name, e.g. {"720p": path}
+    poster_url: Optional[str] = None
     audio_url: Optional[str] = None
     duration: Optional[float] = None
     error: Optional[str] = None
+    degraded: List[dict] = Field(default_factory=list)  # Fallbacks used for failed dependencies
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class VideoBatch(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str
+    video_ids: List[str] = Field(default_factory=list)
+    settings: dict = Field(default_factory=dict)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
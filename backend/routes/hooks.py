@@ -1,21 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Response
+from typing import Optional
 import logging
 
 from models import Hook, HookCreate
 from routes.auth import get_current_user
+from utils.sync import record_deletion, get_changes, new_cursor
+from services.similarity_index import similarity_index
 from database import db
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.get("", response_model=List[dict])
+@router.get("")
 async def get_hooks(
+    response: Response,
     current_user = Depends(get_current_user),
     hook_type: Optional[str] = None,
     mode: Optional[str] = None,
     sort_by: str = "created_at",
-    limit: int = 100
+    limit: int = 100,
+    since: Optional[str] = None,
+    wait: int = 0
 ):
     """
     Get user's hook library with filtering and sorting.
@@ -23,6 +28,7 @@ async def get_hooks(
     - filter by hook_type: emotional_trigger, urgency, identity_filter, etc.
     - filter by mode: STATE_BASED, FAITH_EXPLICIT
     - sort_by: created_at, avg_retention, usage_count
+    - since/wait: delta sync, see GET /scripts
     """
     query = {"user_id": current_user["id"]}
     
@@ -32,6 +38,14 @@ async def get_hooks(
     if mode:
         query["mode"] = mode
     
+    if since:
+        try:
+            return await get_changes(db, "hooks", query, since, wait=wait)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    response.headers["X-Sync-Cursor"] = new_cursor()
+    
     # Determine sort field
     sort_field = "created_at"
     sort_order = -1  # DESC
@@ -65,8 +79,10 @@ async def create_hook(hook_data: HookCreate, current_user = Depends(get_current_
     
     hook_dict = hook.model_dump()
     hook_dict['created_at'] = hook_dict['created_at'].isoformat()
+    hook_dict['updated_at'] = hook_dict['created_at']
     
     await db.hooks.insert_one(hook_dict)
+    similarity_index.add(current_user["id"], "hook", hook_dict)
     
     return {
         "id": hook.id,
@@ -91,4 +107,7 @@ async def delete_hook(hook_id: str, current_user = Depends(get_current_user)):
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Hook not found")
     
+    await record_deletion(db, "hooks", hook_id, current_user["id"])
+    similarity_index.remove(current_user["id"], "hook", hook_id)
+    
     return {"message": "Hook deleted"}
\ No newline at end of file
@@ -4,6 +4,8 @@ import logging
 
 from models import Metric, MetricCreate
 from routes.auth import get_current_user
+from utils.sync import now_iso
+from services.similarity_index import similarity_index
 from database import db
 
 logger = logging.getLogger(__name__)
@@ -57,10 +59,12 @@ async def update_hook_retention(hook_text: str, retention: float, user_id: str):
             {
                 "$set": {
                     "avg_retention": new_avg_retention,
-                    "usage_count": new_usage_count
+                    "usage_count": new_usage_count,
+                    "updated_at": now_iso()
                 }
             }
         )
+        similarity_index.set_retention(user_id, "hook", hook["id"], new_avg_retention)
 
 @router.get("", response_model=List[dict])
 async def get_metrics(current_user = Depends(get_current_user), limit: int = 50, skip: int = 0):
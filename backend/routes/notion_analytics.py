@@ -8,6 +8,8 @@ from datetime import datetime
 
 from models_analytics import NotionAnalyticsRow, AnalyticsData, AlgorithmInsight
 from routes.auth import get_current_user
+from utils.ml_optimizer import invalidate_pattern_snapshot
+from services.similarity_index import similarity_index
 from database import db
 
 logger = logging.getLogger(__name__)
@@ -57,12 +59,15 @@ async def import_notion_csv(file: UploadFile = File(...), current_user = Depends
                 data_dict['created_at'] = data_dict['created_at'].isoformat()
                 
                 await db.analytics_data.insert_one(data_dict)
+                similarity_index.add(current_user["id"], "analytics", data_dict)
                 imported_count += 1
             
             except Exception as e:
                 errors.append(f"Row {row_num}: {str(e)}")
                 logger.error(f"Error importing row {row_num}: {str(e)}")
         
+        if imported_count:
+            await invalidate_pattern_snapshot(current_user["id"])
         logger.info(f"Imported {imported_count} analytics rows for user {current_user['id']}")
         
         return {
@@ -352,4 +357,6 @@ async def delete_analytics_data(analytics_id: str, current_user = Depends(get_cu
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Analytics data not found")
     
+    await invalidate_pattern_snapshot(current_user["id"])
+    similarity_index.remove(current_user["id"], "analytics", analytics_id)
     return {"message": "Analytics data deleted"}
\ No newline at end of file
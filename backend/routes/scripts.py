@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Tuple
 import logging
+import json
+import asyncio
 from datetime import datetime
-from openai import AsyncOpenAI
 import os
 
-from models import Script, ScriptGenerateRequest, Hook
+from models import Script, ScriptGenerateRequest, ScriptBatchGenerateRequest, Hook
 from models_analytics import OptimizedScriptRequest
 from routes.auth import get_current_user
 from utils.script_helpers import (
@@ -16,13 +18,334 @@ from utils.script_helpers import (
     generate_german_script_prompt
 )
 from utils.ml_optimizer import get_top_performing_patterns, generate_optimized_prompt
+from utils.sync import now_iso, record_deletion, get_changes, new_cursor
+from services.telemetry import external_call
+from services.api_clients import api_clients
+from services.rate_governor import rate_governor
+from services.resilience import breakers, call_upstream, CircuitOpenError
+from services.hedging import LatencyTracker, hedged
+from services.completion_cache import completion_cache, completion_key
+from services.pregeneration import PregenerationWorker, pregeneration_key
+from services.similarity_index import similarity_index
 from database import db
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Initialize OpenAI client
-openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+SCRIPT_TEMPERATURE = 0.85
+SCRIPT_MAX_TOKENS = 200
+
+# Hedged script generation (opt-in): when a completion is slower than the
+# LLM_HEDGE_PERCENTILE of recent ones, send a second request (to
+# LLM_HEDGE_MODEL, default the same model) and keep whichever answers first.
+# At most LLM_HEDGE_MAX_RATE of recent completions are hedged.
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_HEDGE_MODEL = os.getenv("LLM_HEDGE_MODEL", LLM_MODEL)
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+chat_latency = LatencyTracker(
+    default_delay=float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "4.0")),
+    min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5")),
+    max_hedge_rate=float(os.getenv("LLM_HEDGE_MAX_RATE", "0.1"))
+)
+
+
+async def _chat_completion(
+    system_prompt: str,
+    user_prompt: str,
+    user_id: Optional[str] = None
+) -> Tuple[str, bool]:
+    """
+    Generate script text with the chat model, under the OpenAI rate limits,
+    circuit breaker and retry policy. Raises CircuitOpenError while OpenAI is down.
+    With `user_id`, a script pre-generated for that user is used first.
+    Repeated prompts are served from the completion pool (see completion_cache);
+    returns the text and whether it was pre-generated.
+    """
+    key = completion_key(LLM_MODEL, SCRIPT_TEMPERATURE, system_prompt, user_prompt)
+
+    async def generate(n: int) -> List[str]:
+        return await _chat_choices(system_prompt, user_prompt, n)
+
+    if user_id:
+        text = await completion_cache.take(pregeneration_key(user_id, key))
+        if text is not None:
+            pregeneration.refill_soon(
+                pregeneration_key(user_id, key), generate, _estimated_tokens(system_prompt, user_prompt)
+            )
+            return text, True
+    text, _ = await completion_cache.get(key, generate)
+    return text, False
+
+
+async def _chat_choices(system_prompt: str, user_prompt: str, n: int) -> List[str]:
+    """`n` script texts for one prompt from a single completion request (n choices)."""
+    def completion(model: str):
+        async def request():
+            async with rate_governor.limit("openai"):
+                with external_call("openai_chat"):
+                    return await api_clients.openai.chat.completions.create(
+                        model=model,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_prompt}
+                        ],
+                        temperature=SCRIPT_TEMPERATURE,
+                        max_tokens=SCRIPT_MAX_TOKENS,
+                        n=n
+                    )
+        return request
+
+    async def request():
+        if not LLM_HEDGE_ENABLED:
+            return await completion(LLM_MODEL)()
+        return await hedged(
+            "openai_chat", completion(LLM_MODEL), completion(LLM_HEDGE_MODEL),
+            chat_latency, LLM_HEDGE_PERCENTILE
+        )
+
+    response = await call_upstream("openai", request)
+    return [choice.message.content.strip() for choice in response.choices]
+
+
+async def _stream_chat_completion(system_prompt: str, user_prompt: str):
+    """
+    Yield script text deltas as the chat model produces them. The OpenAI slot
+    is held until the stream ends; only opening the stream is retried.
+    """
+    async with rate_governor.limit("openai"):
+        with external_call("openai_chat_stream"):
+            stream = await call_upstream("openai", lambda: api_clients.openai.chat.completions.create(
+                model=LLM_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=SCRIPT_TEMPERATURE,
+                max_tokens=SCRIPT_MAX_TOKENS,
+                stream=True
+            ))
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+
+async def _optimized_prompts(request: OptimizedScriptRequest, user_id: str):
+    """Prompts for the optimized endpoints; use_analytics is switched off without analytics data."""
+    topic = request.topic or "Glaube und innere Kraft"
+    patterns = None
+    
+    # Check if analytics optimization is enabled
+    if request.use_analytics:
+        # Get top performing patterns from analytics data
+        patterns = await get_top_performing_patterns(user_id, request.top_n_examples)
+        
+        # Check if we have analytics data
+        if not patterns["top_hooks"] and not patterns["top_scripts"]:
+            logger.warning(f"No analytics data found for user {user_id}, falling back to normal generation")
+            request.use_analytics = False
+    
+    # Examples closest to this topic, besides the global top performers
+    if request.use_analytics and patterns:
+        try:
+            patterns["similar_examples"] = await similarity_index.similar(
+                user_id, " ".join([topic, *request.keywords])
+            )
+        except Exception as e:
+            logger.warning(f"Similar example lookup failed: {str(e)}")
+    
+    # Generate prompt
+    if request.use_analytics and patterns:
+        system_prompt, user_prompt = generate_optimized_prompt(
+            topic, request.keywords, request.mode, patterns
+        )
+        logger.info(f"Using ML-optimized prompt with {len(patterns.get('top_hooks', []))} top hooks")
+    else:
+        system_prompt, user_prompt = generate_german_script_prompt(
+            topic, request.keywords, request.mode
+        )
+        logger.info("Using standard script generation")
+    
+    return system_prompt, user_prompt
+
+
+def _build_script(
+    user_id: str,
+    topic: str,
+    mode: str,
+    keywords: List[str],
+    script_text: str,
+    ml_optimized: Optional[bool] = None,
+    pre_generated: bool = False
+):
+    """
+    Post-process generated text (truncate, extract and classify the hook).
+    Returns the script and hook documents and the API response.
+    `ml_optimized` is only recorded for the optimized endpoints.
+    """
+    # Truncate if too long
+    script_text = truncate_to_length(script_text, 350)
+    
+    # Extract hook
+    hook_text = extract_hook_from_script(script_text)
+    
+    # Detect hook type and tags
+    hook_type, detected_mode, tags = detect_hook_type_and_tags(hook_text, topic)
+    
+    # Count characters
+    char_count = count_characters(script_text)
+    
+    # Create Script object
+    script = Script(
+        user_id=user_id,
+        topic=topic,
+        mode=mode,
+        script=script_text,
+        hook_text=hook_text,
+        hook_type=hook_type,
+        tags=tags,
+        character_count=char_count,
+        keywords=keywords,
+        pre_generated=pre_generated
+    )
+    
+    # Create Hook object (auto-insert to hook library)
+    hook = Hook(
+        user_id=user_id,
+        hook_text=hook_text,
+        mode=detected_mode,
+        hook_type=hook_type,
+        tags=tags,
+        topic=topic,
+        script_id=script.id,
+        source="generated"
+    )
+    
+    # Save to database
+    script_dict = script.model_dump()
+    script_dict['created_at'] = script_dict['created_at'].isoformat()
+    script_dict['updated_at'] = script_dict['created_at']
+    script_dict['hook_id'] = hook.id
+    if ml_optimized is not None:
+        script_dict['ml_optimized'] = ml_optimized  # Mark if ML-optimized
+    
+    hook_dict = hook.model_dump()
+    hook_dict['created_at'] = hook_dict['created_at'].isoformat()
+    hook_dict['updated_at'] = hook_dict['created_at']
+    
+    result = {
+        "id": script.id,
+        "script": script.script,
+        "hook_text": script.hook_text,
+        "hook_type": script.hook_type,
+        "mode": script.mode,
+        "tags": script.tags,
+        "character_count": script.character_count,
+        "hook_id": hook.id,
+        "pre_generated": pre_generated,
+        "created_at": script.created_at.isoformat()
+    }
+    if ml_optimized is not None:
+        result["ml_optimized"] = ml_optimized
+    return script_dict, hook_dict, result
+
+
+async def _save_script(
+    user_id: str,
+    topic: str,
+    mode: str,
+    keywords: List[str],
+    script_text: str,
+    ml_optimized: Optional[bool] = None,
+    pre_generated: bool = False
+) -> dict:
+    """Post-process, save the script and its hook and return the API response."""
+    script_dict, hook_dict, result = _build_script(
+        user_id, topic, mode, keywords, script_text, ml_optimized, pre_generated
+    )
+    await db.scripts.insert_one(script_dict)
+    await db.hooks.insert_one(hook_dict)
+    similarity_index.add(user_id, "hook", hook_dict)
+    
+    logger.info(f"Generated {'ML-optimized' if ml_optimized else 'standard'} script {result['id']} with hook {result['hook_id']} for user {user_id}")
+    return result
+
+
+def _estimated_tokens(system_prompt: str, user_prompt: str) -> int:
+    """Rough prompt plus completion tokens of one script, for the pre-generation budget."""
+    return (len(system_prompt) + len(user_prompt)) // 4 + SCRIPT_MAX_TOKENS
+
+
+def _pregeneration_prompt(user_id: str, topic: str, keywords: List[str], mode: str):
+    """The user's pool key, generator and estimated tokens per completion of a /generate request."""
+    system_prompt, user_prompt = generate_german_script_prompt(topic, keywords, mode)
+    
+    async def generate(n: int) -> List[str]:
+        return await _chat_choices(system_prompt, user_prompt, n)
+    
+    key = pregeneration_key(user_id, completion_key(LLM_MODEL, SCRIPT_TEMPERATURE, system_prompt, user_prompt))
+    return key, generate, _estimated_tokens(system_prompt, user_prompt)
+
+
+pregeneration = PregenerationWorker(_pregeneration_prompt)
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _script_stream(system_prompt: str, user_prompt: str, save, user_id: Optional[str] = None) -> StreamingResponse:
+    """
+    Stream a script as Server-Sent Events: `token` events with text deltas,
+    then one `script` event with the saved script (the same body as the
+    non-streaming endpoint) or an `error` event. `save(text, pre_generated)`
+    persists the full text once the completion has finished. With `user_id`,
+    a script pre-generated for that user is used first.
+    """
+    breaker = breakers["openai"]
+    if breaker.state == "open":
+        raise HTTPException(
+            status_code=503,
+            detail=str(CircuitOpenError("openai", breaker.retry_in())),
+            headers={"Retry-After": str(int(breaker.retry_in()) + 1)}
+        )
+    
+    key = completion_key(LLM_MODEL, SCRIPT_TEMPERATURE, system_prompt, user_prompt)
+    
+    async def refill(n: int) -> List[str]:
+        return await _chat_choices(system_prompt, user_prompt, n)
+    
+    async def event_stream():
+        parts = []
+        try:
+            pooled = await completion_cache.take(pregeneration_key(user_id, key)) if user_id else None
+            pre_generated = pooled is not None
+            if pre_generated:
+                pregeneration.refill_soon(
+                    pregeneration_key(user_id, key), refill, _estimated_tokens(system_prompt, user_prompt)
+                )
+            if pooled is None:
+                pooled = await completion_cache.take(key, refill=refill)
+            if pooled is not None:
+                # A pooled completion goes out as a single token event
+                parts.append(pooled)
+                yield _sse_event("token", {"text": pooled})
+            else:
+                async for delta in _stream_chat_completion(system_prompt, user_prompt):
+                    parts.append(delta)
+                    yield _sse_event("token", {"text": delta})
+                completion_cache.refill_later(key, refill)
+            yield _sse_event("script", await save("".join(parts).strip(), pre_generated))
+        except Exception as e:
+            logger.error(f"Error streaming script: {str(e)}")
+            yield _sse_event("error", {"detail": f"Error generating script: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 
 @router.post("/generate-optimized")
 async def generate_optimized_script(request: OptimizedScriptRequest, current_user = Depends(get_current_user)):
@@ -32,109 +355,41 @@ async def generate_optimized_script(request: OptimizedScriptRequest, current_use
     """
     try:
         topic = request.topic or "Glaube und innere Kraft"
-        
-        # Check if analytics optimization is enabled
-        if request.use_analytics:
-            # Get top performing patterns from analytics data
-            patterns = await get_top_performing_patterns(current_user["id"], request.top_n_examples)
-            
-            # Check if we have analytics data
-            if not patterns["top_hooks"] and not patterns["top_scripts"]:
-                logger.warning(f"No analytics data found for user {current_user['id']}, falling back to normal generation")
-                request.use_analytics = False
-        
-        # Generate prompt
-        if request.use_analytics and patterns:
-            system_prompt, user_prompt = generate_optimized_prompt(
-                topic, request.keywords, request.mode, patterns
-            )
-            logger.info(f"Using ML-optimized prompt with {len(patterns.get('top_hooks', []))} top hooks")
-        else:
-            system_prompt, user_prompt = generate_german_script_prompt(
-                topic, request.keywords, request.mode
-            )
-            logger.info("Using standard script generation")
+        system_prompt, user_prompt = await _optimized_prompts(request, current_user["id"])
         
         # Call OpenAI
-        response = await openai_client.chat.completions.create(
-            model=os.getenv("LLM_MODEL", "gpt-4o-mini"),
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.85,
-            max_tokens=200
-        )
-        
-        script_text = response.choices[0].message.content.strip()
-        
-        # Truncate if too long
-        script_text = truncate_to_length(script_text, 350)
+        pregeneration.touch()
+        script_text, pre_generated = await _chat_completion(system_prompt, user_prompt)
         
-        # Extract hook
-        hook_text = extract_hook_from_script(script_text)
-        
-        # Detect hook type and tags
-        hook_type, detected_mode, tags = detect_hook_type_and_tags(hook_text, topic)
-        
-        # Count characters
-        char_count = count_characters(script_text)
-        
-        # Create Script object
-        script = Script(
-            user_id=current_user["id"],
-            topic=topic,
-            mode=request.mode,
-            script=script_text,
-            hook_text=hook_text,
-            hook_type=hook_type,
-            tags=tags,
-            character_count=char_count,
-            keywords=request.keywords
+        return await _save_script(
+            current_user["id"], topic, request.mode, request.keywords, script_text,
+            ml_optimized=request.use_analytics, pre_generated=pre_generated
         )
-        
-        # Create Hook object (auto-insert to hook library)
-        hook = Hook(
-            user_id=current_user["id"],
-            hook_text=hook_text,
-            mode=detected_mode,
-            hook_type=hook_type,
-            tags=tags,
-            topic=topic,
-            script_id=script.id,
-            source="generated"
-        )
-        
-        # Save to database
-        script_dict = script.model_dump()
-        script_dict['created_at'] = script_dict['created_at'].isoformat()
-        script_dict['hook_id'] = hook.id
-        script_dict['ml_optimized'] = request.use_analytics  # Mark if ML-optimized
-        await db.scripts.insert_one(script_dict)
-        
-        hook_dict = hook.model_dump()
-        hook_dict['created_at'] = hook_dict['created_at'].isoformat()
-        await db.hooks.insert_one(hook_dict)
-        
-        logger.info(f"Generated {'ML-optimized' if request.use_analytics else 'standard'} script {script.id} with hook {hook.id}")
-        
-        return {
-            "id": script.id,
-            "script": script.script,
-            "hook_text": script.hook_text,
-            "hook_type": script.hook_type,
-            "mode": script.mode,
-            "tags": script.tags,
-            "character_count": script.character_count,
-            "hook_id": hook.id,
-            "ml_optimized": request.use_analytics,
-            "created_at": script.created_at.isoformat()
-        }
     
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_in) + 1)})
     except Exception as e:
         logger.error(f"Error generating optimized script: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating script: {str(e)}")
 
+@router.post("/generate-optimized/stream")
+async def stream_optimized_script(request: OptimizedScriptRequest, current_user = Depends(get_current_user)):
+    """
+    Streaming variant of /generate-optimized: script text arrives as SSE
+    `token` events, then the saved script as a `script` event.
+    """
+    topic = request.topic or "Glaube und innere Kraft"
+    system_prompt, user_prompt = await _optimized_prompts(request, current_user["id"])
+    pregeneration.touch()
+    
+    async def save(script_text: str, pre_generated: bool) -> dict:
+        return await _save_script(
+            current_user["id"], topic, request.mode, request.keywords, script_text,
+            ml_optimized=request.use_analytics, pre_generated=pre_generated
+        )
+    
+    return _script_stream(system_prompt, user_prompt, save)
+
 @router.post("/generate")
 async def generate_script(request: ScriptGenerateRequest, current_user = Depends(get_current_user)):
     """
@@ -149,91 +404,113 @@ async def generate_script(request: ScriptGenerateRequest, current_user = Depends
             topic, request.keywords, request.mode
         )
         
-        # Call OpenAI
-        response = await openai_client.chat.completions.create(
-            model=os.getenv("LLM_MODEL", "gpt-4o-mini"),
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.85,
-            max_tokens=200
-        )
-        
-        script_text = response.choices[0].message.content.strip()
-        
-        # Truncate if too long
-        script_text = truncate_to_length(script_text, 350)
+        # Call OpenAI (or take a pre-generated script)
+        pregeneration.touch()
+        script_text, pre_generated = await _chat_completion(system_prompt, user_prompt, current_user["id"])
         
-        # Extract hook
-        hook_text = extract_hook_from_script(script_text)
-        
-        # Detect hook type and tags
-        hook_type, detected_mode, tags = detect_hook_type_and_tags(hook_text, topic)
-        
-        # Count characters
-        char_count = count_characters(script_text)
-        
-        # Create Script object
-        script = Script(
-            user_id=current_user["id"],
-            topic=topic,
-            mode=request.mode,
-            script=script_text,
-            hook_text=hook_text,
-            hook_type=hook_type,
-            tags=tags,
-            character_count=char_count,
-            keywords=request.keywords
-        )
-        
-        # Create Hook object (auto-insert to hook library)
-        hook = Hook(
-            user_id=current_user["id"],
-            hook_text=hook_text,
-            mode=detected_mode,
-            hook_type=hook_type,
-            tags=tags,
-            topic=topic,
-            script_id=script.id,
-            source="generated"
+        return await _save_script(
+            current_user["id"], topic, request.mode, request.keywords, script_text,
+            pre_generated=pre_generated
         )
-        
-        # Save to database
-        script_dict = script.model_dump()
-        script_dict['created_at'] = script_dict['created_at'].isoformat()
-        script_dict['hook_id'] = hook.id
-        await db.scripts.insert_one(script_dict)
-        
-        hook_dict = hook.model_dump()
-        hook_dict['created_at'] = hook_dict['created_at'].isoformat()
-        await db.hooks.insert_one(hook_dict)
-        
-        logger.info(f"Generated script {script.id} with hook {hook.id} for user {current_user['id']}")
-        
-        return {
-            "id": script.id,
-            "script": script.script,
-            "hook_text": script.hook_text,
-            "hook_type": script.hook_type,
-            "mode": script.mode,
-            "tags": script.tags,
-            "character_count": script.character_count,
-            "hook_id": hook.id,
-            "created_at": script.created_at.isoformat()
-        }
     
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_in) + 1)})
     except Exception as e:
         logger.error(f"Error generating script: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating script: {str(e)}")
 
-@router.get("", response_model=List[dict])
-async def get_scripts(current_user = Depends(get_current_user), limit: int = 50, skip: int = 0):
+@router.post("/generate/stream")
+async def stream_script(request: ScriptGenerateRequest, current_user = Depends(get_current_user)):
+    """
+    Streaming variant of /generate: script text arrives as SSE `token`
+    events, then the saved script as a `script` event.
+    """
+    topic = request.topic or "Glaube und innere Kraft"
+    system_prompt, user_prompt = generate_german_script_prompt(
+        topic, request.keywords, request.mode
+    )
+    pregeneration.touch()
+    
+    async def save(script_text: str, pre_generated: bool) -> dict:
+        return await _save_script(
+            current_user["id"], topic, request.mode, request.keywords, script_text,
+            pre_generated=pre_generated
+        )
+    
+    return _script_stream(system_prompt, user_prompt, save, current_user["id"])
+
+@router.post("/generate-batch")
+async def generate_script_batch(request: ScriptBatchGenerateRequest, current_user = Depends(get_current_user)):
+    """
+    Generate `n` scripts for each of `topics` (or for `topic`) in one call.
+    Completions for all topics run concurrently under the OpenAI rate limits,
+    each asking for `n` choices; scripts and hooks are saved with one
+    insert_many each. Topics whose completion failed are listed in `failed`.
+    """
+    topics = request.topics or [request.topic or "Glaube und innere Kraft"]
+    prompts = [generate_german_script_prompt(topic, request.keywords, request.mode) for topic in topics]
+    
+    completions = await asyncio.gather(
+        *(_chat_choices(system_prompt, user_prompt, request.n) for system_prompt, user_prompt in prompts),
+        return_exceptions=True
+    )
+    
+    script_dicts, hook_dicts, scripts, failed = [], [], [], []
+    for topic, texts in zip(topics, completions):
+        if isinstance(texts, Exception):
+            logger.error(f"Error generating scripts for topic {topic}: {str(texts)}")
+            failed.append({"topic": topic, "detail": str(texts)})
+            continue
+        for script_text in texts:
+            script_dict, hook_dict, result = _build_script(
+                current_user["id"], topic, request.mode, request.keywords, script_text
+            )
+            script_dicts.append(script_dict)
+            hook_dicts.append(hook_dict)
+            scripts.append(result)
+    
+    if not scripts:
+        error = completions[0]
+        if isinstance(error, CircuitOpenError):
+            raise HTTPException(status_code=503, detail=str(error), headers={"Retry-After": str(int(error.retry_in) + 1)})
+        raise HTTPException(status_code=500, detail=f"Error generating scripts: {str(error)}")
+    
+    await db.scripts.insert_many(script_dicts)
+    await db.hooks.insert_many(hook_dicts)
+    for hook_dict in hook_dicts:
+        similarity_index.add(current_user["id"], "hook", hook_dict)
+    
+    logger.info(f"Generated batch of {len(scripts)} scripts ({len(failed)} topics failed) for user {current_user['id']}")
+    
+    return {"scripts": scripts, "failed": failed}
+
+@router.get("")
+async def get_scripts(
+    response: Response,
+    current_user = Depends(get_current_user),
+    limit: int = 50,
+    skip: int = 0,
+    since: Optional[str] = None,
+    wait: int = 0
+):
     """
     Get user's scripts with pagination.
+    
+    Delta sync: the X-Sync-Cursor response header holds a cursor. Passing it back
+    as `since` returns only {changed, deleted, cursor} since that call; `wait`
+    long-polls up to that many seconds (max 30) for a change.
     """
+    query = {"user_id": current_user["id"]}
+    
+    if since:
+        try:
+            return await get_changes(db, "scripts", query, since, wait=wait)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    response.headers["X-Sync-Cursor"] = new_cursor()
     scripts = await db.scripts.find(
-        {"user_id": current_user["id"]},
+        query,
         {"_id": 0}
     ).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
     
@@ -282,7 +559,8 @@ async def update_script(
         {
             "$set": {
                 "script": new_script_text,
-                "character_count": character_count
+                "character_count": character_count,
+                "updated_at": now_iso()
             }
         }
     )
@@ -309,4 +587,6 @@ async def delete_script(script_id: str, current_user = Depends(get_current_user)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Script not found")
     
+    await record_deletion(db, "scripts", script_id, current_user["id"])
+    
     return {"message": "Script deleted"}
\ No newline at end of file
@@ -1,28 +1,68 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from fastapi.responses import FileResponse
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import Optional
+import asyncio
 import logging
+import json
+import os
 from pathlib import Path
 
-from models import Video, VideoGenerateRequest
+from models import Video, VideoGenerateRequest, VideoBatch, VideoBatchGenerateRequest, VideoEstimateRequest
 from routes.auth import get_current_user
-from services.video_service import VideoGenerationService
+from services.video_service import VideoGenerationService, BrollCache
+from services.render_queue import RenderQueue, RenderJob
+from services.admission import AdmissionController
+from services.render_estimator import render_estimator
+from services.encode_profiles import ENCODE_PROFILES, PREVIEW_ONLY_PROFILES, resolve_encode_profile
+from services.progress import progress_broker, TERMINAL_STATUSES
+from services.tracing import get_span_histograms
+from services.telemetry import RENDER_QUEUE_DEPTH, RENDER_JOBS_RUNNING
+from utils.sync import now_iso, get_changes, new_cursor
 from database import db
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+SSE_KEEPALIVE_SECONDS = 15  # Also how often MongoDB is re-checked for renders in other processes
+
 video_service = VideoGenerationService()
+render_queue = RenderQueue(video_service.generate_video)
+admission = AdmissionController(render_queue, video_service.output_dir)
+
+RENDER_QUEUE_DEPTH.callback = lambda: {(kind,): len(queue) for kind, queue in render_queue.queues.items()}
+RENDER_JOBS_RUNNING.callback = lambda: {(): len(render_queue.running)}
+
+def admit(kind: str, count: int = 1):
+    """
+    Reject with 429 and Retry-After when the render host cannot take more jobs
+    right now, or with 413 when it could never take this many at once.
+    """
+    rejection = admission.check(kind, count)
+    if rejection and rejection["retry_after"] is None:
+        raise HTTPException(status_code=413, detail=rejection)
+    if rejection:
+        raise HTTPException(
+            status_code=429,
+            detail=rejection,
+            headers={"Retry-After": str(rejection["retry_after"])}
+        )
+
+def final_encode_profile(requested: Optional[str]) -> str:
+    """The encode profile for a final render; 400 for preview-only profiles."""
+    try:
+        return resolve_encode_profile(requested)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/generate")
 async def generate_video(
     request: VideoGenerateRequest,
-    background_tasks: BackgroundTasks,
     current_user = Depends(get_current_user)
 ):
     """
     Generate video from script.
     Process: Script → TTS (ElevenLabs) → B-roll (Pexels) → FFmpeg Assembly → MP4
+    Returns 429 with Retry-After when the render queue, disk or workers are saturated.
     """
     try:
         # Get script
@@ -34,49 +74,310 @@ async def generate_video(
         if not script:
             raise HTTPException(status_code=404, detail="Script not found")
         
+        encode_profile = final_encode_profile(request.encode_profile)
+        kind = "preview" if request.preview else "single"
+        admit(kind)
+        estimated_start = admission.estimated_start(kind)
+        
+        render_profile = "preview" if request.preview else "final"
+        
+        await render_estimator.refresh(db)
+        features = render_estimator.job_features(
+            script["script"], render_profile, encode_profile, request.renditions,
+            concurrent_jobs=len(render_queue.running)
+        )
+        
         # Create video record
+        settings = request.model_dump(exclude={"script_id", "preview"})
+        settings["encode_profile"] = encode_profile
         video = Video(
             user_id=current_user["id"],
             script_id=request.script_id,
-            status="queued"
+            status="queued",
+            render_profile=render_profile,
+            encode_profile=encode_profile,
+            settings=settings
         )
         
         video_dict = video.model_dump()
         video_dict['created_at'] = video_dict['created_at'].isoformat()
+        video_dict['updated_at'] = video_dict['created_at']
         
         await db.videos.insert_one(video_dict)
         
-        # Queue video generation in background
-        background_tasks.add_task(
-            video_service.generate_video,
+        # Queue video generation (previews first, then single finals, then batch jobs)
+        render_queue.submit(RenderJob(
             video_id=video.id,
-            script_text=script["script"],
-            topic=script["topic"],
             user_id=current_user["id"],
-            voice_settings=request.voice_settings,
-            background_music=request.background_music,
-            b_roll_search=request.b_roll_search
-        )
+            kind=kind,
+            estimated_seconds=render_estimator.predict_seconds(features),
+            kwargs=dict(
+                video_id=video.id,
+                script_text=script["script"],
+                topic=script["topic"],
+                user_id=current_user["id"],
+                voice_settings=request.voice_settings,
+                background_music=request.background_music,
+                b_roll_search=request.b_roll_search,
+                render_profile=render_profile,
+                encode_profile=encode_profile,
+                multi_output=request.renditions
+            )
+        ))
         
-        logger.info(f"Queued video generation {video.id} for script {request.script_id}")
+        logger.info(f"Queued {render_profile} video generation {video.id} for script {request.script_id}")
         
         return {
             "id": video.id,
             "status": "queued",
+            "render_profile": render_profile,
+            "estimated_start": estimated_start,
             "message": "Video generation started"
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error queuing video generation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("", response_model=List[dict])
-async def get_videos(current_user = Depends(get_current_user), limit: int = 50):
+@router.post("/generate-batch")
+async def generate_video_batch(
+    request: VideoBatchGenerateRequest,
+    current_user = Depends(get_current_user)
+):
+    """
+    Generate videos for many scripts with shared settings.
+    All video records are inserted at once, Pexels searches and clip downloads
+    are shared across the batch, and the jobs run at batch priority.
+    """
+    try:
+        scripts = await db.scripts.find(
+            {"id": {"$in": request.script_ids}, "user_id": current_user["id"]},
+            {"_id": 0, "id": 1, "script": 1, "topic": 1}
+        ).to_list(length=len(request.script_ids))
+        
+        scripts_by_id = {s["id"]: s for s in scripts}
+        missing = [sid for sid in request.script_ids if sid not in scripts_by_id]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Scripts not found: {', '.join(missing)}")
+        
+        encode_profile = final_encode_profile(request.encode_profile)
+        admit("batch", len(request.script_ids))
+        await render_estimator.refresh(db)
+        
+        settings = request.model_dump(exclude={"script_ids"})
+        settings["encode_profile"] = encode_profile
+        batch = VideoBatch(user_id=current_user["id"], settings=settings)
+        
+        videos = [
+            Video(
+                user_id=current_user["id"],
+                script_id=script_id,
+                batch_id=batch.id,
+                status="queued",
+                encode_profile=settings["encode_profile"],
+                settings=settings
+            )
+            for script_id in request.script_ids
+        ]
+        batch.video_ids = [video.id for video in videos]
+        
+        video_dicts = []
+        for video in videos:
+            video_dict = video.model_dump()
+            video_dict['created_at'] = video_dict['created_at'].isoformat()
+            video_dict['updated_at'] = video_dict['created_at']
+            video_dicts.append(video_dict)
+        
+        batch_dict = batch.model_dump()
+        batch_dict['created_at'] = batch_dict['created_at'].isoformat()
+        
+        await db.videos.insert_many(video_dicts)
+        await db.video_batches.insert_one(batch_dict)
+        
+        broll_cache = BrollCache(key=f"batch_{batch.id}")
+        render_queue.submit_many([
+            RenderJob(
+                video_id=video.id,
+                user_id=current_user["id"],
+                kind="batch",
+                estimated_seconds=render_estimator.predict_seconds(render_estimator.job_features(
+                    scripts_by_id[video.script_id]["script"], "final", settings["encode_profile"],
+                    request.renditions
+                )),
+                batch_id=batch.id,
+                kwargs=dict(
+                    video_id=video.id,
+                    script_text=scripts_by_id[video.script_id]["script"],
+                    topic=scripts_by_id[video.script_id]["topic"],
+                    user_id=current_user["id"],
+                    voice_settings=request.voice_settings,
+                    background_music=request.background_music,
+                    b_roll_search=request.b_roll_search,
+                    broll_cache=broll_cache,
+                    encode_profile=settings["encode_profile"],
+                    multi_output=request.renditions
+                )
+            )
+            for video in videos
+        ])
+        
+        logger.info(f"Queued video batch {batch.id} with {len(videos)} videos")
+        
+        return {
+            "batch_id": batch.id,
+            "video_ids": batch.video_ids,
+            "status": "queued",
+            "message": f"Batch of {len(videos)} videos queued"
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queuing video batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/estimate")
+async def estimate_video(
+    request: VideoEstimateRequest,
+    current_user = Depends(get_current_user)
+):
+    """
+    Estimate how long a render would take and what it would cost in API units,
+    without queuing it. Render time comes from a model fitted on past renders;
+    the queue wait from the current render queue.
+    """
+    script_text = request.script_text
+    if request.script_id:
+        script = await db.scripts.find_one(
+            {"id": request.script_id, "user_id": current_user["id"]},
+            {"_id": 0, "script": 1}
+        )
+        if not script:
+            raise HTTPException(status_code=404, detail="Script not found")
+        script_text = script["script"]
+    
+    kind = "preview" if request.preview else "single"
+    features = render_estimator.job_features(
+        script_text,
+        "preview" if request.preview else "final",
+        final_encode_profile(request.encode_profile),
+        request.renditions,
+        concurrent_jobs=len(render_queue.running)
+    )
+    
+    await render_estimator.refresh(db)
+    render_seconds = render_estimator.predict_seconds(features)
+    wait_seconds = render_queue.estimated_wait(kind)
+    units = render_estimator.api_units(features)
+    
+    return {
+        "render_seconds": round(render_seconds, 1),
+        "queue_wait_seconds": round(wait_seconds, 1),
+        "total_seconds": round(render_seconds + wait_seconds, 1),
+        "estimated_start": admission.estimated_start(kind),
+        "api_units": units,
+        "api_cost_usd": render_estimator.api_cost(units),
+        "model": {
+            "samples": render_estimator.samples,
+            "fitted": render_estimator.weights is not None
+        }
+    }
+
+@router.get("/batches/{batch_id}")
+async def get_video_batch(batch_id: str, current_user = Depends(get_current_user)):
+    """
+    Get batch details with aggregate progress.
+    """
+    batch = await db.video_batches.find_one(
+        {"id": batch_id, "user_id": current_user["id"]},
+        {"_id": 0}
+    )
+    
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    status_counts = await db.videos.aggregate([
+        {"$match": {"batch_id": batch_id, "user_id": current_user["id"]}},
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]).to_list(length=None)
+    
+    counts = {"queued": 0, "processing": 0, "preview_ready": 0, "completed": 0, "failed": 0, "cancelled": 0}
+    for row in status_counts:
+        counts[row["_id"]] = row["count"]
+    
+    total = len(batch["video_ids"])
+    finished = counts["completed"] + counts["failed"] + counts["preview_ready"] + counts["cancelled"]
+    
+    batch["progress"] = {
+        "total": total,
+        "counts": counts,
+        "percent": round(finished / total * 100, 1) if total else 100.0,
+        "done": finished == total
+    }
+    
+    return batch
+
+@router.get("/encode-profiles")
+async def get_encode_profiles(current_user = Depends(get_current_user)):
+    """
+    List encode profiles, the default, the preview-only ones and the latest benchmark
+    results (written by benchmarks/encode_profiles.py).
+    """
+    benchmark = None
+    benchmark_path = Path(os.getenv(
+        "ENCODE_BENCHMARK_PATH",
+        str(video_service.output_dir / "encode_benchmark.json")
+    ))
+    if benchmark_path.exists():
+        with open(benchmark_path) as f:
+            benchmark = json.load(f)
+    
+    return {
+        "profiles": ENCODE_PROFILES,
+        "default": resolve_encode_profile(None),
+        "preview_only": sorted(PREVIEW_ONLY_PROFILES),
+        "benchmark": benchmark
+    }
+
+@router.get("/span-histograms")
+async def get_render_span_histograms(hours: int = 24, current_user = Depends(get_current_user)):
+    """
+    Latency histograms of render pipeline spans (TTS request, transcode, Whisper,
+    Pexels search, download, clip normalize, concat, subtitles, encode) over the
+    last `hours`, with approximate p50/p95/p99 from the bucket bounds.
+    Per-render spans with CPU, peak RSS and bytes are on each video as `spans`.
+    """
+    hours = max(1, min(hours, 24 * 30))
+    return {
+        "hours": hours,
+        "spans": await get_span_histograms(db, hours)
+    }
+
+@router.get("")
+async def get_videos(
+    response: Response,
+    current_user = Depends(get_current_user),
+    limit: int = 50,
+    since: Optional[str] = None,
+    wait: int = 0
+):
     """
     Get user's generated videos.
+    since/wait: delta sync, see GET /scripts.
     """
+    query = {"user_id": current_user["id"]}
+    
+    if since:
+        try:
+            return await get_changes(db, "videos", query, since, wait=wait)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    response.headers["X-Sync-Cursor"] = new_cursor()
     videos = await db.videos.find(
-        {"user_id": current_user["id"]},
+        query,
         {"_id": 0}
     ).sort("created_at", -1).limit(limit).to_list(length=limit)
     
@@ -86,6 +387,7 @@ async def get_videos(current_user = Depends(get_current_user), limit: int = 50):
 async def get_video(video_id: str, current_user = Depends(get_current_user)):
     """
     Get video status and details.
+    Queued videos include their estimated `queue_position` (1 = next to start).
     """
     video = await db.videos.find_one(
         {"id": video_id, "user_id": current_user["id"]},
@@ -95,12 +397,85 @@ async def get_video(video_id: str, current_user = Depends(get_current_user)):
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
+    if video.get("status") == "queued":
+        video["queue_position"] = render_queue.position(video_id)
+    
     return video
 
+@router.get("/{video_id}/events")
+async def stream_video_events(
+    video_id: str,
+    request: Request,
+    current_user = Depends(get_current_user)
+):
+    """
+    Server-Sent Events stream of render progress. Authenticated with the
+    Authorization header like every other endpoint (read it with fetch, not
+    EventSource), so the token never appears in URLs or access logs.
+    Sends the current state first, then `progress` events with stage and percent,
+    and closes after the final (completed/failed/preview_ready) event.
+    """
+    video = await db.videos.find_one(
+        {"id": video_id, "user_id": current_user["id"]},
+        {"_id": 0, "id": 1, "status": 1, "stage": 1, "progress": 1, "error": 1, "render_profile": 1}
+    )
+    
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    def format_event(data: dict) -> str:
+        return f"event: progress\ndata: {json.dumps(data)}\n\n"
+    
+    def snapshot(doc: dict) -> dict:
+        return {
+            "video_id": video_id,
+            "status": doc.get("status"),
+            "stage": doc.get("stage"),
+            "percent": doc.get("progress", 0.0),
+            "error": doc.get("error"),
+            "render_profile": doc.get("render_profile")
+        }
+    
+    async def event_stream():
+        queue = progress_broker.subscribe(video_id)
+        try:
+            yield format_event(snapshot(video))
+            if video.get("status") in TERMINAL_STATUSES:
+                return
+            
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # No local events: the render may run in another process, so poll once
+                    doc = await db.videos.find_one({"id": video_id}, {"_id": 0})
+                    if doc and doc.get("status") in TERMINAL_STATUSES:
+                        yield format_event(snapshot(doc))
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                
+                yield format_event(event)
+                if event.get("status") in TERMINAL_STATUSES:
+                    return
+        finally:
+            progress_broker.unsubscribe(video_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/{video_id}/download")
-async def download_video(video_id: str, current_user = Depends(get_current_user)):
+async def download_video(
+    video_id: str,
+    current_user = Depends(get_current_user),
+    rendition: Optional[str] = None
+):
     """
     Download completed video file.
+    Pass `rendition` (e.g. "720p") to get an extra rendition instead of the master.
     """
     video = await db.videos.find_one(
         {"id": video_id, "user_id": current_user["id"]},
@@ -113,7 +488,15 @@ async def download_video(video_id: str, current_user = Depends(get_current_user)
     if video.get("status") != "completed":
         raise HTTPException(status_code=400, detail="Video is not ready yet")
     
-    video_path = Path(video.get("video_url"))
+    if rendition:
+        rendition_url = video.get("renditions", {}).get(rendition)
+        if not rendition_url:
+            raise HTTPException(status_code=404, detail=f"Rendition {rendition} not found")
+        video_path = Path(rendition_url)
+        filename = f"legyenez_{video_id[:8]}_{rendition}.mp4"
+    else:
+        video_path = Path(video.get("video_url"))
+        filename = f"legyenez_{video_id[:8]}.mp4"
     
     if not video_path.exists():
         raise HTTPException(status_code=404, detail="Video file not found")
@@ -121,5 +504,159 @@ async def download_video(video_id: str, current_user = Depends(get_current_user)
     return FileResponse(
         path=str(video_path),
         media_type="video/mp4",
-        filename=f"legyenez_{video_id[:8]}.mp4"
-    )
\ No newline at end of file
+        filename=filename
+    )
+
+@router.get("/{video_id}/poster")
+async def get_video_poster(video_id: str, current_user = Depends(get_current_user)):
+    """
+    Get the poster frame (thumbnail) of a video.
+    """
+    video = await db.videos.find_one(
+        {"id": video_id, "user_id": current_user["id"]},
+        {"_id": 0}
+    )
+    
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    if not video.get("poster_url"):
+        raise HTTPException(status_code=404, detail="No poster available")
+    
+    poster_path = Path(video["poster_url"])
+    
+    if not poster_path.exists():
+        raise HTTPException(status_code=404, detail="Poster file not found")
+    
+    return FileResponse(path=str(poster_path), media_type="image/jpeg")
+
+@router.post("/{video_id}/promote")
+async def promote_video(video_id: str, current_user = Depends(get_current_user)):
+    """
+    Render the full-quality video from a finished preview.
+    Reuses the preview's audio, word timestamps and B-roll, so only the
+    FFmpeg assembly runs again.
+    """
+    video = await db.videos.find_one(
+        {"id": video_id, "user_id": current_user["id"]},
+        {"_id": 0}
+    )
+    
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    if video.get("status") != "preview_ready":
+        raise HTTPException(status_code=400, detail="Only finished previews can be promoted")
+    
+    script = await db.scripts.find_one(
+        {"id": video["script_id"], "user_id": current_user["id"]},
+        {"_id": 0}
+    )
+    
+    if not script:
+        raise HTTPException(status_code=404, detail="Script not found")
+    
+    settings = video.get("settings", {})
+    encode_profile = final_encode_profile(settings.get("encode_profile"))
+    admit("single")
+    
+    await render_estimator.refresh(db)
+    features = render_estimator.job_features(
+        script["script"], "final", encode_profile, settings.get("renditions", False), promote=True
+    )
+    
+    # Only one request can move the preview on; a double-click or retry gets 409
+    result = await db.videos.update_one(
+        {"id": video_id, "user_id": current_user["id"], "status": "preview_ready"},
+        {"$set": {"status": "queued", "render_profile": "final", "updated_at": now_iso()}}
+    )
+    if not result.modified_count:
+        raise HTTPException(status_code=409, detail="This preview is already being promoted")
+    
+    render_queue.submit(RenderJob(
+        video_id=video_id,
+        user_id=current_user["id"],
+        kind="single",
+        estimated_seconds=render_estimator.predict_seconds(features),
+        kwargs=dict(
+            video_id=video_id,
+            script_text=script["script"],
+            topic=script["topic"],
+            user_id=current_user["id"],
+            voice_settings=settings.get("voice_settings"),
+            background_music=settings.get("background_music"),
+            b_roll_search=settings.get("b_roll_search"),
+            render_profile="final",
+            promote=True,
+            encode_profile=encode_profile,
+            multi_output=settings.get("renditions", False)
+        )
+    ))
+    
+    logger.info(f"Promoted preview {video_id} to final render")
+    
+    return {
+        "id": video_id,
+        "status": "queued",
+        "render_profile": "final",
+        "message": "Final render started from preview"
+    }
+
+@router.post("/{video_id}/cancel")
+async def cancel_video(video_id: str, current_user = Depends(get_current_user)):
+    """
+    Stop a queued or running render.
+    A running job is interrupted at its current stage: FFmpeg processes are
+    killed, downloads aborted, scratch files removed and the worker slot freed.
+    Cancelling a promotion returns the video to its finished preview.
+    """
+    video = await db.videos.find_one(
+        {"id": video_id, "user_id": current_user["id"]},
+        {"_id": 0, "status": 1, "preview_url": 1}
+    )
+    
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    if video.get("status") not in ("queued", "processing"):
+        raise HTTPException(status_code=400, detail="Video is not queued or rendering")
+    
+    state = render_queue.cancel(video_id)
+    
+    if state != "running":
+        # Not started (or orphaned by a restart): nothing to stop, just record it
+        await video_service.mark_cancelled(video_id, promote=bool(video.get("preview_url")))
+    
+    logger.info(f"Cancelled render {video_id} ({state or 'not in queue'})")
+    
+    return {
+        "id": video_id,
+        "status": "cancelling" if state == "running" else "cancelled"
+    }
+
+@router.get("/{video_id}/preview")
+async def download_preview(video_id: str, current_user = Depends(get_current_user)):
+    """
+    Stream the draft preview render.
+    """
+    video = await db.videos.find_one(
+        {"id": video_id, "user_id": current_user["id"]},
+        {"_id": 0}
+    )
+    
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    if not video.get("preview_url"):
+        raise HTTPException(status_code=400, detail="No preview available")
+    
+    preview_path = Path(video["preview_url"])
+    
+    if not preview_path.exists():
+        raise HTTPException(status_code=404, detail="Preview file not found")
+    
+    return FileResponse(
+        path=str(preview_path),
+        media_type="video/mp4",
+        filename=f"legyenez_{video_id[:8]}_preview.mp4"
+    )
@@ -1,12 +1,16 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Request, HTTPException
+from fastapi.responses import PlainTextResponse
 from starlette.middleware.cors import CORSMiddleware
 import os
+import time
 import logging
 from datetime import datetime, timezone
 
 # Import routes
 from routes import auth, scripts, hooks, metrics, videos, analytics, notion_analytics, saved_voices, voice_preferences
 from utils.database import init_database
+from services.telemetry import REGISTRY, CONTENT_TYPE, HTTP_REQUEST_DURATION
+from services.api_clients import api_clients
 from database import db
 
 # Create FastAPI app
@@ -51,6 +55,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Request latency per route template (not raw path, to keep label cardinality low)."""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=route.path if route else "unmatched",
+            status=str(status)
+        )
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -64,13 +86,27 @@ async def startup_event():
     logger.info("Starting LEGYENEZ API Server...")
     await init_database(db)
     logger.info("Database initialized with indexes")
+    scripts.pregeneration.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database connection on shutdown"""
     logger.info("Shutting down LEGYENEZ API Server...")
+    scripts.pregeneration.stop()
     from database import client
     client.close()
+    await api_clients.close()
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """
+    Prometheus text exposition of API and render worker metrics (the render
+    workers run in this process). Set METRICS_TOKEN to require a bearer token.
+    """
+    token = os.environ.get("METRICS_TOKEN")
+    if token and request.headers.get("authorization") != f"Bearer {token}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,98 @@
+import os
+import math
+import shutil
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+from services.render_queue import RenderQueue
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionController:
+    """
+    Decides whether new renders may be queued, based on live load:
+    - queue depth: at most RENDER_MAX_QUEUE_DEPTH queued jobs of the same or
+      higher priority (a request for more jobs than that is never admitted)
+    - scratch disk: every job that can run at once needs RENDER_JOB_DISK_MB on
+      top of RENDER_MIN_FREE_DISK_MB
+    - worker capacity: the first new job must be able to start within
+      RENDER_MAX_WAIT_SECONDS
+    A rejection says which limit was hit, when to retry and when the job would
+    have started. Only the existing load is judged, so retrying after
+    `retry_after` can succeed; a request that could never fit gets
+    `retry_after` None.
+    """
+
+    def __init__(self, render_queue: RenderQueue, scratch_dir: Path):
+        self.render_queue = render_queue
+        self.scratch_dir = scratch_dir
+        self.max_queue_depth = int(os.getenv("RENDER_MAX_QUEUE_DEPTH", "50"))
+        self.min_free_disk_mb = int(os.getenv("RENDER_MIN_FREE_DISK_MB", "2048"))
+        self.job_disk_mb = int(os.getenv("RENDER_JOB_DISK_MB", "200"))
+        self.max_wait_seconds = int(os.getenv("RENDER_MAX_WAIT_SECONDS", "1800"))
+
+    def estimated_start(self, kind: str, count: int = 1) -> str:
+        """ISO time at which the last of `count` new jobs of `kind` would start."""
+        wait = self.render_queue.estimated_wait(kind, count)
+        return (datetime.utcnow() + timedelta(seconds=wait)).isoformat()
+
+    def check(self, kind: str, count: int = 1) -> Optional[Dict]:
+        """
+        Return None if `count` jobs of `kind` can be admitted, otherwise
+        {reason, message, retry_after, estimated_start}.
+        """
+        queue = self.render_queue
+        if count > self.max_queue_depth:
+            logger.warning(f"Render admission rejected (too_large): {count} jobs requested")
+            return {
+                "reason": "too_large",
+                "message": f"At most {self.max_queue_depth} renders can be queued at once ({count} requested)",
+                "retry_after": None,
+                "estimated_start": None
+            }
+
+        # Judged by when the first new job starts: the backlog, not the batch itself
+        wait = queue.estimated_wait(kind)
+
+        depth = queue.queue_depth(kind)
+        if depth + count > self.max_queue_depth:
+            # Wait until enough queued jobs have started to make room
+            excess = depth + count - self.max_queue_depth
+            retry_after = excess / queue.concurrency * queue.avg_job_seconds
+            return self._reject(
+                "queue_full",
+                f"Render queue is full ({depth} jobs queued)",
+                retry_after, wait
+            )
+
+        free_mb = shutil.disk_usage(self.scratch_dir).free / (1024 * 1024)
+        # Queued jobs take no scratch space until they run
+        needed_mb = self.min_free_disk_mb + min(count, queue.concurrency) * self.job_disk_mb
+        if free_mb < needed_mb:
+            # Scratch space is released as running jobs finish
+            return self._reject(
+                "disk_full",
+                f"Not enough scratch disk ({free_mb:.0f} MB free, {needed_mb} MB needed)",
+                queue.avg_job_seconds, wait
+            )
+
+        if wait > self.max_wait_seconds:
+            return self._reject(
+                "overloaded",
+                f"Renders would not start for {wait / 60:.0f} minutes",
+                wait - self.max_wait_seconds, wait
+            )
+
+        return None
+
+    def _reject(self, reason: str, message: str, retry_after: float, wait: float) -> Dict:
+        logger.warning(f"Render admission rejected ({reason}): {message}")
+        return {
+            "reason": reason,
+            "message": message,
+            "retry_after": max(1, math.ceil(retry_after)),
+            "estimated_start": (datetime.utcnow() + timedelta(seconds=wait)).isoformat()
+        }
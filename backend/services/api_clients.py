@@ -0,0 +1,147 @@
+import os
+import time
+import logging
+from typing import Dict, Optional
+
+import httpx
+from openai import AsyncOpenAI
+from elevenlabs.client import AsyncElevenLabs
+
+from services.telemetry import EXTERNAL_API_RESPONSE_LATENCY
+from services.rate_governor import rate_governor
+
+logger = logging.getLogger(__name__)
+
+# Base URLs; point them at local stubs for load tests (benchmarks/stub_servers.py)
+PEXELS_API_URL = os.getenv("PEXELS_API_URL", "https://api.pexels.com").rstrip("/")
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL")  # None: the SDK's production endpoint
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # None: api.openai.com
+
+# Connection pool per API: keep-alive connections are reused across renders and requests
+API_MAX_CONNECTIONS = int(os.getenv("API_MAX_CONNECTIONS", "20"))
+API_MAX_KEEPALIVE = int(os.getenv("API_MAX_KEEPALIVE", "10"))
+API_KEEPALIVE_EXPIRY = float(os.getenv("API_KEEPALIVE_EXPIRY", "60"))
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "5"))
+
+# Read timeouts (seconds between bytes) per API
+API_READ_TIMEOUTS = {
+    "elevenlabs": float(os.getenv("ELEVENLABS_READ_TIMEOUT", "60")),
+    "openai": float(os.getenv("OPENAI_READ_TIMEOUT", "120")),
+    "pexels": float(os.getenv("PEXELS_READ_TIMEOUT", "15")),
+    "pexels_files": float(os.getenv("PEXELS_DOWNLOAD_READ_TIMEOUT", "60"))
+}
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def _timeout(api: str) -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=API_CONNECT_TIMEOUT,
+        read=API_READ_TIMEOUTS[api],
+        write=API_READ_TIMEOUTS[api],
+        pool=API_CONNECT_TIMEOUT * 2
+    )
+
+
+def _retry_after(response: httpx.Response, default: float = 5.0) -> float:
+    """Seconds from a Retry-After header (HTTP dates are not used by these APIs)."""
+    try:
+        return max(0.0, float(response.headers.get("retry-after", default)))
+    except ValueError:
+        return default
+
+
+class APIClients:
+    """
+    Process-wide async clients for the external APIs, created on first use.
+    Each API gets its own httpx connection pool (HTTP/2 when the h2 package is
+    installed), so slow downloads cannot starve TTS or LLM calls of connections.
+    Every HTTP call's time to response headers is recorded per API, and a 429
+    pauses the API for all workers through the rate governor.
+    """
+
+    def __init__(self):
+        self._http: Dict[str, httpx.AsyncClient] = {}
+        self._openai: Optional[AsyncOpenAI] = None
+        self._elevenlabs: Optional[AsyncElevenLabs] = None
+
+    def http(self, api: str) -> httpx.AsyncClient:
+        """The pooled httpx client of `api` (a key of API_READ_TIMEOUTS)."""
+        client = self._http.get(api)
+        if client is None or client.is_closed:
+            async def on_request(request: httpx.Request):
+                request.extensions["started_at"] = time.perf_counter()
+
+            async def on_response(response: httpx.Response):
+                started = response.request.extensions.get("started_at")
+                if started is not None:
+                    EXTERNAL_API_RESPONSE_LATENCY.observe(
+                        time.perf_counter() - started, api=api, status=response.status_code
+                    )
+                if response.status_code == 429:
+                    # Slow every worker down, not just the SDK retry of this call
+                    await rate_governor.backoff(api, _retry_after(response))
+
+            client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=_timeout(api),
+                limits=httpx.Limits(
+                    max_connections=API_MAX_CONNECTIONS,
+                    max_keepalive_connections=API_MAX_KEEPALIVE,
+                    keepalive_expiry=API_KEEPALIVE_EXPIRY
+                ),
+                follow_redirects=True,
+                event_hooks={"request": [on_request], "response": [on_response]}
+            )
+            self._http[api] = client
+        return client
+
+    @property
+    def openai(self) -> AsyncOpenAI:
+        """Chat completions and Whisper transcriptions"""
+        if self._openai is None:
+            self._openai = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=OPENAI_BASE_URL,
+                timeout=_timeout("openai"),
+                max_retries=0,  # Retries follow services/resilience.py policies
+                http_client=self.http("openai")
+            )
+        return self._openai
+
+    @property
+    def elevenlabs(self) -> AsyncElevenLabs:
+        """Text to speech"""
+        if self._elevenlabs is None:
+            self._elevenlabs = AsyncElevenLabs(
+                api_key=os.getenv("ELEVENLABS_API_KEY"),
+                base_url=ELEVENLABS_BASE_URL,
+                timeout=API_READ_TIMEOUTS["elevenlabs"],
+                httpx_client=self.http("elevenlabs")
+            )
+        return self._elevenlabs
+
+    @property
+    def pexels(self) -> httpx.AsyncClient:
+        """Pexels search API"""
+        return self.http("pexels")
+
+    @property
+    def pexels_files(self) -> httpx.AsyncClient:
+        """Pexels video file CDN downloads"""
+        return self.http("pexels_files")
+
+    async def close(self):
+        for client in self._http.values():
+            await client.aclose()
+        self._http.clear()
+        self._openai = None
+        self._elevenlabs = None
+
+
+# Global instance
+api_clients = APIClients()
@@ -0,0 +1,154 @@
+import os
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.telemetry import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Completions kept ready per prompt (0 disables the cache) and how long they stay fresh
+COMPLETION_POOL_SIZE = int(os.getenv("COMPLETION_POOL_SIZE", "3"))
+COMPLETION_POOL_TTL = timedelta(seconds=int(os.getenv("COMPLETION_POOL_TTL_SECONDS", str(6 * 3600))))
+COMPLETION_POOL_LOW_WATER = int(os.getenv("COMPLETION_POOL_LOW_WATER", "1"))
+REFILL_LEASE = timedelta(seconds=60)  # One worker refills a pool at a time
+
+Generate = Callable[[int], Awaitable[List[str]]]
+
+
+def completion_key(model: str, temperature: float, system_prompt: str, user_prompt: str) -> str:
+    """Pool key: the same prompt to the same model and temperature shares a pool."""
+    digest = hashlib.sha256()
+    for part in (model, str(temperature), system_prompt, user_prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class CompletionCache:
+    """
+    Pools of unused LLM completions per prompt, in `completion_pools`.
+    Generating asks the model for several choices at once: one is returned,
+    the rest wait in the pool for the next identical request. Each pooled
+    completion is handed out once, and a pool running low is refilled in
+    the background. If MongoDB is unavailable the cache is bypassed.
+    """
+
+    def __init__(self, pool_size: int = COMPLETION_POOL_SIZE):
+        self.pool_size = pool_size
+        self._refills: Dict[str, asyncio.Task] = {}  # Refills running in this process
+
+    @staticmethod
+    def _db():
+        from database import db
+        return db
+
+    async def take(self, key: str, refill: Optional[Generate] = None) -> Optional[str]:
+        """
+        Pop a fresh pooled completion for `key` (None if the pool is empty).
+        With `refill`, a pool left at or below the low-water mark is refilled
+        in the background.
+        """
+        if not self.pool_size:
+            return None
+        try:
+            doc = await self._db().completion_pools.find_one_and_update(
+                {"key": key, "completions.0": {"$exists": True}, "expires_at": {"$gt": datetime.utcnow()}},
+                {"$pop": {"completions": -1}},
+                projection={"_id": 0, "completions": 1}
+            )  # The document as it was before the pop
+        except Exception as e:
+            logger.warning(f"Completion cache unavailable: {str(e)}")
+            return None
+
+        CACHE_REQUESTS.inc(cache="completions", result="hit" if doc else "miss")
+        if refill and doc and len(doc["completions"]) - 1 <= COMPLETION_POOL_LOW_WATER:
+            self.refill_later(key, refill)
+        return doc["completions"][0] if doc else None
+
+    async def put(self, key: str, completions: List[str]):
+        """Add completions to the pool for `key` and restart its TTL."""
+        if not completions:
+            return
+        try:
+            await self._db().completion_pools.update_one(
+                {"key": key},
+                {
+                    "$push": {"completions": {"$each": completions, "$slice": -self.pool_size}},
+                    "$set": {"expires_at": datetime.utcnow() + COMPLETION_POOL_TTL}
+                },
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Could not pool completions: {str(e)}")
+
+    async def available(self, key: str) -> int:
+        """Fresh completions pooled for `key`."""
+        try:
+            doc = await self._db().completion_pools.find_one(
+                {"key": key, "expires_at": {"$gt": datetime.utcnow()}}, {"_id": 0, "completions": 1}
+            )
+        except Exception as e:
+            logger.warning(f"Completion cache unavailable: {str(e)}")
+            return 0
+        return len(doc["completions"]) if doc else 0
+
+    async def get(self, key: str, generate: Generate) -> Tuple[str, bool]:
+        """
+        A pooled completion for `key`, or a new one: `generate(n)` is asked
+        for the completion plus a full pool in the same request.
+        Returns the text and whether it came from the pool.
+        """
+        text = await self.take(key, refill=generate)
+        if text is not None:
+            return text, True
+        completions = await generate(self.pool_size + 1)
+        await self.put(key, completions[1:])
+        return completions[0], False
+
+    def refill_later(self, key: str, generate: Generate):
+        if not self.pool_size or key in self._refills:
+            return
+        task = asyncio.get_running_loop().create_task(self.refill(key, generate))
+        self._refills[key] = task  # Keep a reference until it finishes
+        task.add_done_callback(lambda _: self._refills.pop(key, None))
+
+    async def refill(self, key: str, generate: Generate, n: Optional[int] = None) -> bool:
+        """
+        Add `n` (default: a full pool) new completions to the pool for `key`,
+        unless another worker is refilling it. Returns whether it did.
+        """
+        now = datetime.utcnow()
+        try:
+            leased = await self._db().completion_pools.update_one(
+                {"key": key, "$or": [{"refilling_until": {"$exists": False}}, {"refilling_until": {"$lt": now}}]},
+                {
+                    "$set": {"refilling_until": now + REFILL_LEASE},
+                    "$setOnInsert": {"completions": [], "expires_at": now + COMPLETION_POOL_TTL}
+                },
+                upsert=True
+            )
+        except Exception as e:
+            # A duplicate key here means another worker holds the lease
+            logger.debug(f"Completion pool refill skipped: {str(e)}")
+            return False
+        if not (leased.modified_count or leased.upserted_id):
+            return False
+
+        try:
+            await self.put(key, await generate(n or self.pool_size))
+            return True
+        except Exception as e:
+            logger.warning(f"Completion pool refill failed: {str(e)}")
+            return False
+        finally:
+            try:
+                await self._db().completion_pools.update_one({"key": key}, {"$unset": {"refilling_until": ""}})
+            except Exception:
+                pass  # The lease expires on its own
+
+
+# Global instance
+completion_cache = CompletionCache()
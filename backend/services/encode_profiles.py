@@ -0,0 +1,114 @@
+import os
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Named x264 encode profiles.
+# - clip_*: settings for the intermediate 2.5s B-roll cuts
+# - preset/crf/tune/x264_params: settings for the final subtitle burn-in encode
+# Compare them on the target host with `python benchmarks/encode_profiles.py`.
+ENCODE_PROFILES = {
+    # Quarter-resolution draft for checking pacing and karaoke sync
+    "draft": {
+        "width": 540,
+        "height": 960,
+        "fps": 15,
+        "clip_preset": "ultrafast",
+        "clip_crf": 30,
+        "preset": "ultrafast",
+        "crf": 30,
+        "tune": None,
+        "x264_params": None,
+        "audio_bitrate": "96k"
+    },
+    # The original upload settings
+    "standard": {
+        "width": 1080,
+        "height": 1920,
+        "fps": 30,
+        "clip_preset": "fast",
+        "clip_crf": 23,
+        "preset": "medium",
+        "crf": 23,
+        "tune": None,
+        "x264_params": None,
+        "audio_bitrate": "192k"
+    },
+    # Near-transparent masters for re-edits
+    "archive": {
+        "width": 1080,
+        "height": 1920,
+        "fps": 30,
+        "clip_preset": "medium",
+        "clip_crf": 16,
+        "preset": "slow",
+        "crf": 18,
+        "tune": None,
+        "x264_params": None,
+        "audio_bitrate": "256k"
+    },
+    # Upload quality at a fraction of the encode time: cheaper motion search and
+    # fewer references, with psy/AQ tuning to win back the detail they cost
+    "fast_final": {
+        "width": 1080,
+        "height": 1920,
+        "fps": 30,
+        "clip_preset": "veryfast",
+        "clip_crf": 22,
+        "preset": "veryfast",
+        "crf": 22,
+        "tune": "film",
+        "x264_params": "ref=2:bframes=3:me=hex:subme=6:rc-lookahead=20:aq-mode=3",
+        "audio_bitrate": "192k"
+    }
+}
+
+DEFAULT_ENCODE_PROFILE = os.getenv("DEFAULT_ENCODE_PROFILE", "standard")
+PREVIEW_ENCODE_PROFILE = "draft"
+
+# Profiles only meant for previews, never for a final render
+PREVIEW_ONLY_PROFILES = {PREVIEW_ENCODE_PROFILE}
+
+
+def get_encode_profile(name: str) -> Dict:
+    """Return the settings of a named profile, falling back to the default."""
+    if name not in ENCODE_PROFILES:
+        logger.warning(f"Unknown encode profile '{name}', using {DEFAULT_ENCODE_PROFILE}")
+        name = DEFAULT_ENCODE_PROFILE
+    return ENCODE_PROFILES[name]
+
+
+def resolve_encode_profile(requested: Optional[str]) -> str:
+    """
+    Pick the final-render profile for a job: the requested one, else the default.
+    Raises ValueError for preview-only profiles (previews use
+    PREVIEW_ENCODE_PROFILE on their own).
+    """
+    if requested in PREVIEW_ONLY_PROFILES:
+        raise ValueError(f"Encode profile '{requested}' is only used for previews")
+    return requested or DEFAULT_ENCODE_PROFILE
+
+
+def video_codec_args(settings: Dict, intermediate: bool = False) -> List[str]:
+    """
+    Build the libx264 arguments for a profile.
+    `intermediate=True` returns the cheaper settings used for B-roll cuts.
+    """
+    if intermediate:
+        return [
+            '-c:v', 'libx264',
+            '-preset', settings["clip_preset"],
+            '-crf', str(settings["clip_crf"])
+        ]
+
+    args = [
+        '-c:v', 'libx264',
+        '-preset', settings["preset"],
+        '-crf', str(settings["crf"])
+    ]
+    if settings.get("tune"):
+        args += ['-tune', settings["tune"]]
+    if settings.get("x264_params"):
+        args += ['-x264-params', settings["x264_params"]]
+    return args
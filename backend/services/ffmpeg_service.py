@@ -1,11 +1,62 @@
-import subprocess
+import os
+import signal
+import asyncio
 import logging
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict, Tuple
 import json
 
+from services.encode_profiles import get_encode_profile, video_codec_args, DEFAULT_ENCODE_PROFILE
+from services.tracing import span, current_span, ProcessSampler
+from services.telemetry import FFMPEG_ACTIVE_PROCESSES
+
 logger = logging.getLogger(__name__)
 
+# Extra renditions produced from the same decode when multi_output is on (name: size)
+RENDITIONS = {
+    "720p": (720, 1280)
+}
+POSTER_TIME = 1.0  # Seconds into the video for the poster frame
+
+# Watchdog: FFmpeg/FFprobe processes running longer than this are killed
+FFMPEG_TIMEOUT_SECONDS = float(os.getenv("FFMPEG_TIMEOUT_SECONDS", "900"))
+
+# Karaoke subtitle generator: "classic" (one event per word) or "compact" (two per group)
+KARAOKE_SUBTITLE_FORMAT = os.getenv("KARAOKE_SUBTITLE_FORMAT", "classic")
+
+# ASS header - CLEAN styling without boxes
+# Key settings:
+# - Alignment=5: MIDDLE CENTER (perfect center like Canva)
+# - PlayResX/Y: 1080x1920 (portrait Full HD)
+# - FontSize=50
+ASS_HEADER = """[Script Info]
+Title: Karaoke Subtitles
+ScriptType: v4.00+
+WrapStyle: 0
+ScaledBorderAndShadow: yes
+PlayResX: 1080
+PlayResY: 1920
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,50,&H00FFFFFF,&H00FFFFFF,&H40000000,&H00000000,1,0,0,0,100,100,0,0,1,2,3,5,20,20,0,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+def _kill_process_tree(process: asyncio.subprocess.Process):
+    """
+    SIGKILL a process started with start_new_session=True together with any
+    children it spawned (they share its process group).
+    """
+    if process.returncode is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
 class FFmpegService:
     """
     FFmpeg video assembly service for creating market-ready YouTube Shorts.
@@ -24,55 +75,103 @@ class FFmpegService:
         word_timestamps: List,
         script_text: str,
         background_music: Optional[str],
-        duration: float
-    ):
+        duration: float,
+        profile: str = DEFAULT_ENCODE_PROFILE,
+        multi_output: bool = False,
+        subtitle_format: str = KARAOKE_SUBTITLE_FORMAT,
+        on_progress: Optional[Callable[[str, float], None]] = None
+    ) -> Dict[str, Path]:
         """
         Create complete YouTube Shorts video with all elements.
+        `profile` names the encode profile (see services/encode_profiles.py).
+        `multi_output` also writes every RENDITIONS size and a poster JPEG from the
+        same FFmpeg process. Returns the extra outputs by name ("720p", "poster").
+        `subtitle_format` picks the "classic" or "compact" karaoke generator.
+        `on_progress(stage, fraction)` is called for "broll_normalize", "concat",
+        "subtitles" and "encode" as each stage advances.
         """
         try:
+            settings = get_encode_profile(profile)
+            report = on_progress or (lambda stage, fraction: None)
+            
             # Step 1: Create concatenated B-roll video (2-3s cuts)
             concat_video = output_path.parent / f"{output_path.stem}_concat.mp4"
-            await FFmpegService.concatenate_broll(broll_clips, concat_video, duration)
+            await FFmpegService.concatenate_broll(broll_clips, concat_video, duration, settings, report)
             
             # Step 2: Create karaoke subtitle file (ASS format for word-level highlighting)
+            report("subtitles", 0.0)
             subtitle_path = output_path.parent / f"{output_path.stem}.ass"
-            FFmpegService.create_karaoke_subtitles(
-                subtitle_path, script_text, word_timestamps, duration
-            )
+            with span("subtitles", sync=True, format=subtitle_format) as s:
+                if subtitle_format == "compact":
+                    FFmpegService.create_karaoke_subtitles_compact(
+                        subtitle_path, script_text, word_timestamps, duration
+                    )
+                else:
+                    FFmpegService.create_karaoke_subtitles(
+                        subtitle_path, script_text, word_timestamps, duration
+                    )
+                s.bytes_out = subtitle_path.stat().st_size
+            
+            extra_outputs = {}
+            if multi_output:
+                for name in RENDITIONS:
+                    extra_outputs[name] = output_path.parent / f"{output_path.stem}_{name}.mp4"
+                extra_outputs["poster"] = output_path.parent / f"{output_path.stem}_poster.jpg"
             
             # Step 3: Assemble final video
-            if background_music:
-                # With background music
-                await FFmpegService.assemble_with_music(
-                    output_path, concat_video, audio_path, subtitle_path, background_music
-                )
-            else:
-                # Without background music
-                await FFmpegService.assemble_without_music(
-                    output_path, concat_video, audio_path, subtitle_path
-                )
+            report("encode", 0.0)
+            encode_progress = lambda fraction: report("encode", fraction)
+            with span("encode", profile=profile, outputs=1 + len(extra_outputs)) as s:
+                s.bytes_in = concat_video.stat().st_size + audio_path.stat().st_size
+                if background_music:
+                    # With background music
+                    await FFmpegService.assemble_with_music(
+                        output_path, concat_video, audio_path, subtitle_path, background_music, settings, extra_outputs,
+                        duration, encode_progress
+                    )
+                else:
+                    # Without background music
+                    await FFmpegService.assemble_without_music(
+                        output_path, concat_video, audio_path, subtitle_path, settings, extra_outputs,
+                        duration, encode_progress
+                    )
+                s.bytes_out = output_path.stat().st_size + sum(p.stat().st_size for p in extra_outputs.values())
             
             logger.info(f"Video assembled successfully: {output_path}")
+            return extra_outputs
         
         except Exception as e:
             logger.error(f"Error assembling video: {str(e)}")
             raise
     
     @staticmethod
-    async def concatenate_broll(broll_clips: List[Path], output_path: Path, total_duration: float):
+    async def concatenate_broll(
+        broll_clips: List[Path],
+        output_path: Path,
+        total_duration: float,
+        settings: Optional[Dict] = None,
+        on_progress: Optional[Callable[[str, float], None]] = None
+    ):
         """
         Concatenate B-roll clips to match total duration.
         Each clip is cut to EXACTLY 2.5 seconds and looped as needed.
         """
+        report = on_progress or (lambda stage, fraction: None)
+        settings = settings or get_encode_profile(DEFAULT_ENCODE_PROFILE)
+        width, height, fps = settings["width"], settings["height"], settings["fps"]
+        
         if not broll_clips:
             # Create black video if no B-roll available
             cmd = [
                 'ffmpeg', '-f', 'lavfi',
-                '-i', f'color=c=black:s=1080x1920:d={total_duration}',
+                '-i', f'color=c=black:s={width}x{height}:r={fps}:d={total_duration}',
                 '-pix_fmt', 'yuv420p',
                 str(output_path), '-y'
             ]
-            subprocess.run(cmd, check=True, capture_output=True)
+            with span("concat", black=True):
+                returncode, stderr = await FFmpegService.run_ffmpeg(cmd)
+            if returncode != 0:
+                raise Exception(f"Failed to create black video: {stderr}")
             return
         
         # Create individual 2.5 second clips first
@@ -80,31 +179,37 @@ class FFmpegService:
         temp_clips = []
         
         for i, clip_path in enumerate(broll_clips):
-            temp_clip = output_path.parent / f"temp_clip_{i}.mp4"
+            report("broll_normalize", i / len(broll_clips))
+            
+            # Prefixed with the output name so concurrent renders never share temp files
+            temp_clip = output_path.parent / f"{output_path.stem}_temp_clip_{i}.mp4"
             
             # Cut each clip to exactly 2.5 seconds
             cmd = [
                 'ffmpeg',
                 '-i', str(clip_path),
                 '-t', str(clip_duration),
-                '-vf', 'scale=1080:1920:force_original_aspect_ratio=increase,crop=1080:1920,fps=30',
-                '-c:v', 'libx264',
-                '-preset', 'fast',
-                '-crf', '23',
+                '-vf', f'scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height},fps={fps}',
+                *video_codec_args(settings, intermediate=True),
                 '-an',  # Remove audio from B-roll
                 str(temp_clip), '-y'
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode == 0:
-                temp_clips.append(temp_clip)
+            with span("normalize_clip", index=i) as s:
+                s.bytes_in = clip_path.stat().st_size if clip_path.exists() else 0
+                returncode, _ = await FFmpegService.run_ffmpeg(cmd)
+                if returncode == 0:
+                    s.bytes_out = temp_clip.stat().st_size
+                    temp_clips.append(temp_clip)
+                else:
+                    s.error = f"exit {returncode}"
         
         if not temp_clips:
             logger.error("No valid B-roll clips after processing")
             return
         
         # Create concat file with properly cut clips
-        concat_file = output_path.parent / "concat_list.txt"
+        concat_file = output_path.parent / f"{output_path.stem}_concat_list.txt"
         clips_needed = int(total_duration / clip_duration) + 1
         
         with open(concat_file, 'w') as f:
@@ -113,6 +218,7 @@ class FFmpegService:
                 f.write(f"file '{temp_clips[clip_idx]}'\n")
         
         # Concatenate clips
+        report("concat", 0.0)
         cmd = [
             'ffmpeg',
             '-f', 'concat',
@@ -123,16 +229,19 @@ class FFmpegService:
             str(output_path), '-y'
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        with span("concat", clips=clips_needed) as s:
+            returncode, stderr = await FFmpegService.run_ffmpeg(cmd)
+            if returncode == 0:
+                s.bytes_out = output_path.stat().st_size
         
         # Cleanup temp files
         for temp_clip in temp_clips:
             temp_clip.unlink(missing_ok=True)
         concat_file.unlink(missing_ok=True)
         
-        if result.returncode != 0:
-            logger.error(f"FFmpeg concat error: {result.stderr}")
-            raise Exception(f"Failed to concatenate B-roll: {result.stderr}")
+        if returncode != 0:
+            logger.error(f"FFmpeg concat error: {stderr}")
+            raise Exception(f"Failed to concatenate B-roll: {stderr}")
     
     @staticmethod
     def create_karaoke_subtitles(
@@ -150,33 +259,136 @@ class FFmpegService:
         - NO black boxes - just soft shadow
         - CENTERED at bottom of screen
         """
-        # ASS header - CLEAN styling without boxes
-        # Key settings:
-        # - Alignment=5: MIDDLE CENTER (perfect center like Canva)
-        # - PlayResX/Y: 1080x1920 (portrait Full HD)
-        # - FontSize=50
-        ass_content = """[Script Info]
-Title: Karaoke Subtitles
-ScriptType: v4.00+
-WrapStyle: 0
-ScaledBorderAndShadow: yes
-PlayResX: 1080
-PlayResY: 1920
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Default,Arial,50,&H00FFFFFF,&H00FFFFFF,&H40000000,&H00000000,1,0,0,0,100,100,0,0,1,2,3,5,20,20,0,1
-
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-"""
+        ass_content = ASS_HEADER
         
-        words = script_text.split()
-        if not words:
+        word_timings = FFmpegService._word_timings(script_text, word_timestamps, duration)
+        if not word_timings:
             with open(output_path, 'w', encoding='utf-8') as f:
                 f.write(ass_content)
             return
         
+        groups = FFmpegService._group_words(word_timings)
+        
+        # Generate dialogue - each word gets its own line showing the WHOLE group
+        # with ONLY that word highlighted
+        for group in groups:
+            for idx, current_word in enumerate(group):
+                word_start = current_word['start']
+                word_end = current_word['end']
+                
+                # Build text: current word YELLOW, all others WHITE
+                # Using {\c&HBBGGRR&} format
+                # YELLOW = &H00FFFF (BGR)
+                # WHITE = &HFFFFFF (BGR)
+                parts = []
+                for i, wt in enumerate(group):
+                    if i == idx:
+                        # CURRENT word - YELLOW
+                        parts.append("{\\c&H00FFFF&}" + wt['word'])
+                    else:
+                        # Other words - WHITE  
+                        parts.append("{\\c&HFFFFFF&}" + wt['word'])
+                
+                # Add \an5 tag to FORCE middle-center alignment
+                line_text = "{\\an5}" + " ".join(parts)
+                start = FFmpegService.format_ass_time(word_start)
+                end = FFmpegService.format_ass_time(word_end)
+                
+                ass_content += f"Dialogue: 0,{start},{end},Default,,0,0,0,,{line_text}\n"
+        
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(ass_content)
+        
+        logger.info(f"Created karaoke subtitles: {output_path}")
+    
+    @staticmethod
+    def create_karaoke_subtitles_compact(
+        output_path: Path,
+        script_text: str,
+        word_timestamps: List,
+        duration: float
+    ):
+        """
+        Create the same karaoke look with TWO events per word group instead of one per word.
+        
+        Both layers show the whole group for its full duration and use \\k timing tags,
+        which switch a word from SecondaryColour to PrimaryColour when its syllable starts:
+        - Layer 0: white → YELLOW at each word's start
+        - Layer 1 (fill only, no border/shadow): transparent → WHITE at each word's end,
+          covering the yellow of words that were already spoken
+        So only the currently spoken word is yellow, and libass lays out and rasterizes
+        two events per group instead of one per word.
+        """
+        lines = [ASS_HEADER]
+        
+        word_timings = FFmpegService._word_timings(script_text, word_timestamps, duration)
+        
+        for group in FFmpegService._group_words(word_timings):
+            group_start = group[0]['start']
+            group_end = max(group[-1]['end'], group_start)
+            start = FFmpegService.format_ass_time(group_start)
+            end = FFmpegService.format_ass_time(group_end)
+            
+            words = [wt['word'] for wt in group]
+            highlight_on = FFmpegService._karaoke_durations(
+                [wt['start'] for wt in group], group_start, group_end
+            )
+            highlight_off = FFmpegService._karaoke_durations(
+                [wt['end'] for wt in group], group_start, group_end
+            )
+            
+            # Layer 0: secondary WHITE, primary YELLOW
+            yellow_text = "{\\an5\\1c&H00FFFF&\\2c&HFFFFFF&}" + FFmpegService._karaoke_text(words, highlight_on)
+            # Layer 1: secondary fully transparent, primary WHITE
+            white_text = "{\\an5\\bord0\\shad0\\1c&HFFFFFF&\\2a&HFF&}" + FFmpegService._karaoke_text(words, highlight_off)
+            
+            lines.append(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{yellow_text}\n")
+            lines.append(f"Dialogue: 1,{start},{end},Default,,0,0,0,,{white_text}\n")
+        
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write("".join(lines))
+        
+        logger.info(f"Created compact karaoke subtitles: {output_path}")
+    
+    @staticmethod
+    def _karaoke_durations(switch_times: List[float], group_start: float, group_end: float) -> List[int]:
+        """
+        Convert absolute switch times into \\k durations in centiseconds.
+        Returns a lead-in duration followed by one duration per word, so that
+        word i switches colour at switch_times[i].
+        """
+        # Centisecond offsets from the event start, clamped to be monotonic
+        offsets = []
+        previous = 0
+        for t in switch_times:
+            offset = max(previous, int(round((min(t, group_end) - group_start) * 100)))
+            offsets.append(offset)
+            previous = offset
+        
+        end_offset = max(previous, int(round((group_end - group_start) * 100)))
+        boundaries = offsets + [end_offset]
+        
+        return [offsets[0]] + [boundaries[i + 1] - boundaries[i] for i in range(len(offsets))]
+    
+    @staticmethod
+    def _karaoke_text(words: List[str], durations: List[int]) -> str:
+        """Build '{\\kLEAD}{\\kD1}word1 {\\kD2}word2 ...' from _karaoke_durations output."""
+        parts = ["{\\k" + str(durations[0]) + "}"]
+        for i, (word, dur) in enumerate(zip(words, durations[1:])):
+            separator = " " if i < len(words) - 1 else ""
+            parts.append("{\\k" + str(dur) + "}" + word + separator)
+        return "".join(parts)
+    
+    @staticmethod
+    def _word_timings(script_text: str, word_timestamps: List, duration: float) -> List[Dict]:
+        """
+        Normalize Whisper/ElevenLabs timestamps to [{'word', 'start', 'end'}].
+        Falls back to even distribution over the duration; empty for an empty script.
+        """
+        words = script_text.split()
+        if not words:
+            return []
+        
         # Calculate word timings
         word_timings = []
         
@@ -208,48 +420,21 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
                     'end': (i + 1) * word_duration
                 })
         
-        # Group words (4-5 per line)
+        return word_timings
+    
+    @staticmethod
+    def _group_words(word_timings: List[Dict], group_size: int = 4) -> List[List[Dict]]:
+        """Group words (4-5 per line)."""
         groups = []
         current_group = []
         for wt in word_timings:
             current_group.append(wt)
-            if len(current_group) >= 4:
+            if len(current_group) >= group_size:
                 groups.append(current_group)
                 current_group = []
         if current_group:
             groups.append(current_group)
-        
-        # Generate dialogue - each word gets its own line showing the WHOLE group
-        # with ONLY that word highlighted
-        for group in groups:
-            for idx, current_word in enumerate(group):
-                word_start = current_word['start']
-                word_end = current_word['end']
-                
-                # Build text: current word YELLOW, all others WHITE
-                # Using {\c&HBBGGRR&} format
-                # YELLOW = &H00FFFF (BGR)
-                # WHITE = &HFFFFFF (BGR)
-                parts = []
-                for i, wt in enumerate(group):
-                    if i == idx:
-                        # CURRENT word - YELLOW
-                        parts.append("{\\c&H00FFFF&}" + wt['word'])
-                    else:
-                        # Other words - WHITE  
-                        parts.append("{\\c&HFFFFFF&}" + wt['word'])
-                
-                # Add \an5 tag to FORCE middle-center alignment
-                line_text = "{\\an5}" + " ".join(parts)
-                start = FFmpegService.format_ass_time(word_start)
-                end = FFmpegService.format_ass_time(word_end)
-                
-                ass_content += f"Dialogue: 0,{start},{end},Default,,0,0,0,,{line_text}\n"
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(ass_content)
-        
-        logger.info(f"Created karaoke subtitles: {output_path}")
+        return groups
     
     @staticmethod
     def format_ass_time(seconds: float) -> str:
@@ -266,78 +451,218 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         video_path: Path,
         audio_path: Path,
         subtitle_path: Path,
-        music_path: str
+        music_path: str,
+        settings: Optional[Dict] = None,
+        extra_outputs: Optional[Dict[str, Path]] = None,
+        duration: Optional[float] = None,
+        on_progress: Optional[Callable[[float], None]] = None
     ):
         """
         Assemble video with TTS audio, background music, and subtitles.
         Apply volume ducking to music when TTS is playing.
         """
-        # Force style settings - using \an5 inline for PERFECT CENTER
-        # FontSize=55 for better visibility
-        force_style = "FontName=Arial,FontSize=55,PrimaryColour=&H00FFFFFF,OutlineColour=&H40000000,BackColour=&H00000000,Bold=1,BorderStyle=1,Outline=2,Shadow=3,MarginL=0,MarginR=0,MarginV=0"
-        
-        cmd = [
-            'ffmpeg',
-            '-i', str(video_path),
-            '-i', str(audio_path),
-            '-i', music_path,
-            '-filter_complex',
-            (
-                f'[1:a]volume=1.0[voice];'
-                f'[2:a]volume=0.3[music];'
-                f'[voice][music]amix=inputs=2:duration=first:dropout_transition=2[audio];'
-                f"[0:v]subtitles={subtitle_path}:force_style='{force_style}'[video]"
-            ),
-            '-map', '[video]',
-            '-map', '[audio]',
-            '-c:v', 'libx264',
-            '-preset', 'medium',
-            '-crf', '23',
-            '-c:a', 'aac',
-            '-b:a', '192k',
-            '-movflags', '+faststart',
-            str(output_path), '-y'
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            logger.error(f"FFmpeg assembly error: {result.stderr}")
-            raise Exception(f"Failed to assemble video: {result.stderr}")
+        await FFmpegService._assemble(
+            output_path, video_path, audio_path, subtitle_path, music_path, settings, extra_outputs,
+            duration, on_progress
+        )
     
     @staticmethod
     async def assemble_without_music(
         output_path: Path,
         video_path: Path,
         audio_path: Path,
-        subtitle_path: Path
+        subtitle_path: Path,
+        settings: Optional[Dict] = None,
+        extra_outputs: Optional[Dict[str, Path]] = None,
+        duration: Optional[float] = None,
+        on_progress: Optional[Callable[[float], None]] = None
     ):
         """
         Assemble video with TTS audio and subtitles (no background music).
         """
+        await FFmpegService._assemble(
+            output_path, video_path, audio_path, subtitle_path, None, settings, extra_outputs,
+            duration, on_progress
+        )
+    
+    @staticmethod
+    async def _assemble(
+        output_path: Path,
+        video_path: Path,
+        audio_path: Path,
+        subtitle_path: Path,
+        music_path: Optional[str],
+        settings: Optional[Dict],
+        extra_outputs: Optional[Dict[str, Path]],
+        duration: Optional[float] = None,
+        on_progress: Optional[Callable[[float], None]] = None
+    ):
+        """
+        Burn subtitles, mix audio and encode in a single FFmpeg process.
+        
+        `extra_outputs` maps RENDITIONS names (and "poster") to file paths. The
+        composited video is decoded and subtitled once, then `split` fans it out
+        to the master, each scaled rendition and a single poster JPEG.
+        """
+        settings = settings or get_encode_profile(DEFAULT_ENCODE_PROFILE)
+        extra_outputs = extra_outputs or {}
+        renditions = {name: path for name, path in extra_outputs.items() if name in RENDITIONS}
+        poster_path = extra_outputs.get("poster")
+        
         # Force style settings - using \an5 inline for PERFECT CENTER
         # FontSize=55 for better visibility
         force_style = "FontName=Arial,FontSize=55,PrimaryColour=&H00FFFFFF,OutlineColour=&H40000000,BackColour=&H00000000,Bold=1,BorderStyle=1,Outline=2,Shadow=3,MarginL=0,MarginR=0,MarginV=0"
         
-        cmd = [
-            'ffmpeg',
-            '-i', str(video_path),
-            '-i', str(audio_path),
-            '-filter_complex',
-            f"[0:v]subtitles={subtitle_path}:force_style='{force_style}'[video]",
-            '-map', '[video]',
-            '-map', '1:a',
-            '-c:v', 'libx264',
-            '-preset', 'medium',
-            '-crf', '23',
-            '-c:a', 'aac',
-            '-b:a', '192k',
+        inputs = ['-i', str(video_path), '-i', str(audio_path)]
+        filters = []
+        
+        # Audio: TTS alone, or TTS mixed with ducked background music
+        audio_maps = ['1:a'] * (1 + len(renditions))
+        if music_path:
+            inputs += ['-i', music_path]
+            filters += [
+                '[1:a]volume=1.0[voice]',
+                '[2:a]volume=0.3[music]',
+                '[voice][music]amix=inputs=2:duration=first:dropout_transition=2[mix]'
+            ]
+            audio_maps = ['[audio]'] + [f'[audio_{name}]' for name in renditions]
+            if renditions:
+                filters.append('[mix]asplit=' + str(len(audio_maps)) + ''.join(audio_maps))
+            else:
+                filters.append('[mix]anull[audio]')
+        
+        # Video: subtitles once, then one branch per output
+        subtitles = f"[0:v]subtitles={subtitle_path}:force_style='{force_style}'"
+        branches = ['[video]'] + [f'[v_{name}]' for name in renditions] + (['[v_poster]'] if poster_path else [])
+        if len(branches) == 1:
+            filters.append(subtitles + '[video]')
+        else:
+            filters.append(subtitles + f',split={len(branches)}' + ''.join(branches))
+        for name in renditions:
+            width, height = RENDITIONS[name]
+            filters.append(f'[v_{name}]scale={width}:{height}[video_{name}]')
+        if poster_path:
+            filters.append(f"[v_poster]select='gte(t,{POSTER_TIME})'[poster]")
+        
+        audio_args = ['-c:a', 'aac', '-b:a', settings["audio_bitrate"]]
+        outputs = [
+            '-map', '[video]', '-map', audio_maps[0],
+            *video_codec_args(settings), *audio_args,
             '-movflags', '+faststart',
-            str(output_path), '-y'
+            str(output_path)
         ]
+        for i, (name, path) in enumerate(renditions.items(), start=1):
+            outputs += [
+                '-map', f'[video_{name}]', '-map', audio_maps[i],
+                *video_codec_args(settings), *audio_args,
+                '-movflags', '+faststart',
+                str(path)
+            ]
+        if poster_path:
+            outputs += ['-map', '[poster]', '-frames:v', '1', '-q:v', '2', str(poster_path)]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        cmd = ['ffmpeg', '-y', *inputs, '-filter_complex', ';'.join(filters), *outputs]
+        
+        returncode, stderr = await FFmpegService.run_ffmpeg(cmd, duration, on_progress)
+        
+        if returncode != 0:
+            logger.error(f"FFmpeg assembly error: {stderr}")
+            raise Exception(f"Failed to assemble video: {stderr}")
+    
+    @staticmethod
+    async def run_ffmpeg(
+        cmd: List[str],
+        duration: Optional[float] = None,
+        on_progress: Optional[Callable[[float], None]] = None,
+        timeout: float = FFMPEG_TIMEOUT_SECONDS
+    ) -> Tuple[int, str]:
+        """
+        Run an FFmpeg command without blocking the event loop.
+        With `duration` and `on_progress`, FFmpeg's machine-readable -progress
+        output is parsed and the callback receives the encoded fraction (0-1).
+        The process tree is killed when the caller is cancelled or after `timeout`
+        seconds; a timeout is reported as a SIGKILL return code.
+        CPU time and peak RSS are charged to the current tracing span.
+        Returns (returncode, stderr).
+        """
+        track = bool(duration and on_progress)
+        if track:
+            cmd = [cmd[0], '-progress', 'pipe:1', '-nostats'] + cmd[1:]
+        
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True
+        )
+        FFMPEG_ACTIVE_PROCESSES.inc()
+        sampler = ProcessSampler(process.pid)
+        sampler.start()
+        
+        async def read_progress():
+            async for raw_line in process.stdout:
+                if not track:
+                    continue
+                key, _, value = raw_line.decode(errors='ignore').strip().partition('=')
+                # out_time_ms is in microseconds as well (long-standing FFmpeg quirk)
+                if key in ('out_time_us', 'out_time_ms'):
+                    try:
+                        seconds = int(value) / 1_000_000
+                    except ValueError:
+                        continue  # "N/A" before the first frame
+                    on_progress(max(0.0, min(1.0, seconds / duration)))
+                elif key == 'progress' and value == 'end':
+                    on_progress(1.0)
+        
+        async def communicate():
+            _, stderr = await asyncio.gather(read_progress(), process.stderr.read())
+            return stderr
+        
+        try:
+            stderr = await asyncio.wait_for(communicate(), timeout)
+            sampler.stop(current_span())
+            await process.wait()
+        except asyncio.TimeoutError:
+            logger.error(f"FFmpeg timed out after {timeout:.0f}s, killing: {' '.join(cmd)}")
+            sampler.stop(current_span())
+            _kill_process_tree(process)
+            await process.wait()
+            return process.returncode, f"FFmpeg timed out after {timeout:.0f}s"
+        finally:
+            # Cancelled render: do not leave FFmpeg encoding in the background
+            sampler.stop(None)
+            FFMPEG_ACTIVE_PROCESSES.dec()
+            if process.returncode is None:
+                _kill_process_tree(process)
+                await process.wait()
+        
+        return process.returncode, stderr.decode(errors='ignore')
+    
+    @staticmethod
+    async def run_probe(cmd: List[str], timeout: float = FFMPEG_TIMEOUT_SECONDS) -> Tuple[int, str]:
+        """
+        Run an FFprobe command with the same watchdog and cancellation handling
+        as run_ffmpeg. Returns (returncode, stdout).
+        """
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True
+        )
+        FFMPEG_ACTIVE_PROCESSES.inc()
+        
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"FFprobe timed out after {timeout:.0f}s, killing: {' '.join(cmd)}")
+            _kill_process_tree(process)
+            await process.wait()
+            return process.returncode, ""
+        finally:
+            FFMPEG_ACTIVE_PROCESSES.dec()
+            if process.returncode is None:
+                _kill_process_tree(process)
+                await process.wait()
         
-        if result.returncode != 0:
-            logger.error(f"FFmpeg assembly error: {result.stderr}")
-            raise Exception(f"Failed to assemble video: {result.stderr}")
+        return process.returncode, stdout.decode(errors='ignore')
@@ -0,0 +1,128 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from services.telemetry import HEDGED_REQUESTS, HEDGE_SAVED_SECONDS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+LATENCY_WINDOW = 200  # Recent call latencies kept per tracker
+MIN_SAMPLES = 20  # Below this, the tracker's default delay is used
+MAX_HEDGE_RATE = 0.1  # Share of recent calls that may be hedged
+
+
+class LatencyTracker:
+    """
+    Rolling window of call latencies, for percentile-based hedge delays, and
+    of which calls were hedged, to cap the extra load hedging adds when
+    latency rises across the board.
+    """
+
+    def __init__(self, default_delay: float, min_delay: float = 0.0, window: int = LATENCY_WINDOW,
+                 max_hedge_rate: float = MAX_HEDGE_RATE):
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_hedge_rate = max_hedge_rate
+        self.samples = deque(maxlen=window)
+        self.hedges = deque(maxlen=window)  # 1 per hedged call, 0 per other call
+
+    def add(self, seconds: float, hedged: bool = False):
+        """Record a call's latency, measured from the start of its first request."""
+        self.samples.append(seconds)
+        self.hedges.append(1 if hedged else 0)
+
+    def hedge_allowed(self) -> bool:
+        """Whether another hedge keeps the share of hedged calls within max_hedge_rate."""
+        return sum(self.hedges) < max(1.0, self.max_hedge_rate * len(self.hedges))
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def hedge_delay(self, q: float) -> float:
+        """Wait this long for the first call before sending a second one."""
+        if len(self.samples) < MIN_SAMPLES:
+            return self.default_delay
+        return max(self.min_delay, self.percentile(q))
+
+    def expected_remaining(self, elapsed: float) -> Optional[float]:
+        """
+        Mean extra time past `elapsed` of the calls that took longer than
+        `elapsed`: what a cancelled call would probably still have needed.
+        """
+        slower = [s for s in self.samples if s > elapsed]
+        if not slower:
+            return None
+        return sum(slower) / len(slower) - elapsed
+
+
+async def hedged(
+    call: str,
+    primary: Callable[[], Awaitable[T]],
+    backup: Callable[[], Awaitable[T]],
+    tracker: LatencyTracker,
+    percentile: float = 0.95
+) -> T:
+    """
+    Run `primary()`; if it has not finished after the tracker's `percentile`
+    latency, also start `backup()` and return whichever succeeds first,
+    cancelling the other. A failure only wins when both calls fail. No
+    backup is sent while the tracker's hedge budget is spent.
+    Outcomes and the estimated time saved are recorded under `call`.
+    """
+    delay = tracker.hedge_delay(percentile)
+    started = time.monotonic()
+    first = asyncio.ensure_future(primary())
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            result = first.result()  # Raises the primary's error: nothing to hedge
+            tracker.add(time.monotonic() - started)
+            HEDGED_REQUESTS.inc(call=call, outcome="not_hedged")
+            return result
+
+        if not tracker.hedge_allowed():
+            result = await first
+            tracker.add(time.monotonic() - started)
+            HEDGED_REQUESTS.inc(call=call, outcome="over_budget")
+            return result
+
+        second = asyncio.ensure_future(backup())
+        tasks.append(second)
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return _hedge_won(call, task, first, started, tracker)
+                error = error or task.exception()
+        tracker.add(time.monotonic() - started, hedged=True)
+        HEDGED_REQUESTS.inc(call=call, outcome="failed")
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def _hedge_won(call: str, winner: asyncio.Future, first: asyncio.Future, started: float,
+               tracker: LatencyTracker):
+    elapsed = time.monotonic() - started
+    tracker.add(elapsed, hedged=True)
+    if winner is first:
+        HEDGED_REQUESTS.inc(call=call, outcome="primary_won")
+    else:
+        HEDGED_REQUESTS.inc(call=call, outcome="hedge_won")
+        saved = tracker.expected_remaining(elapsed)
+        if saved:
+            HEDGE_SAVED_SECONDS.observe(saved, call=call)
+        logger.info(f"Hedged {call} answered first after {elapsed:.2f}s (est. {saved or 0:.2f}s saved)")
+    return winner.result()
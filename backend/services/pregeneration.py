@@ -0,0 +1,149 @@
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.completion_cache import completion_cache, Generate
+from services.rate_governor import rate_governor
+from services.resilience import breakers
+from services.telemetry import PREGENERATED_SCRIPTS, UPSTREAM_RATE_WAITING
+
+logger = logging.getLogger(__name__)
+
+PREGENERATION_ENABLED = os.getenv("PREGENERATION_ENABLED", "false").lower() == "true"
+PREGENERATION_INTERVAL_SECONDS = float(os.getenv("PREGENERATION_INTERVAL_SECONDS", "60"))
+# Shared by all workers; estimated from prompt length and max_tokens
+PREGENERATION_TOKENS_PER_HOUR = float(os.getenv("PREGENERATION_TOKENS_PER_HOUR", "50000"))
+PREGENERATION_TOPICS_PER_USER = int(os.getenv("PREGENERATION_TOPICS_PER_USER", "3"))
+PREGENERATION_LOOKBACK = timedelta(days=int(os.getenv("PREGENERATION_LOOKBACK_DAYS", "14")))
+PREGENERATION_MIN_REQUESTS = 2  # A topic generated once is not worth pooling
+IDLE_SECONDS = 30  # No interactive script generation in this process for this long
+
+# (user_id, topic, keywords, mode) -> (pool key, generate(n), estimated tokens per completion)
+PromptSource = Callable[[str, str, List[str], str], Tuple[str, Generate, int]]
+
+
+def pregeneration_key(user_id: str, prompt_key: str) -> str:
+    """
+    Pool of scripts pre-generated for one user's prompt. Kept apart from the
+    shared per-prompt pools, so only these scripts count as pre-generated.
+    """
+    return f"pregen:{user_id}:{prompt_key}"
+
+
+class PregenerationWorker:
+    """
+    Keeps a pool of scripts (see completion_cache, keyed by
+    pregeneration_key) full for each user's most-generated topics, so
+    /scripts/generate can answer that user instantly. Pools a user has taken
+    from are topped up first on the next pass. Runs only while script
+    generation is idle here and OpenAI is healthy, and spends at most
+    PREGENERATION_TOKENS_PER_HOUR across workers (a rate governor token bucket).
+    """
+
+    def __init__(self, prompt_source: PromptSource):
+        self.prompt_source = prompt_source
+        self.last_interactive: Optional[float] = None
+        self.taken: Dict[str, Tuple[Generate, int]] = {}  # Pool key -> (generate(n), tokens per completion)
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _db():
+        from database import db
+        return db
+
+    def touch(self):
+        """Record an interactive script request (pre-generation backs off)."""
+        self.last_interactive = time.monotonic()
+
+    def refill_soon(self, key: str, generate: Generate, tokens: int):
+        """Top up a pre-generated pool a script was just taken from on the next idle pass."""
+        self.taken[key] = (generate, tokens)
+
+    def idle(self) -> bool:
+        return (
+            (self.last_interactive is None or time.monotonic() - self.last_interactive >= IDLE_SECONDS)
+            and UPSTREAM_RATE_WAITING.values.get(("openai",), 0) <= 0
+            and breakers["openai"].state == "closed"
+        )
+
+    async def top_requests(self) -> List[Dict]:
+        """Each recent user's most-generated (topic, keywords, mode) combinations."""
+        since = (datetime.utcnow() - PREGENERATION_LOOKBACK).isoformat()
+        pipeline = [
+            {"$match": {"created_at": {"$gte": since}, "ml_optimized": {"$ne": True}}},
+            {"$group": {
+                "_id": {"user_id": "$user_id", "topic": "$topic", "keywords": "$keywords", "mode": "$mode"},
+                "count": {"$sum": 1}
+            }},
+            {"$match": {"count": {"$gte": PREGENERATION_MIN_REQUESTS}}},
+            {"$sort": {"count": -1}},
+            {"$group": {"_id": "$_id.user_id", "requests": {"$push": "$_id"}}},
+            {"$project": {"requests": {"$slice": ["$requests", PREGENERATION_TOPICS_PER_USER]}}}
+        ]
+        users = await self._db().scripts.aggregate(pipeline).to_list(length=None)
+        return [request for user in users for request in user["requests"]]
+
+    async def run_once(self) -> int:
+        """
+        Top up the pools taken from since the last pass, then those of the
+        current top requests; returns completions generated.
+        """
+        generated = 0
+        for key in list(self.taken):
+            if not self.idle():
+                return generated
+            generate, tokens = self.taken[key]
+            topped_up = await self._top_up(key, generate, tokens)
+            if topped_up is None:
+                return generated
+            del self.taken[key]
+            generated += topped_up
+        for request in await self.top_requests():
+            if not self.idle():
+                break
+            topped_up = await self._top_up(*self.prompt_source(
+                request["user_id"], request["topic"], request.get("keywords") or [], request["mode"]
+            ))
+            if topped_up is None:
+                break
+            generated += topped_up
+        return generated
+
+    async def _top_up(self, key: str, generate: Generate, tokens: int) -> Optional[int]:
+        """Fill one pool; returns completions generated, None once the token budget is spent."""
+        missing = completion_cache.pool_size - await completion_cache.available(key)
+        if missing <= 0:
+            return 0
+        budget = PREGENERATION_TOKENS_PER_HOUR
+        if not await rate_governor.try_take("pregeneration:tokens", tokens * missing, budget / 3600, budget):
+            logger.info("Pre-generation token budget spent for now")
+            return None
+        if not await completion_cache.refill(key, generate, missing):
+            return 0
+        PREGENERATED_SCRIPTS.inc(missing)
+        return missing
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(PREGENERATION_INTERVAL_SECONDS)
+            if not self.idle():
+                continue
+            try:
+                generated = await self.run_once()
+                if generated:
+                    logger.info(f"Pre-generated {generated} scripts")
+            except Exception as e:
+                logger.warning(f"Pre-generation pass failed: {str(e)}")
+
+    def start(self):
+        if PREGENERATION_ENABLED and completion_cache.pool_size and not self._task:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Script pre-generation started ({PREGENERATION_TOKENS_PER_HOUR:.0f} tokens/hour)")
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
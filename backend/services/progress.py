@@ -0,0 +1,44 @@
+import asyncio
+import logging
+from typing import Dict, Set
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which no more progress events are sent for a video
+TERMINAL_STATUSES = {"completed", "failed", "preview_ready", "cancelled"}
+
+
+class ProgressBroker:
+    """
+    In-process pub/sub for render progress.
+    The render pipeline publishes events per video id; each SSE connection
+    subscribes with its own queue. Slow subscribers drop old events instead
+    of blocking the renderer.
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, video_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        self.subscribers.setdefault(video_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, video_id: str, queue: asyncio.Queue):
+        queues = self.subscribers.get(video_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            self.subscribers.pop(video_id, None)
+
+    def publish(self, video_id: str, event: Dict):
+        for queue in self.subscribers.get(video_id, ()):
+            if queue.full():
+                # Progress is cumulative, so the oldest event is safe to drop
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+
+progress_broker = ProgressBroker()
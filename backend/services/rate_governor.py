@@ -0,0 +1,219 @@
+import os
+import time
+import uuid
+import random
+import socket
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from services.telemetry import UPSTREAM_RATE_WAIT, UPSTREAM_RATE_WAITING, UPSTREAM_THROTTLED
+
+logger = logging.getLogger(__name__)
+
+
+def _limit(upstream: str, key: str, default: float) -> float:
+    return float(os.getenv(f"{upstream.upper()}_{key}", default))
+
+
+# Quotas per upstream API, shared by every API and worker process through MongoDB.
+# - requests_per_second / burst: token bucket for calls
+# - concurrency: requests (streams) in flight at once
+# - characters_per_minute: TTS character budget (ElevenLabs bills characters)
+UPSTREAM_LIMITS = {
+    "elevenlabs": {
+        "requests_per_second": _limit("elevenlabs", "REQUESTS_PER_SECOND", 2),
+        "burst": _limit("elevenlabs", "BURST", 4),
+        "concurrency": int(_limit("elevenlabs", "CONCURRENCY", 2)),
+        "characters_per_minute": _limit("elevenlabs", "CHARACTERS_PER_MINUTE", 20000)
+    },
+    "openai": {
+        "requests_per_second": _limit("openai", "REQUESTS_PER_SECOND", 5),
+        "burst": _limit("openai", "BURST", 10),
+        "concurrency": int(_limit("openai", "CONCURRENCY", 8))
+    },
+    # Pexels allows 200 requests per hour by default
+    "pexels": {
+        "requests_per_second": _limit("pexels", "REQUESTS_PER_SECOND", 200 / 3600),
+        "burst": _limit("pexels", "BURST", 20),
+        "concurrency": int(_limit("pexels", "CONCURRENCY", 4))
+    }
+}
+
+SLOT_LEASE_SECONDS = 600  # A crashed worker's concurrency slot is reclaimed after this
+MAX_POLL_SECONDS = 2.0  # Re-check capacity at least this often while waiting
+CAS_ATTEMPTS = 5  # Bucket updates retried on a concurrent write before waiting briefly
+
+
+def refill(tokens: float, updated_at: float, now: float, rate: float, capacity: float) -> float:
+    """Tokens in a bucket after refilling at `rate` per second since `updated_at`."""
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+
+def seconds_until(tokens: float, cost: float, rate: float) -> float:
+    """Wait until a bucket holding `tokens` can pay `cost` (0 if it already can)."""
+    if tokens >= cost:
+        return 0.0
+    return (cost - tokens) / rate if rate > 0 else MAX_POLL_SECONDS
+
+
+class RateGovernor:
+    """
+    Keeps calls to upstream APIs within their quotas across all processes.
+    Token buckets live in `rate_buckets` (updated with compare-and-set on a
+    version field) and concurrency slots in `rate_slots` (leased documents).
+    Callers wait for capacity instead of failing; if MongoDB is unreachable
+    the governor lets calls through rather than stalling renders.
+    """
+
+    def __init__(self, limits: Dict[str, Dict] = UPSTREAM_LIMITS):
+        self.limits = limits
+        self.holder_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._slots_ready = set()
+
+    @staticmethod
+    def _db():
+        from database import db
+        return db
+
+    async def _take(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        """Take `cost` tokens from bucket `key`. Returns 0 when taken, else seconds to wait."""
+        db = self._db()
+        cost = min(cost, capacity)  # A request larger than the bucket waits for a full one
+        for _ in range(CAS_ATTEMPTS):
+            now = time.time()
+            await db.rate_buckets.update_one(
+                {"key": key},
+                {"$setOnInsert": {"tokens": capacity, "updated_at": now, "blocked_until": 0, "version": 0}},
+                upsert=True
+            )
+            doc = await db.rate_buckets.find_one({"key": key}, {"_id": 0})
+
+            blocked = doc.get("blocked_until", 0) - now
+            if blocked > 0:
+                return blocked
+            tokens = refill(doc["tokens"], doc["updated_at"], now, rate, capacity)
+            wait = seconds_until(tokens, cost, rate)
+            if wait:
+                return wait
+
+            result = await db.rate_buckets.update_one(
+                {"key": key, "version": doc["version"]},
+                {"$set": {"tokens": tokens - cost, "updated_at": now}, "$inc": {"version": 1}}
+            )
+            if result.modified_count:
+                return 0.0
+        return random.uniform(0.01, 0.1)  # Heavy contention: back off briefly
+
+    async def _wait_for_tokens(self, key: str, cost: float, rate: float, capacity: float):
+        while True:
+            wait = await self._take(key, cost, rate, capacity)
+            if not wait:
+                return
+            await asyncio.sleep(min(wait, MAX_POLL_SECONDS) + random.uniform(0, 0.05))
+
+    async def _ensure_slots(self, upstream: str, count: int):
+        if (upstream, count) in self._slots_ready:
+            return
+        db = self._db()
+        for slot in range(count):
+            await db.rate_slots.update_one(
+                {"upstream": upstream, "slot": slot},
+                {"$setOnInsert": {"holder": None, "expires_at": 0}},
+                upsert=True
+            )
+        self._slots_ready.add((upstream, count))
+
+    async def _wait_for_slot(self, upstream: str, count: int) -> str:
+        """Lease one of `count` concurrency slots; returns the holder id."""
+        await self._ensure_slots(upstream, count)
+        db = self._db()
+        holder = f"{self.holder_prefix}:{uuid.uuid4().hex[:8]}"
+        while True:
+            now = time.time()
+            leased = await db.rate_slots.find_one_and_update(
+                {
+                    "upstream": upstream,
+                    "slot": {"$lt": count},
+                    "$or": [{"holder": None}, {"expires_at": {"$lt": now}}]
+                },
+                {"$set": {"holder": holder, "expires_at": now + SLOT_LEASE_SECONDS}}
+            )
+            if leased:
+                return holder
+            await asyncio.sleep(random.uniform(0.05, 0.25))
+
+    async def _release_slot(self, upstream: str, holder: str):
+        try:
+            await self._db().rate_slots.update_one(
+                {"upstream": upstream, "holder": holder},
+                {"$set": {"holder": None, "expires_at": 0}}
+            )
+        except Exception as e:
+            logger.warning(f"Could not release {upstream} slot {holder}: {str(e)}")
+
+    @asynccontextmanager
+    async def limit(self, upstream: str, characters: int = 0):
+        """
+        Wait for a request token, `characters` of TTS budget and a concurrency
+        slot of `upstream`; the slot is held until the block exits.
+        """
+        config = self.limits.get(upstream)
+        if config is None:
+            yield
+            return
+
+        started = time.monotonic()
+        holder = None
+        UPSTREAM_RATE_WAITING.inc(upstream=upstream)
+        try:
+            if characters and config.get("characters_per_minute"):
+                budget = config["characters_per_minute"]
+                await self._wait_for_tokens(f"{upstream}:characters", characters, budget / 60, budget)
+            await self._wait_for_tokens(
+                f"{upstream}:requests", 1, config["requests_per_second"], config["burst"]
+            )
+            holder = await self._wait_for_slot(upstream, config["concurrency"])
+        except Exception as e:
+            logger.warning(f"Rate governor unavailable for {upstream}, not limiting: {str(e)}")
+        finally:
+            UPSTREAM_RATE_WAITING.dec(upstream=upstream)
+            UPSTREAM_RATE_WAIT.observe(time.monotonic() - started, upstream=upstream)
+
+        try:
+            yield
+        finally:
+            if holder:
+                await self._release_slot(upstream, holder)
+
+    async def try_take(self, key: str, cost: float, rate: float, capacity: float) -> bool:
+        """
+        Spend `cost` from a shared token bucket without waiting (budgets for
+        background work). False when the bucket is short or MongoDB is down.
+        """
+        try:
+            return not await self._take(key, cost, rate, capacity)
+        except Exception as e:
+            logger.warning(f"Rate governor unavailable for {key}: {str(e)}")
+            return False
+
+    async def backoff(self, upstream: str, seconds: float):
+        """
+        Pause all calls to `upstream` for `seconds` (an upstream 429 and its
+        Retry-After), so every worker slows down instead of retrying into it.
+        """
+        UPSTREAM_THROTTLED.inc(upstream=upstream)
+        if upstream not in self.limits:
+            return
+        try:
+            await self._db().rate_buckets.update_one(
+                {"key": f"{upstream}:requests"},
+                {"$max": {"blocked_until": time.time() + seconds}}
+            )
+        except Exception as e:
+            logger.warning(f"Could not record {upstream} backoff: {str(e)}")
+
+
+# Global instance
+rate_governor = RateGovernor()
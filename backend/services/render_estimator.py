@@ -0,0 +1,156 @@
+import os
+import time
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.encode_profiles import ENCODE_PROFILES, DEFAULT_ENCODE_PROFILE
+
+logger = logging.getLogger(__name__)
+
+# Speech rate used to guess audio length (and B-roll clip count) from script length
+CHARS_PER_SECOND = float(os.getenv("TTS_CHARS_PER_SECOND", "15"))
+BROLL_CLIP_SECONDS = 2.5  # B-roll cut length (see broll_clip_count)
+MAX_BROLL_CLIPS = 30  # Links one Pexels search returns (per_page is capped at 30)
+
+# USD per API unit (ElevenLabs: character, Whisper: audio second, Pexels: request)
+API_UNIT_PRICES = {
+    "elevenlabs_characters": float(os.getenv("ELEVENLABS_USD_PER_1K_CHARS", "0.30")) / 1000,
+    "whisper_seconds": float(os.getenv("WHISPER_USD_PER_MINUTE", "0.006")) / 60,
+    "pexels_requests": 0.0
+}
+
+MIN_SAMPLES = 20      # Finished renders needed before the regression replaces the fallback
+MAX_SAMPLES = 500     # Most recent renders used for fitting
+REFIT_SECONDS = 600   # How often the model is refitted from MongoDB
+RIDGE = 1e-3          # Regularization, keeps the fit stable with few or collinear samples
+
+# Fallback before enough history exists: seconds per 1000 script characters
+FALLBACK_SECONDS_PER_1K_CHARS = float(os.getenv("RENDER_FALLBACK_SECONDS_PER_1K_CHARS", "120"))
+
+
+def broll_clip_count(audio_seconds: float) -> int:
+    """B-roll clips a render downloads for its audio (two extra for variety)."""
+    return min(int(audio_seconds / BROLL_CLIP_SECONDS) + 2, MAX_BROLL_CLIPS)
+
+
+def estimate_clip_count(script_chars: int) -> int:
+    return broll_clip_count(script_chars / CHARS_PER_SECOND)
+
+
+def feature_vector(features: Dict) -> List[float]:
+    """
+    Regression inputs of one render: intercept, script length (k chars),
+    clip count, renders already running, preview/promote/renditions flags
+    and one indicator per non-default encode profile.
+    """
+    row = [
+        1.0,
+        features.get("script_chars", 0) / 1000,
+        float(features.get("clip_count", 0)),
+        float(features.get("concurrent_jobs", 0)),
+        1.0 if features.get("render_profile") == "preview" else 0.0,
+        1.0 if features.get("promote") else 0.0,
+        1.0 if features.get("multi_output") else 0.0
+    ]
+    for name in sorted(ENCODE_PROFILES):
+        if name != DEFAULT_ENCODE_PROFILE:
+            row.append(1.0 if features.get("encode_profile") == name else 0.0)
+    return row
+
+
+def fit_linear(rows: List[List[float]], targets: List[float], ridge: float = RIDGE) -> List[float]:
+    """
+    Ridge least squares, as ordinary least squares on X stacked over √λ·I
+    (and y over zeros). A feature that never varies gets weight 0.
+    """
+    x = np.asarray(rows, dtype=float)
+    y = np.asarray(targets, dtype=float)
+    n = x.shape[1]
+    x = np.vstack([x, np.sqrt(ridge) * np.eye(n)])
+    y = np.concatenate([y, np.zeros(n)])
+    weights, *_ = np.linalg.lstsq(x, y, rcond=None)
+    return weights.tolist()
+
+
+class RenderEstimator:
+    """
+    Predicts render time and API cost of a job.
+    Render time comes from a linear model fitted on `render_features` and
+    `render_seconds` of recently finished videos, refitted every REFIT_SECONDS;
+    until MIN_SAMPLES renders exist it scales with script length.
+    """
+
+    def __init__(self):
+        self.weights: Optional[List[float]] = None
+        self.samples = 0
+        self.fitted_at = 0.0
+
+    async def refresh(self, db, force: bool = False):
+        """Refit from MongoDB when the model is older than REFIT_SECONDS."""
+        if not force and time.monotonic() - self.fitted_at < REFIT_SECONDS:
+            return
+        self.fitted_at = time.monotonic()
+
+        history = await db.videos.find(
+            {"render_seconds": {"$exists": True}, "status": {"$in": ["completed", "preview_ready"]}},
+            {"_id": 0, "render_features": 1, "render_seconds": 1}
+        ).sort("updated_at", -1).limit(MAX_SAMPLES).to_list(length=MAX_SAMPLES)
+
+        self.samples = len(history)
+        if self.samples < MIN_SAMPLES:
+            self.weights = None
+            return
+
+        rows = [feature_vector(v["render_features"]) for v in history]
+        targets = [v["render_seconds"] for v in history]
+        self.weights = fit_linear(rows, targets)
+        logger.info(f"Render estimator refitted on {self.samples} renders")
+
+    def predict_seconds(self, features: Dict) -> float:
+        if self.weights is None:
+            seconds = features.get("script_chars", 0) / 1000 * FALLBACK_SECONDS_PER_1K_CHARS
+            if features.get("render_profile") == "preview":
+                seconds /= 3
+        else:
+            seconds = sum(w * x for w, x in zip(self.weights, feature_vector(features)))
+        return max(1.0, seconds)
+
+    @staticmethod
+    def job_features(
+        script_text: str,
+        render_profile: str = "final",
+        encode_profile: str = DEFAULT_ENCODE_PROFILE,
+        multi_output: bool = False,
+        promote: bool = False,
+        concurrent_jobs: int = 0
+    ) -> Dict:
+        """Features of a job that has not run yet (clip count is estimated)."""
+        return {
+            "script_chars": len(script_text),
+            "clip_count": estimate_clip_count(len(script_text)),
+            "render_profile": render_profile,
+            "encode_profile": encode_profile,
+            "multi_output": multi_output and render_profile != "preview",
+            "promote": promote,
+            "concurrent_jobs": concurrent_jobs
+        }
+
+    @staticmethod
+    def api_units(features: Dict) -> Dict:
+        """API units a job will consume; promotions reuse the preview's TTS and B-roll."""
+        if features.get("promote"):
+            return {"elevenlabs_characters": 0, "whisper_seconds": 0.0, "pexels_requests": 0}
+        return {
+            "elevenlabs_characters": features["script_chars"],
+            "whisper_seconds": round(features["script_chars"] / CHARS_PER_SECOND, 1),
+            "pexels_requests": 1
+        }
+
+    @staticmethod
+    def api_cost(units: Dict) -> float:
+        return round(sum(API_UNIT_PRICES[name] * amount for name, amount in units.items()), 4)
+
+
+render_estimator = RenderEstimator()
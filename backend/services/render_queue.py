@@ -0,0 +1,304 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Job kinds in dispatch priority order
+JOB_PRIORITIES = ["preview", "single", "batch"]
+
+# Smoothing of the average job duration used for wait estimates
+JOB_DURATION_SMOOTHING = 0.2
+
+class RenderJob:
+    """
+    A queued render. `kind` is "preview" for interactive preview renders,
+    "single" for interactive final renders and "batch" for jobs created by
+    /videos/generate-batch. `weight` is the number of jobs dispatched per
+    round-robin turn of its user (1 for everyone by default).
+    """
+
+    def __init__(
+        self,
+        video_id: str,
+        user_id: str,
+        kind: str,
+        kwargs: Dict,
+        batch_id: Optional[str] = None,
+        weight: int = 1,
+        estimated_seconds: Optional[float] = None
+    ):
+        self.video_id = video_id
+        self.user_id = user_id
+        self.kind = kind
+        self.kwargs = kwargs
+        self.batch_id = batch_id
+        self.weight = max(1, weight)
+        self.estimated_seconds = estimated_seconds  # Predicted render time, if known
+        self.started_at: Optional[float] = None
+        self.cancel_requested = False
+
+
+class FairQueue:
+    """
+    Per-user FIFO queues served by deficit round-robin.
+    Each turn a user earns `weight` credits and spends one per dispatched job,
+    so a user with 40 queued jobs gets the same turns as a user with one.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, Deque[RenderJob]] = {}
+        self.users: Deque[str] = deque()  # Round-robin order of users with queued jobs
+        self.deficit: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return sum(len(jobs) for jobs in self.jobs.values())
+
+    def push(self, job: RenderJob):
+        if job.user_id not in self.jobs:
+            self.jobs[job.user_id] = deque()
+            self.users.append(job.user_id)
+            self.deficit[job.user_id] = 0
+        self.jobs[job.user_id].append(job)
+
+    def pop(self, eligible: Callable[[str], bool]) -> Optional[RenderJob]:
+        """Dispatch the next job of the first user in turn that `eligible` allows."""
+        for _ in range(len(self.users)):
+            user_id = self.users[0]
+            if eligible(user_id):
+                if self.deficit[user_id] < 1:
+                    self.deficit[user_id] += self.jobs[user_id][0].weight
+                self.deficit[user_id] -= 1
+                job = self.jobs[user_id].popleft()
+                if not self.jobs[user_id]:
+                    self._drop_user(user_id)
+                elif self.deficit[user_id] < 1:
+                    self.users.rotate(-1)  # Turn used up
+                return job
+            self.users.rotate(-1)
+        return None
+
+    def remove(self, video_id: str) -> bool:
+        for user_id, jobs in self.jobs.items():
+            for job in jobs:
+                if job.video_id == video_id:
+                    jobs.remove(job)
+                    if not jobs:
+                        self._drop_user(user_id)
+                    return True
+        return False
+
+    def jobs_ahead(self, video_id: str) -> Optional[int]:
+        """
+        Estimate how many jobs of this queue are dispatched before `video_id`,
+        assuming full round-robin turns from now on and no per-user caps.
+        """
+        for user_id, jobs in self.jobs.items():
+            for index, job in enumerate(jobs):
+                if job.video_id == video_id:
+                    break
+            else:
+                continue
+
+            # The job is dispatched in turn `rounds` of its user
+            rounds = index // job.weight
+            order = list(self.users)
+            ahead = index
+            for other_id in order:
+                if other_id == user_id:
+                    continue
+                other_jobs = self.jobs[other_id]
+                turns = rounds + 1 if order.index(other_id) < order.index(user_id) else rounds
+                ahead += min(len(other_jobs), turns * other_jobs[0].weight)
+            return ahead
+        return None
+
+    def _drop_user(self, user_id: str):
+        self.jobs.pop(user_id, None)
+        self.deficit.pop(user_id, None)
+        self.users.remove(user_id)
+
+
+class RenderQueue:
+    """
+    In-process render scheduler with a fixed number of worker slots.
+
+    - Previews are dispatched before single finals, and those before batch jobs
+    - Within each kind, users share the workers by weighted round-robin
+    - A user never runs more than `max_per_user` jobs at once
+    - Batch jobs may occupy at most `concurrency - batch_reserved` slots,
+      so a burst of batch work never blocks an interactive render
+    - Workers are started lazily on the first submit
+    - Each job runs in its own task so it can be cancelled without
+      losing the worker
+    """
+
+    def __init__(
+        self,
+        runner: Callable[..., Awaitable[None]],
+        concurrency: Optional[int] = None,
+        batch_reserved: Optional[int] = None,
+        max_per_user: Optional[int] = None
+    ):
+        self.runner = runner
+        self.concurrency = concurrency or int(os.getenv("RENDER_CONCURRENCY", "2"))
+        reserved = batch_reserved if batch_reserved is not None else int(os.getenv("RENDER_INTERACTIVE_RESERVED", "1"))
+        # Keep at least one slot usable by batch jobs
+        self.batch_slots = max(1, self.concurrency - reserved)
+        self.max_per_user = max_per_user or int(os.getenv("RENDER_MAX_PER_USER", "2"))
+
+        self.queues: Dict[str, FairQueue] = {kind: FairQueue() for kind in JOB_PRIORITIES}
+        self.running: Dict[str, RenderJob] = {}
+        self.running_batch = 0
+        self.running_per_user: Dict[str, int] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        # Moving average of finished job durations (seeded until the first job ends)
+        self.avg_job_seconds = float(os.getenv("RENDER_AVG_JOB_SECONDS", "120"))
+
+        self._wakeup: Optional[asyncio.Condition] = None
+        self._workers = []
+
+    def submit(self, job: RenderJob):
+        """Queue a job and wake a worker."""
+        self.submit_many([job])
+
+    def submit_many(self, jobs: List[RenderJob]):
+        """Queue several jobs with a single wakeup."""
+        for job in jobs:
+            self.queues[job.kind].push(job)
+        self._ensure_started()
+        asyncio.get_running_loop().create_task(self._notify())
+
+    def queue_depth(self, kind: Optional[str] = None) -> int:
+        """Queued jobs; with `kind`, only those dispatched before or with a new job of `kind`."""
+        kinds = JOB_PRIORITIES[:JOB_PRIORITIES.index(kind) + 1] if kind else JOB_PRIORITIES
+        return sum(len(self.queues[queued_kind]) for queued_kind in kinds)
+
+    def position(self, video_id: str) -> Optional[int]:
+        """
+        Estimated 1-based dispatch position of a queued job, counting every
+        job of a higher priority as ahead of it. None if not queued here.
+        """
+        ahead = 0
+        for kind in JOB_PRIORITIES:
+            queue = self.queues[kind]
+            in_queue = queue.jobs_ahead(video_id)
+            if in_queue is not None:
+                return ahead + in_queue + 1
+            ahead += len(queue)
+        return None
+
+    def estimated_wait(self, kind: str, count: int = 1) -> float:
+        """
+        Seconds until the last of `count` new jobs of `kind` would start:
+        the remaining time of running jobs and the predicted time of queued
+        jobs of the same or higher priority, spread over the usable slots.
+        Jobs without a prediction count at the average job duration.
+        """
+        ahead = [
+            job
+            for queued_kind in JOB_PRIORITIES[:JOB_PRIORITIES.index(kind) + 1]
+            for jobs in self.queues[queued_kind].jobs.values()
+            for job in jobs
+        ]
+        slots = self.batch_slots if kind == "batch" else self.concurrency
+        if len(self.running) + len(ahead) + count <= slots:
+            return 0.0
+
+        now = time.monotonic()
+        busy = sum(
+            max(0.0, self._job_seconds(job) - (now - job.started_at))
+            for job in self.running.values()
+        )
+        queued = sum(self._job_seconds(job) for job in ahead)
+        new = (count - 1) * self.avg_job_seconds
+        return (busy + queued + new) / slots
+
+    def _job_seconds(self, job: RenderJob) -> float:
+        return job.estimated_seconds or self.avg_job_seconds
+
+    def cancel(self, video_id: str) -> Optional[str]:
+        """
+        Cancel a job. Queued jobs are dropped ("queued"); running jobs get
+        CancelledError at their current await ("running"). Returns None when
+        the job is not known to this process.
+        """
+        for queue in self.queues.values():
+            if queue.remove(video_id):
+                return "queued"
+
+        task = self.tasks.get(video_id)
+        if task is None:
+            return None
+        self.running[video_id].cancel_requested = True
+        task.cancel()
+        return "running"
+
+    def _ensure_started(self):
+        if self._workers:
+            return
+        self._wakeup = asyncio.Condition()
+        loop = asyncio.get_running_loop()
+        for i in range(self.concurrency):
+            self._workers.append(loop.create_task(self._worker(i)))
+        logger.info(
+            f"Render queue started with {self.concurrency} workers "
+            f"({self.batch_slots} usable by batch jobs, {self.max_per_user} per user)"
+        )
+
+    async def _notify(self):
+        async with self._wakeup:
+            self._wakeup.notify_all()
+
+    def _under_user_cap(self, user_id: str) -> bool:
+        return self.running_per_user.get(user_id, 0) < self.max_per_user
+
+    def _next_job(self) -> Optional[RenderJob]:
+        """Pick the next job: highest priority first, batch only within its slot budget."""
+        for kind in JOB_PRIORITIES:
+            if kind == "batch" and self.running_batch >= self.batch_slots:
+                continue
+            job = self.queues[kind].pop(self._under_user_cap)
+            if job is None:
+                continue
+            if kind == "batch":
+                self.running_batch += 1
+            self.running_per_user[job.user_id] = self.running_per_user.get(job.user_id, 0) + 1
+            return job
+        return None
+
+    async def _worker(self, worker_id: int):
+        while True:
+            async with self._wakeup:
+                job = self._next_job()
+                while job is None:
+                    await self._wakeup.wait()
+                    job = self._next_job()
+
+            job.started_at = time.monotonic()
+            self.running[job.video_id] = job
+            task = asyncio.get_running_loop().create_task(self.runner(**job.kwargs))
+            self.tasks[job.video_id] = task
+            try:
+                await task
+                elapsed = time.monotonic() - job.started_at
+                self.avg_job_seconds += JOB_DURATION_SMOOTHING * (elapsed - self.avg_job_seconds)
+            except asyncio.CancelledError:
+                if not job.cancel_requested:
+                    raise  # The worker itself is being shut down
+                logger.info(f"Render worker {worker_id} job {job.video_id} cancelled")
+            except Exception as e:
+                # The runner records failures on the video document itself
+                logger.error(f"Render worker {worker_id} job {job.video_id} crashed: {str(e)}")
+            finally:
+                self.tasks.pop(job.video_id, None)
+                self.running.pop(job.video_id, None)
+                if job.kind == "batch":
+                    self.running_batch -= 1
+                self.running_per_user[job.user_id] -= 1
+                if not self.running_per_user[job.user_id]:
+                    del self.running_per_user[job.user_id]
+                await self._notify()
@@ -0,0 +1,182 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from services.telemetry import CIRCUIT_STATE, UPSTREAM_RETRIES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+# Status codes worth retrying; other 4xx mean the request itself is wrong
+RETRYABLE_STATUS = {408, 409, 425, 429}
+
+# Failures without a status code worth retrying: connection problems and timeouts
+RETRYABLE_ERRORS: Tuple[type, ...] = (ConnectionError, TimeoutError, asyncio.TimeoutError)
+try:
+    import httpx
+    RETRYABLE_ERRORS += (httpx.TransportError,)  # Also raised by the ElevenLabs SDK
+except ImportError:
+    pass
+try:
+    import openai
+    RETRYABLE_ERRORS += (openai.APIConnectionError,)  # Includes APITimeoutError
+except ImportError:
+    pass
+
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+    def __init__(self, upstream: str, retry_in: float):
+        super().__init__(f"{upstream} is unavailable (circuit open, retry in {retry_in:.0f}s)")
+        self.upstream = upstream
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Per-process circuit breaker for one upstream.
+    - closed: calls pass; `failure_threshold` consecutive failures open it
+    - open: calls fail fast with CircuitOpenError for `reset_seconds`
+    - half_open: one trial call; success closes the circuit, failure reopens it
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def retry_in(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now (claims the trial call when half-open)."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_running:
+            self.trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info(f"Circuit {self.name} closed")
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        CIRCUIT_STATE.set(CIRCUIT_STATES["closed"], upstream=self.name)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.trial_running or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self.trial_running:
+                logger.warning(f"Circuit {self.name} opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+            self.trial_running = False
+            CIRCUIT_STATE.set(CIRCUIT_STATES["open"], upstream=self.name)
+
+
+class RetryPolicy:
+    """`attempts` tries with full-jitter exponential backoff between them."""
+
+    def __init__(self, attempts: int, base_delay: float, max_delay: float):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+RETRY_POLICIES = {
+    "elevenlabs": RetryPolicy(attempts=3, base_delay=1.0, max_delay=8.0),
+    "openai": RetryPolicy(attempts=3, base_delay=0.5, max_delay=8.0),
+    "pexels": RetryPolicy(attempts=3, base_delay=0.5, max_delay=4.0),
+    "pexels_files": RetryPolicy(attempts=2, base_delay=0.5, max_delay=2.0)
+}
+
+breakers: Dict[str, CircuitBreaker] = {name: CircuitBreaker(name) for name in RETRY_POLICIES}
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Connection errors, timeouts, 429 and 5xx are retried; other HTTP errors
+    and any other exception (bugs, bad responses) are not.
+    """
+    status = _status_code(exc)
+    if status is None:
+        return isinstance(exc, RETRYABLE_ERRORS)
+    return status in RETRYABLE_STATUS or status >= 500
+
+
+async def call_upstream(
+    upstream: str,
+    factory: Callable[[], Awaitable[T]],
+    policy: Optional[RetryPolicy] = None
+) -> T:
+    """
+    Call `factory()` under the upstream's circuit breaker and retry policy
+    (`policy` overrides the upstream's default). Raises CircuitOpenError
+    without calling when the circuit is open, so callers can switch to a
+    degraded mode immediately.
+    """
+    breaker = breakers[upstream]
+    policy = policy or RETRY_POLICIES[upstream]
+    for attempt in range(policy.attempts):
+        if not breaker.allow():
+            raise CircuitOpenError(upstream, breaker.retry_in())
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            breaker.trial_running = False
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                # The upstream answered; the request was at fault
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt + 1 >= policy.attempts or breaker.state == "open":
+                raise
+            delay = policy.delay(attempt)
+            UPSTREAM_RETRIES.inc(upstream=upstream)
+            logger.warning(f"{upstream} call failed ({type(e).__name__}: {str(e)}), retry {attempt + 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
@@ -0,0 +1,221 @@
+import os
+import re
+import math
+import time
+import zlib
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VECTOR_DIM = int(os.getenv("SIMILARITY_VECTOR_DIM", "1024"))  # Hashed n-gram buckets
+NGRAM_SIZES = (3, 4, 5)
+CANDIDATES = 10  # Most similar items considered, then ranked by retention
+MIN_SIMILARITY = 0.1
+# Writes made by other processes are picked up when the index is rebuilt
+INDEX_MAX_AGE_SECONDS = float(os.getenv("SIMILARITY_INDEX_MAX_AGE_SECONDS", "600"))
+# Indexes kept in memory; the least recently used beyond this are dropped
+MAX_USERS = int(os.getenv("SIMILARITY_MAX_USERS", "500"))
+
+
+def _normalize(text: str) -> str:
+    return " " + re.sub(r"[\W_]+", " ", text.lower()).strip() + " "
+
+
+def vectorize(text: str) -> np.ndarray:
+    """
+    Unit-length vector of hashed character n-grams with sublinear term
+    frequency, so cosine similarity is a dot product.
+    """
+    counts: Dict[int, int] = {}
+    normalized = _normalize(text)
+    for n in NGRAM_SIZES:
+        for i in range(len(normalized) - n + 1):
+            bucket = zlib.crc32(normalized[i:i + n].encode("utf-8")) % VECTOR_DIM
+            counts[bucket] = counts.get(bucket, 0) + 1
+
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    for bucket, count in counts.items():
+        vector[bucket] = 1.0 + math.log(count)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class UserIndex:
+    """Vectors of one user's analytics rows and hooks, in a growable matrix."""
+
+    def __init__(self):
+        self.matrix = np.zeros((64, VECTOR_DIM), dtype=np.float32)
+        self.size = 0
+        self.keys: List[str] = []
+        self.items: List[Dict] = []
+        self.positions: Dict[str, int] = {}
+        self.built_at = time.monotonic()
+
+    def add(self, key: str, vector: np.ndarray, item: Dict):
+        row = self.positions.get(key)
+        if row is None:
+            if self.size == len(self.matrix):
+                self.matrix = np.vstack([self.matrix, np.zeros_like(self.matrix)])
+            row = self.size
+            self.size += 1
+            self.keys.append(key)
+            self.items.append(item)
+            self.positions[key] = row
+        self.matrix[row] = vector
+        self.items[row] = item
+
+    def remove(self, key: str):
+        """Swap the last row into the removed one."""
+        row = self.positions.pop(key, None)
+        if row is None:
+            return
+        last = self.size - 1
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            self.keys[row] = self.keys[last]
+            self.items[row] = self.items[last]
+            self.positions[self.keys[row]] = row
+        self.keys.pop()
+        self.items.pop()
+        self.size = last
+
+    def search(self, vector: np.ndarray, count: int) -> List[Dict]:
+        """Up to `count` items with cosine similarity >= MIN_SIMILARITY, most similar first."""
+        if not self.size:
+            return []
+        scores = self.matrix[:self.size] @ vector
+        count = min(count, self.size)
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {**self.items[i], "similarity": round(float(scores[i]), 3)}
+            for i in top if scores[i] >= MIN_SIMILARITY
+        ]
+
+
+def _analytics_entry(row: Dict):
+    text = f"{row.get('hook_title') or ''} {row.get('resolve_script') or ''}"
+    item = {
+        "source": "analytics",
+        "hook_title": row.get("hook_title"),
+        "resolve_script": row.get("resolve_script"),
+        "retention_percent": row.get("retention_percent", 0)
+    }
+    return f"analytics:{row['id']}", text, item
+
+
+def _hook_entry(hook: Dict):
+    item = {
+        "source": "hook",
+        "hook_title": hook.get("hook_text"),
+        "retention_percent": hook.get("avg_retention", 0)
+    }
+    return f"hook:{hook['id']}", f"{hook.get('hook_text') or ''} {hook.get('topic') or ''}", item
+
+
+ENTRIES = {"analytics": _analytics_entry, "hook": _hook_entry}
+
+
+class SimilarityIndex:
+    """
+    In-process similarity search over each user's analytics rows (hook title
+    and script) and hook library. A user's index is built from MongoDB on
+    first use and kept current by add/remove from the routes that write
+    those collections; it is rebuilt after INDEX_MAX_AGE_SECONDS to pick up
+    writes made by other processes. At most `max_users` indexes are kept,
+    least recently used first out.
+    """
+
+    def __init__(self, max_users: int = MAX_USERS):
+        self.max_users = max_users
+        self.users: "OrderedDict[str, UserIndex]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def _db():
+        from database import db
+        return db
+
+    async def _build(self, user_id: str) -> UserIndex:
+        db = self._db()
+        rows = await db.analytics_data.find(
+            {"user_id": user_id},
+            {"_id": 0, "id": 1, "hook_title": 1, "resolve_script": 1, "retention_percent": 1}
+        ).to_list(length=None)
+        hooks = await db.hooks.find(
+            {"user_id": user_id},
+            {"_id": 0, "id": 1, "hook_text": 1, "topic": 1, "avg_retention": 1}
+        ).to_list(length=None)
+        entries = [ENTRIES[kind](doc) for kind, docs in (("analytics", rows), ("hook", hooks)) for doc in docs]
+        # Vectorizing a large history takes a while; keep the event loop free
+        index = await asyncio.to_thread(self._index_entries, entries)
+        logger.info(f"Built similarity index for user {user_id} ({index.size} items)")
+        return index
+
+    @staticmethod
+    def _index_entries(entries: List[Tuple[str, str, Dict]]) -> UserIndex:
+        index = UserIndex()
+        for key, text, item in entries:
+            index.add(key, vectorize(text), item)
+        return index
+
+    async def _user_index(self, user_id: str) -> UserIndex:
+        index = self.users.get(user_id)
+        if index and time.monotonic() - index.built_at < INDEX_MAX_AGE_SECONDS:
+            self.users.move_to_end(user_id)
+            return index
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            index = self.users.get(user_id)
+            if not index or time.monotonic() - index.built_at >= INDEX_MAX_AGE_SECONDS:
+                index = self.users[user_id] = await self._build(user_id)
+            self.users.move_to_end(user_id)
+        self._evict()
+        return index
+
+    def _evict(self):
+        """Drop the least recently used indexes beyond max_users, and idle locks of unindexed users."""
+        while len(self.users) > self.max_users:
+            self.users.popitem(last=False)
+        for user_id in [u for u, lock in self._locks.items() if u not in self.users and not lock.locked()]:
+            del self._locks[user_id]
+
+    def add(self, user_id: str, kind: str, doc: Dict):
+        """Index a new or changed analytics row ("analytics") or hook ("hook")."""
+        index = self.users.get(user_id)
+        if index is None:
+            return  # Not built yet; the build will include it
+        key, text, item = ENTRIES[kind](doc)
+        index.add(key, vectorize(text), item)
+
+    def remove(self, user_id: str, kind: str, doc_id: str):
+        index = self.users.get(user_id)
+        if index is not None:
+            index.remove(f"{kind}:{doc_id}")
+
+    def set_retention(self, user_id: str, kind: str, doc_id: str, retention: float):
+        index = self.users.get(user_id)
+        row = index.positions.get(f"{kind}:{doc_id}") if index else None
+        if row is not None:
+            index.items[row] = {**index.items[row], "retention_percent": retention}
+
+    async def similar(self, user_id: str, query: str, k: int = 3, candidates: Optional[int] = None) -> List[Dict]:
+        """
+        The `k` best-retaining items among the `candidates` most similar to
+        `query` (a topic and its keywords). Items without retention data
+        (hooks nobody has measured yet) are left out.
+        """
+        index = await self._user_index(user_id)
+        matches = index.search(vectorize(query), candidates or CANDIDATES)
+        matches = [item for item in matches if item.get("retention_percent")]
+        matches.sort(key=lambda item: item.get("retention_percent") or 0, reverse=True)
+        return matches[:k]
+
+
+# Global instance
+similarity_index = SimilarityIndex()
@@ -0,0 +1,296 @@
+import time
+import logging
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default latency buckets (seconds), from fast API calls to full renders
+DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric(ABC):
+    """Base of the metric types: a name, help text and label names."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Exposition lines of the metric's current values."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        lines += self.samples()
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        super().__init__(name, help_text, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down. With `callback`, values are read at scrape
+    time: the callback returns {label values tuple: value}.
+    """
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Iterable[str] = (),
+        callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+    ):
+        super().__init__(name, help_text, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[str]:
+        values = dict(self.values)
+        if self.callback:
+            try:
+                values.update(self.callback())
+            except Exception as e:
+                logger.error(f"Gauge {self.name} callback failed: {str(e)}")
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Iterable[str] = (),
+        buckets: Optional[List[float]] = None
+    ):
+        super().__init__(name, help_text, labels)
+        self.buckets = sorted(buckets or DEFAULT_BUCKETS)
+        # Per label set: [per-bucket counts (+Inf last), sum, count]
+        self.values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            else:
+                entry[0][-1] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + [float("inf")], counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Holds every metric of the process and renders the text exposition format."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Iterable[str] = (), callback=None) -> Gauge:
+        return self.register(Gauge(name, help_text, labels, callback))
+
+    def histogram(self, name: str, help_text: str, labels: Iterable[str] = (), buckets=None) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "API request latency by route", ("method", "route", "status")
+)
+MONGO_OPERATION_DURATION = REGISTRY.histogram(
+    "mongo_operation_duration_seconds", "MongoDB command latency", ("command", "outcome")
+)
+RENDER_QUEUE_DEPTH = REGISTRY.gauge(
+    "render_queue_depth", "Queued render jobs by kind", ("kind",)
+)
+RENDER_JOBS_RUNNING = REGISTRY.gauge(
+    "render_jobs_running", "Render jobs currently running"
+)
+FFMPEG_ACTIVE_PROCESSES = REGISTRY.gauge(
+    "ffmpeg_active_processes", "FFmpeg/FFprobe processes currently running"
+)
+RENDER_STAGE_DURATION = REGISTRY.histogram(
+    "render_stage_duration_seconds", "Render pipeline stage durations", ("stage",)
+)
+RENDER_SPAN_DURATION = REGISTRY.histogram(
+    "render_span_duration_seconds", "Render pipeline operation (span) durations", ("span",)
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit/miss)", ("cache", "result")
+)
+EXTERNAL_API_REQUESTS = REGISTRY.counter(
+    "external_api_requests_total", "External API calls by outcome (ok/error)", ("api", "outcome")
+)
+EXTERNAL_API_DURATION = REGISTRY.histogram(
+    "external_api_duration_seconds", "External API call latency", ("api",)
+)
+UPSTREAM_RATE_WAIT = REGISTRY.histogram(
+    "upstream_rate_limit_wait_seconds", "Time callers waited for upstream API quota", ("upstream",)
+)
+UPSTREAM_RATE_WAITING = REGISTRY.gauge(
+    "upstream_rate_limit_waiting", "Callers currently waiting for upstream API quota", ("upstream",)
+)
+UPSTREAM_THROTTLED = REGISTRY.counter(
+    "upstream_throttled_total", "429 responses received from upstream APIs", ("upstream",)
+)
+CIRCUIT_STATE = REGISTRY.gauge(
+    "upstream_circuit_state", "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)", ("upstream",)
+)
+UPSTREAM_RETRIES = REGISTRY.counter(
+    "upstream_retries_total", "Retried upstream API calls", ("upstream",)
+)
+DEGRADED_RENDERS = REGISTRY.counter(
+    "render_degraded_total", "Renders that used a fallback for a failed dependency", ("dependency", "mode")
+)
+EXTERNAL_API_RESPONSE_LATENCY = REGISTRY.histogram(
+    "external_api_response_seconds",
+    "Time to response headers of each HTTP call to an external API (SDK retries count separately)",
+    ("api", "status")
+)
+HEDGED_REQUESTS = REGISTRY.counter(
+    "hedged_requests_total",
+    "Hedged calls by outcome (not_hedged, over_budget, primary_won, hedge_won, failed)",
+    ("call", "outcome")
+)
+PREGENERATED_SCRIPTS = REGISTRY.counter(
+    "pregenerated_scripts_total", "Script completions generated ahead of requests by the pre-generation worker"
+)
+HEDGE_SAVED_SECONDS = REGISTRY.histogram(
+    "hedge_saved_seconds", "Estimated latency saved when the hedge call answered first", ("call",)
+)
+
+
+@contextmanager
+def external_call(api: str):
+    """Count and time one external API call; exceptions count as errors."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        EXTERNAL_API_DURATION.observe(time.perf_counter() - started, api=api)
+        EXTERNAL_API_REQUESTS.inc(api=api, outcome=outcome)
+
+
+def mongo_command_listener():
+    """
+    A pymongo CommandListener feeding MONGO_OPERATION_DURATION; pass it to
+    the client's `event_listeners`. Built lazily so this module has no pymongo
+    import for processes that do not talk to MongoDB.
+    """
+    from pymongo import monitoring
+
+    class MongoCommandMetrics(monitoring.CommandListener):
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            MONGO_OPERATION_DURATION.observe(event.duration_micros / 1_000_000, command=event.command_name, outcome="ok")
+
+        def failed(self, event):
+            MONGO_OPERATION_DURATION.observe(event.duration_micros / 1_000_000, command=event.command_name, outcome="error")
+
+    return MongoCommandMetrics()
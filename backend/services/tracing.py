@@ -0,0 +1,261 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from services.telemetry import RENDER_SPAN_DURATION, EXTERNAL_API_REQUESTS, EXTERNAL_API_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the span latency histogram buckets; the last bucket is open
+SPAN_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500]
+
+PROCESS_SAMPLE_INTERVAL = 0.25  # Seconds between /proc samples of a running FFmpeg
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+# Spans that are calls to an external API (span name: API name in metrics)
+EXTERNAL_API_SPANS = {
+    "tts_request": "elevenlabs",
+    "whisper": "openai_whisper",
+    "pexels_search": "pexels_search",
+    "download": "pexels_download"
+}
+
+_current_trace: ContextVar[Optional["RenderTrace"]] = ContextVar("render_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("render_span", default=None)
+
+
+class Span:
+    """
+    One timed operation of a render.
+    - wall_seconds: elapsed time
+    - cpu_seconds: CPU of child processes, plus this thread's CPU for sync spans
+    - peak_rss_bytes: largest resident set of a child process
+    - bytes_in / bytes_out: data received / produced (downloads, files, API bodies)
+    """
+
+    def __init__(self, name: str, attrs: Dict):
+        self.name = name
+        self.attrs = attrs
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_bytes = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.error: Optional[str] = None
+        self.started_at = datetime.utcnow().isoformat()
+
+    def add_process(self, cpu_seconds: float, peak_rss_bytes: int):
+        self.cpu_seconds += cpu_seconds
+        self.peak_rss_bytes = max(self.peak_rss_bytes, peak_rss_bytes)
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "error": self.error,
+            **self.attrs
+        }
+
+
+class RenderTrace:
+    """
+    Collects the spans of one render. Activated for the current task (and
+    tasks it creates) with `activate()`, so deeper code such as FFmpegService
+    records spans without knowing the video id.
+    """
+
+    def __init__(self, video_id: str):
+        self.video_id = video_id
+        self.spans: List[Span] = []
+
+    def activate(self):
+        return _current_trace.set(self)
+
+    def to_list(self) -> List[Dict]:
+        return [s.to_dict() for s in self.spans]
+
+
+@contextmanager
+def span(name: str, sync: bool = False, **attrs):
+    """
+    Time a block as a span of the active render trace (a no-op trace-wise
+    when none is active, e.g. in benchmarks). `sync=True` also charges this
+    thread's CPU time, which is only meaningful for blocks without awaits.
+    """
+    trace = _current_trace.get()
+    current = Span(name, attrs)
+    token = _current_span.set(current)
+    started = time.monotonic()
+    cpu_started = time.thread_time()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.wall_seconds = time.monotonic() - started
+        if sync:
+            current.cpu_seconds += time.thread_time() - cpu_started
+        _current_span.reset(token)
+        if trace is not None:
+            trace.spans.append(current)
+        
+        RENDER_SPAN_DURATION.observe(current.wall_seconds, span=name)
+        api = EXTERNAL_API_SPANS.get(name)
+        if api:
+            EXTERNAL_API_DURATION.observe(current.wall_seconds, api=api)
+            EXTERNAL_API_REQUESTS.inc(api=api, outcome="error" if current.error else "ok")
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def read_process_stats(pid: int) -> Optional[Tuple[float, int]]:
+    """
+    (CPU seconds incl. reaped children, peak RSS bytes) of a live process from
+    /proc, or None if it is gone or /proc is unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Fields after the command name: utime, stime, cutime, cstime are 14-17
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu_seconds = sum(int(value) for value in fields[11:15]) / CLOCK_TICKS
+
+        peak_rss = 0
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    peak_rss = int(line.split()[1]) * 1024
+                    break
+        return cpu_seconds, peak_rss
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ProcessSampler:
+    """
+    Polls a child process's CPU and peak RSS while it runs. The last sample is
+    taken when its pipes close, just before it is reaped, so short tails of CPU
+    time can be missed; good enough for per-stage resource accounting.
+    """
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.cpu_seconds = 0.0
+        self.peak_rss_bytes = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def sample(self):
+        stats = read_process_stats(self.pid)
+        if stats:
+            self.cpu_seconds = max(self.cpu_seconds, stats[0])
+            self.peak_rss_bytes = max(self.peak_rss_bytes, stats[1])
+
+    async def _poll(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(PROCESS_SAMPLE_INTERVAL)
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._poll())
+
+    def stop(self, target: Optional[Span]):
+        """Take a final sample and charge the totals to `target`."""
+        if self._task:
+            self._task.cancel()
+        self.sample()
+        if target is not None:
+            target.add_process(self.cpu_seconds, self.peak_rss_bytes)
+
+
+def _bucket_index(seconds: float) -> int:
+    for i, bound in enumerate(SPAN_BUCKETS):
+        if seconds <= bound:
+            return i
+    return len(SPAN_BUCKETS)
+
+
+async def record_span_histograms(db, spans: List[Dict]):
+    """
+    Add span wall times to hourly per-name histograms in `span_histograms`.
+    Buckets are stored as b0..bN (field names cannot contain dots).
+    """
+    period = datetime.utcnow().strftime("%Y-%m-%dT%H")
+    increments: Dict[str, Dict[str, float]] = {}
+    for s in spans:
+        inc = increments.setdefault(s["name"], {"count": 0, "sum": 0.0})
+        bucket = f"buckets.b{_bucket_index(s['wall_seconds'])}"
+        inc[bucket] = inc.get(bucket, 0) + 1
+        inc["count"] += 1
+        inc["sum"] += s["wall_seconds"]
+        if s.get("error"):
+            inc["errors"] = inc.get("errors", 0) + 1
+
+    for name, inc in increments.items():
+        await db.span_histograms.update_one(
+            {"name": name, "period": period},
+            {"$inc": inc},
+            upsert=True
+        )
+
+
+def histogram_quantile(buckets: List[int], q: float) -> Optional[float]:
+    """Upper bound of the bucket holding the q-quantile (None if empty or open-ended)."""
+    total = sum(buckets)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, count in enumerate(buckets):
+        seen += count
+        if seen >= rank:
+            return SPAN_BUCKETS[i] if i < len(SPAN_BUCKETS) else None
+    return None
+
+
+async def get_span_histograms(db, hours: int = 24) -> Dict[str, Dict]:
+    """Merge the hourly histograms of the last `hours` into one per span name."""
+    since = (datetime.utcnow() - timedelta(hours=hours)).strftime("%Y-%m-%dT%H")
+    docs = await db.span_histograms.find(
+        {"period": {"$gte": since}}, {"_id": 0}
+    ).to_list(length=None)
+
+    merged: Dict[str, Dict] = {}
+    for doc in docs:
+        entry = merged.setdefault(doc["name"], {
+            "count": 0, "sum": 0.0, "errors": 0, "buckets": [0] * (len(SPAN_BUCKETS) + 1)
+        })
+        entry["count"] += doc.get("count", 0)
+        entry["sum"] += doc.get("sum", 0.0)
+        entry["errors"] += doc.get("errors", 0)
+        for key, count in doc.get("buckets", {}).items():
+            entry["buckets"][int(key[1:])] += count
+
+    result = {}
+    for name, entry in merged.items():
+        buckets = entry["buckets"]
+        result[name] = {
+            "count": entry["count"],
+            "errors": entry["errors"],
+            "mean_seconds": round(entry["sum"] / entry["count"], 3) if entry["count"] else None,
+            "p50_seconds": histogram_quantile(buckets, 0.5),
+            "p95_seconds": histogram_quantile(buckets, 0.95),
+            "p99_seconds": histogram_quantile(buckets, 0.99),
+            "buckets": [
+                {"le": bound, "count": count}
+                for bound, count in zip(SPAN_BUCKETS + ["+Inf"], buckets)
+            ]
+        }
+    return result
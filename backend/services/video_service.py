@@ -1,14 +1,104 @@
 import os
+import time
+import random
+import hashlib
 import logging
 import asyncio
 from pathlib import Path
 from typing import Optional, Dict, List
-import aiohttp
 import json
-from elevenlabs import ElevenLabs, VoiceSettings
+from elevenlabs import VoiceSettings
+
+from services.encode_profiles import DEFAULT_ENCODE_PROFILE, PREVIEW_ENCODE_PROFILE
+from services.render_estimator import broll_clip_count, MAX_BROLL_CLIPS
+from services.ffmpeg_service import FFmpegService
+from services.api_clients import api_clients, PEXELS_API_URL
+from services.rate_governor import rate_governor
+from services.resilience import call_upstream, RetryPolicy
+from services.progress import progress_broker
+from services.tracing import RenderTrace, span, record_span_histograms
+from services.telemetry import CACHE_REQUESTS, RENDER_STAGE_DURATION, DEGRADED_RENDERS
+from utils.sync import now_iso
 
 logger = logging.getLogger(__name__)
 
+PEXELS_SEARCH_URL = f"{PEXELS_API_URL}/videos/search"
+
+# Overall progress range (start %, end %) of each pipeline stage
+PROGRESS_STAGES = {
+    "tts": (0, 15),
+    "timestamps": (15, 25),
+    "broll_download": (25, 40),
+    "broll_normalize": (40, 60),
+    "concat": (60, 64),
+    "subtitles": (64, 65),
+    "encode": (65, 100)
+}
+PROGRESS_PERSIST_STEP = 5  # Write percent to MongoDB every N points (events are sent for every change)
+
+# Degraded modes: recent TTS audio and B-roll kept on disk to render with when
+# ElevenLabs or Pexels is down
+TTS_CACHE_MAX_FILES = int(os.getenv("TTS_CACHE_MAX_FILES", "200"))
+BROLL_LIBRARY_MAX_FILES = int(os.getenv("BROLL_LIBRARY_MAX_FILES", "60"))
+
+# Whisper gets a short leash: local alignment is a cheap fallback
+WHISPER_TIMEOUT_SECONDS = float(os.getenv("WHISPER_TIMEOUT_SECONDS", "30"))
+WHISPER_RETRY_POLICY = RetryPolicy(attempts=2, base_delay=0.5, max_delay=2.0)
+
+class BrollCache:
+    """
+    Shares Pexels searches and clip downloads between the jobs of one batch.
+    Jobs with the same search query trigger a single API call, and every
+    clip URL is downloaded once no matter how many videos use it.
+    """
+    
+    def __init__(self, key: str):
+        self.key = key  # Prefix for shared clip files (the batch id)
+        self.searches: Dict[str, asyncio.Future] = {}
+        self.downloads: Dict[str, asyncio.Future] = {}
+        self._clip_count = 0
+    
+    def next_clip_index(self) -> int:
+        """
+        Number of the next shared clip file. Never reused, unlike the size of
+        `downloads`, which shrinks when a failed or cancelled download is dropped.
+        """
+        self._clip_count += 1
+        return self._clip_count - 1
+    
+    async def _memoize(self, store: Dict[str, asyncio.Future], key: str, factory, cache: str):
+        CACHE_REQUESTS.inc(cache=cache, result="hit" if key in store else "miss")
+        while key in store:
+            future = store[key]
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # This job was cancelled
+                # The job doing the work was cancelled; take it over
+        future = asyncio.get_running_loop().create_future()
+        store[key] = future
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            store.pop(key, None)
+            future.cancel()
+            raise
+        except Exception as e:
+            # Let the next job retry instead of caching the failure
+            store.pop(key, None)
+            future.set_exception(e)
+            future.exception()  # Mark as retrieved so asyncio does not log it again
+            raise
+        future.set_result(result)
+        return result
+    
+    async def search(self, query: str, factory):
+        return await self._memoize(self.searches, query, factory, "pexels")
+    
+    async def download(self, url: str, factory):
+        return await self._memoize(self.downloads, url, factory, "clips")
+
 class VideoGenerationService:
     """
     Complete video generation pipeline:
@@ -24,8 +114,125 @@ class VideoGenerationService:
         self.output_dir = Path(os.getenv("VIDEO_OUTPUT_DIR", "/app/videos"))
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Initialize ElevenLabs client
-        self.eleven_client = ElevenLabs(api_key=self.elevenlabs_api_key)
+        # Last (stage, persisted percent) per video, to throttle progress writes
+        self._progress_state: Dict[str, tuple] = {}
+        
+        # Per-video stage timings: current (stage, start) and {stage: {seconds, bytes, units}}
+        self._stage_clock: Dict[str, tuple] = {}
+        self._stage_timings: Dict[str, Dict[str, Dict]] = {}
+        self.active_renders = 0
+        
+        # Per-video degraded modes used during the render
+        self._degraded: Dict[str, List[Dict]] = {}
+        self.tts_cache_dir = self.output_dir / "tts_cache"
+        self.broll_library_dir = self.output_dir / "broll_library"
+        self.tts_cache_dir.mkdir(exist_ok=True)
+        self.broll_library_dir.mkdir(exist_ok=True)
+    
+    def _report_progress(self, video_id: str, stage: str, fraction: float = 0.0):
+        """
+        Publish stage and overall percent to SSE subscribers.
+        MongoDB is updated on stage transitions and every PROGRESS_PERSIST_STEP points.
+        """
+        start, end = PROGRESS_STAGES[stage]
+        percent = round(start + (end - start) * fraction, 1)
+        
+        clock = self._stage_clock.get(video_id)
+        if clock is None or clock[0] != stage:
+            now = time.monotonic()
+            if clock:
+                self._stage_metric(video_id, clock[0], "seconds", now - clock[1])
+            self._stage_clock[video_id] = (stage, now)
+        
+        progress_broker.publish(video_id, {
+            "video_id": video_id,
+            "status": "processing",
+            "stage": stage,
+            "percent": percent
+        })
+        
+        last_stage, last_percent = self._progress_state.get(video_id, (None, -PROGRESS_PERSIST_STEP))
+        if stage != last_stage or percent - last_percent >= PROGRESS_PERSIST_STEP:
+            self._progress_state[video_id] = (stage, percent)
+            from database import db
+            asyncio.get_running_loop().create_task(db.videos.update_one(
+                {"id": video_id, "status": "processing"},
+                {"$set": {"stage": stage, "progress": percent, "updated_at": now_iso()}}
+            ))
+    
+    def _stage_metric(self, video_id: str, stage: str, key: str, value: float):
+        """Add to a stage's "seconds", "bytes" or "units" (API units) counter."""
+        metrics = self._stage_timings.setdefault(video_id, {}).setdefault(
+            stage, {"seconds": 0.0, "bytes": 0, "units": 0}
+        )
+        metrics[key] += value
+    
+    def _finish_stage_timings(self, video_id: str) -> Dict[str, Dict]:
+        """Close the running stage and return (and forget) the video's stage timings."""
+        clock = self._stage_clock.pop(video_id, None)
+        if clock:
+            self._stage_metric(video_id, clock[0], "seconds", time.monotonic() - clock[1])
+        timings = self._stage_timings.pop(video_id, {})
+        for stage, metrics in timings.items():
+            metrics["seconds"] = round(metrics["seconds"], 3)
+            RENDER_STAGE_DURATION.observe(metrics["seconds"], stage=stage)
+        return timings
+    
+    def _degrade(self, video_id: str, dependency: str, mode: str, reason: Exception):
+        """Record that the render fell back to `mode` because `dependency` failed."""
+        logger.warning(f"Video {video_id}: {dependency} unavailable ({str(reason)}), using {mode}")
+        DEGRADED_RENDERS.inc(dependency=dependency, mode=mode)
+        self._degraded.setdefault(video_id, []).append({
+            "dependency": dependency,
+            "mode": mode,
+            "reason": str(reason)[:300],
+            "at": now_iso()
+        })
+    
+    @staticmethod
+    def _prune(directory: Path, max_files: int):
+        """Keep the `max_files` most recently used files of a cache directory."""
+        files = sorted(directory.iterdir(), key=lambda p: p.stat().st_mtime, reverse=True)
+        for path in files[max_files:]:
+            path.unlink(missing_ok=True)
+    
+    def _report_finished(self, video_id: str, update: Dict):
+        """Publish the terminal event of a render."""
+        self._progress_state.pop(video_id, None)
+        event = {"video_id": video_id, "stage": None, "percent": 100.0}
+        event.update({k: v for k, v in update.items() if k in ("status", "error", "render_profile")})
+        progress_broker.publish(video_id, event)
+    
+    async def mark_cancelled(self, video_id: str, promote: bool = False):
+        """
+        Record a stopped render. A cancelled promotion falls back to its preview,
+        which is still intact and can be promoted again.
+        """
+        from database import db
+        
+        if promote:
+            update = {"status": "preview_ready", "render_profile": "preview"}
+        else:
+            update = {"status": "cancelled"}
+        update["updated_at"] = now_iso()
+        
+        await db.videos.update_one({"id": video_id}, {"$set": update})
+        self._report_finished(video_id, update)
+    
+    def _cleanup_scratch(self, video_id: str, render_profile: str, promote: bool):
+        """
+        Delete the partial files of a stopped render: the output, its temp clips,
+        concat list and subtitles, plus audio and B-roll unless they belong to
+        the preview being promoted. Shared batch clips are left for other jobs.
+        """
+        suffix = "preview" if render_profile == "preview" else "final"
+        patterns = [f"{video_id}_{suffix}*"]
+        if not promote:
+            patterns += [f"{video_id}_audio*", f"{video_id}_broll_*"]
+        
+        for pattern in patterns:
+            for path in self.output_dir.glob(pattern):
+                path.unlink(missing_ok=True)
     
     async def generate_video(
         self,
@@ -35,77 +242,191 @@ class VideoGenerationService:
         user_id: str,
         voice_settings: Optional[Dict] = None,
         background_music: Optional[str] = None,
-        b_roll_search: Optional[str] = None
+        b_roll_search: Optional[str] = None,
+        broll_cache: Optional[BrollCache] = None,
+        render_profile: str = "final",
+        promote: bool = False,
+        encode_profile: str = DEFAULT_ENCODE_PROFILE,
+        multi_output: bool = False
     ):
         """
         Complete video generation workflow.
+        `broll_cache` is shared by all jobs of a batch to deduplicate Pexels work.
+        `render_profile="preview"` renders a fast draft; `promote=True` renders the
+        final video from a finished preview, reusing its audio, timestamps and B-roll.
+        `encode_profile` names the x264 settings of a final render.
+        `multi_output` also renders the 720p dashboard rendition and a poster frame.
+        Stage durations, bytes and API units are stored as `stage_timings`, with the
+        job's `render_features`, to train the render estimator.
         """
+        started = time.monotonic()
+        concurrent_jobs = self.active_renders
+        self.active_renders += 1
+        trace = RenderTrace(video_id)
+        trace_token = trace.activate()
         try:
             from database import db
             
             # Update status to processing
             await db.videos.update_one(
                 {"id": video_id},
-                {"$set": {"status": "processing"}}
+                {"$set": {"status": "processing", "stage": None, "progress": 0.0, "updated_at": now_iso()}}
             )
             
-            logger.info(f"Starting video generation for {video_id}")
-            
-            # Step 1: Generate TTS with timestamps
-            audio_path, word_timestamps = await self.generate_tts_with_timestamps(
-                video_id, script_text, voice_settings
-            )
+            if render_profile == "preview":
+                encode_profile = PREVIEW_ENCODE_PROFILE
             
-            # Step 2: Get audio duration
-            duration = await self.get_audio_duration(audio_path)
+            logger.info(f"Starting video generation for {video_id} (profile: {render_profile}/{encode_profile}, promote: {promote})")
             
-            # Step 3: Search and download B-roll clips
             search_query = b_roll_search or topic or "spirituality faith peaceful"
-            broll_clips = await self.download_broll_clips(
-                video_id, search_query, duration
-            )
+            
+            if promote:
+                # Steps 1-3 were done by the preview render
+                audio_path, word_timestamps, duration, broll_clips = await self._load_preview_assets(video_id)
+                if not broll_clips:
+                    self._report_progress(video_id, "broll_download")
+                    broll_clips = await self.download_broll_clips(
+                        video_id, search_query, duration, broll_cache
+                    )
+            else:
+                # Step 1: Generate TTS with timestamps
+                self._report_progress(video_id, "tts")
+                audio_path, word_timestamps = await self.generate_tts_with_timestamps(
+                    video_id, script_text, voice_settings
+                )
+                
+                # Step 2: Get audio duration
+                duration = await self.get_audio_duration(audio_path)
+                self._stage_metric(video_id, "timestamps", "units", round(duration, 2))  # Audio seconds transcribed
+                
+                # Step 3: Search and download B-roll clips
+                self._report_progress(video_id, "broll_download")
+                broll_clips = await self.download_broll_clips(
+                    video_id, search_query, duration, broll_cache
+                )
             
             # Step 4: Assemble video with FFmpeg
-            video_path = await self.assemble_video(
+            video_path, extra_outputs = await self.assemble_video(
                 video_id=video_id,
                 audio_path=audio_path,
                 broll_clips=broll_clips,
                 word_timestamps=word_timestamps,
                 script_text=script_text,
                 background_music=background_music,
-                duration=duration
+                duration=duration,
+                render_profile=render_profile,
+                encode_profile=encode_profile,
+                multi_output=multi_output and render_profile != "preview",
+                on_progress=lambda stage, fraction: self._report_progress(video_id, stage, fraction)
             )
             
+            output_bytes = video_path.stat().st_size + sum(p.stat().st_size for p in extra_outputs.values())
+            self._stage_metric(video_id, "encode", "bytes", output_bytes)
+            
             # Update video record
             import datetime
-            await db.videos.update_one(
-                {"id": video_id},
-                {
-                    "$set": {
-                        "status": "completed",
-                        "video_url": str(video_path),
-                        "audio_url": str(audio_path),
-                        "duration": duration,
-                        "completed_at": datetime.datetime.utcnow().isoformat()
-                    }
+            if render_profile == "preview":
+                # Keep everything the final render needs so it can skip TTS, Whisper and Pexels
+                update = {
+                    "status": "preview_ready",
+                    "preview_url": str(video_path),
+                    "word_timestamps": word_timestamps,
+                    "broll_clips": [str(p) for p in broll_clips]
                 }
-            )
+            else:
+                update = {
+                    "status": "completed",
+                    "video_url": str(video_path),
+                    "completed_at": datetime.datetime.utcnow().isoformat()
+                }
+                if extra_outputs:
+                    poster = extra_outputs.pop("poster", None)
+                    update["renditions"] = {name: str(path) for name, path in extra_outputs.items()}
+                    update["poster_url"] = str(poster) if poster else None
+            update.update({
+                "audio_url": str(audio_path),
+                "duration": duration,
+                "render_profile": render_profile,
+                "encode_profile": encode_profile,
+                "stage": None,
+                "progress": 100.0,
+                "updated_at": now_iso(),
+                "stage_timings": self._finish_stage_timings(video_id),
+                "spans": trace.to_list(),
+                "degraded": self._degraded.pop(video_id, []),
+                "render_seconds": round(time.monotonic() - started, 3),
+                "render_features": {
+                    "script_chars": len(script_text),
+                    "clip_count": len(broll_clips),
+                    "render_profile": render_profile,
+                    "encode_profile": encode_profile,
+                    "multi_output": multi_output and render_profile != "preview",
+                    "promote": promote,
+                    "concurrent_jobs": concurrent_jobs
+                }
+            })
+            
+            await db.videos.update_one({"id": video_id}, {"$set": update})
+            self._report_finished(video_id, update)
             
-            logger.info(f"Video generation completed for {video_id}")
+            logger.info(f"Video generation completed for {video_id} (profile: {render_profile})")
+        
+        except asyncio.CancelledError:
+            # Raised at whatever await the job was on; running FFmpeg has been killed by now
+            logger.info(f"Video generation cancelled for {video_id}")
+            self._finish_stage_timings(video_id)
+            self._degraded.pop(video_id, None)
+            self._cleanup_scratch(video_id, render_profile, promote)
+            await self.mark_cancelled(video_id, promote)
+            raise
         
         except Exception as e:
             logger.error(f"Error generating video {video_id}: {str(e)}")
             
             from database import db
-            await db.videos.update_one(
-                {"id": video_id},
-                {
-                    "$set": {
-                        "status": "failed",
-                        "error": str(e)
-                    }
-                }
-            )
+            update = {
+                "status": "failed",
+                "error": str(e),
+                "updated_at": now_iso(),
+                "stage_timings": self._finish_stage_timings(video_id),
+                "spans": trace.to_list(),
+                "degraded": self._degraded.pop(video_id, [])
+            }
+            await db.videos.update_one({"id": video_id}, {"$set": update})
+            self._report_finished(video_id, update)
+        
+        finally:
+            self.active_renders -= 1
+            trace_token.var.reset(trace_token)
+            if trace.spans:
+                await self._record_histograms(trace)
+    
+    async def _record_histograms(self, trace: RenderTrace):
+        """Add the render's spans to the latency histograms (best effort)."""
+        try:
+            from database import db
+            await record_span_histograms(db, trace.to_list())
+        except Exception as e:
+            logger.error(f"Error recording span histograms for {trace.video_id}: {str(e)}")
+    
+    async def _load_preview_assets(self, video_id: str) -> tuple:
+        """
+        Load audio, word timestamps, duration and B-roll of a finished preview.
+        """
+        from database import db
+        
+        video = await db.videos.find_one({"id": video_id}, {"_id": 0})
+        if not video or not video.get("audio_url"):
+            raise Exception("Preview assets not found")
+        
+        audio_path = Path(video["audio_url"])
+        if not audio_path.exists():
+            raise Exception(f"Preview audio missing: {audio_path}")
+        
+        # Clips may have been cleaned up since the preview; drop the missing ones
+        broll_clips = [Path(p) for p in video.get("broll_clips", []) if Path(p).exists()]
+        
+        return audio_path, video.get("word_timestamps", []), video["duration"], broll_clips
     
     async def generate_tts_with_timestamps(
         self,
@@ -117,8 +438,6 @@ class VideoGenerationService:
         Generate TTS audio using ElevenLabs with word-level timestamps.
         Uses API v3 for better stability.
         """
-        import subprocess
-        
         try:
             # Extract speed from voice_settings (API v3 supports it)
             speed = voice_settings.get("speed", 1.0) if voice_settings else 1.0
@@ -132,14 +451,19 @@ class VideoGenerationService:
             
             # Generate audio with API v3 (supports speed parameter)
             logger.info(f"Generating TTS audio with ElevenLabs API v3 (speed: {speed}x)...")
-            response = self.eleven_client.text_to_speech.convert(
-                text=text,
-                voice_id=self.elevenlabs_voice_id,
-                model_id="eleven_turbo_v2_5",  # Latest stable model
-                voice_settings=settings,
-                output_format="mp3_44100_128",
-                seed=42  # Fixed seed for consistent first variation
-            )
+            cache_path = self.tts_cache_dir / f"{self._tts_cache_key(text, settings)}.mp3"
+            try:
+                audio_data = await call_upstream("elevenlabs", lambda: self._request_tts(text, settings))
+                cache_path.write_bytes(audio_data)
+                self._prune(self.tts_cache_dir, TTS_CACHE_MAX_FILES)
+                self._stage_metric(video_id, "tts", "units", len(text))  # ElevenLabs bills characters
+            except Exception as e:
+                # Same text and voice rendered before: reuse that audio
+                if not cache_path.exists():
+                    raise
+                audio_data = cache_path.read_bytes()
+                cache_path.touch()
+                self._degrade(video_id, "elevenlabs", "cached_tts", e)
             
             # Note: Speed is applied via model capabilities in v3
             # If speed adjustment needed, we can post-process with FFmpeg
@@ -147,10 +471,7 @@ class VideoGenerationService:
             # Save audio as MP3 first
             audio_path_mp3 = self.output_dir / f"{video_id}_audio_temp.mp3"
             audio_path = self.output_dir / f"{video_id}_audio.wav"
-            
-            audio_data = b""
-            for chunk in response:
-                audio_data += chunk
+            self._stage_metric(video_id, "tts", "bytes", len(audio_data))
             
             # Write MP3
             with open(audio_path_mp3, 'wb') as f:
@@ -184,9 +505,13 @@ class VideoGenerationService:
                     str(audio_path)
                 ]
             
-            result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                logger.error(f"FFmpeg conversion failed: {result.stderr}")
+            with span("transcode", speed=speed) as s:
+                s.bytes_in = len(audio_data)
+                returncode, stderr = await FFmpegService.run_ffmpeg(ffmpeg_cmd)
+                if returncode == 0:
+                    s.bytes_out = audio_path.stat().st_size
+            if returncode != 0:
+                logger.error(f"FFmpeg conversion failed: {stderr}")
                 # If conversion fails, use MP3 directly
                 audio_path = audio_path_mp3
             else:
@@ -195,8 +520,9 @@ class VideoGenerationService:
                 logger.info(f"Converted to WAV with speed {speed}x: {audio_path}")
             
             # Use OpenAI Whisper for accurate word-level timestamps
+            self._report_progress(video_id, "timestamps")
             logger.info("Generating word timestamps with OpenAI Whisper...")
-            word_timestamps = await self._get_whisper_timestamps(audio_path, text)
+            word_timestamps = await self._get_whisper_timestamps(video_id, audio_path, text)
             
             return audio_path, word_timestamps
         
@@ -204,11 +530,8 @@ class VideoGenerationService:
             logger.error(f"Error generating TTS: {str(e)}")
             raise
     
-    def _get_audio_duration(self, audio_path: Path) -> float:
+    async def _get_audio_duration(self, audio_path: Path) -> float:
         """Get audio duration using FFprobe"""
-        import subprocess
-        import json
-        
         cmd = [
             'ffprobe',
             '-v', 'quiet',
@@ -217,78 +540,112 @@ class VideoGenerationService:
             str(audio_path)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
+        returncode, stdout = await FFmpegService.run_probe(cmd)
+        if returncode == 0:
+            data = json.loads(stdout)
             return float(data['format']['duration'])
         return 30.0  # Default
 
     
-    async def _get_whisper_timestamps(self, audio_path: Path, original_text: str) -> List[Dict]:
+    def _tts_cache_key(self, text: str, settings: VoiceSettings) -> str:
+        """Audio depends on the text, voice and voice settings (the seed is fixed)."""
+        key = json.dumps([text, self.elevenlabs_voice_id, settings.model_dump()], sort_keys=True, default=str)
+        return hashlib.sha256(key.encode()).hexdigest()[:32]
+    
+    async def _request_tts(self, text: str, settings: VoiceSettings) -> bytes:
+        """One ElevenLabs text-to-speech call; returns the MP3 bytes."""
+        async with rate_governor.limit("elevenlabs", characters=len(text)):
+            with span("tts_request", characters=len(text)) as s:
+                chunks = []
+                async for chunk in api_clients.elevenlabs.text_to_speech.convert(
+                    text=text,
+                    voice_id=self.elevenlabs_voice_id,
+                    model_id="eleven_turbo_v2_5",  # Latest stable model
+                    voice_settings=settings,
+                    output_format="mp3_44100_128",
+                    seed=42  # Fixed seed for consistent first variation
+                ):
+                    chunks.append(chunk)
+                audio_data = b"".join(chunks)
+                s.bytes_out = len(text.encode())
+                s.bytes_in = len(audio_data)
+                return audio_data
+    
+    async def _request_transcription(self, audio_path: Path):
+        """One Whisper call with word timestamps, cut off after WHISPER_TIMEOUT_SECONDS."""
+        async with rate_governor.limit("openai"):
+            with span("whisper") as s:
+                # The SDK reads the file off the loop
+                s.bytes_out = audio_path.stat().st_size
+                return await asyncio.wait_for(
+                    api_clients.openai.audio.transcriptions.create(
+                        model="whisper-1",
+                        file=audio_path,
+                        response_format="verbose_json",
+                        timestamp_granularities=["word"]
+                    ),
+                    WHISPER_TIMEOUT_SECONDS
+                )
+    
+    async def _get_whisper_timestamps(self, video_id: str, audio_path: Path, original_text: str) -> List[Dict]:
         """
         Use OpenAI Whisper API to get accurate word-level timestamps from audio.
+        Falls back to local alignment (recorded as a degraded mode) when Whisper
+        fails, times out or its circuit is open.
         """
         try:
-            from openai import OpenAI
-            
-            openai_api_key = os.getenv("OPENAI_API_KEY")
-            if not openai_api_key:
-                logger.warning("OpenAI API key not found, falling back to simple timing")
-                return self._fallback_timestamps(audio_path, original_text)
-            
-            client = OpenAI(api_key=openai_api_key)
+            if not os.getenv("OPENAI_API_KEY"):
+                raise Exception("OpenAI API key not found")
             
-            # Open audio file
-            with open(audio_path, "rb") as audio_file:
-                # Call Whisper API with word-level timestamps
-                logger.info("Calling OpenAI Whisper API for word timestamps...")
-                transcription = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="verbose_json",
-                    timestamp_granularities=["word"]
-                )
-            
-            # Extract word timestamps
-            word_timestamps = []
-            
-            if hasattr(transcription, 'words') and transcription.words:
-                for word_data in transcription.words:
-                    word_timestamps.append({
-                        'character': word_data.word.strip(),
-                        'start_time_ms': int(word_data.start * 1000),
-                        'end_time_ms': int(word_data.end * 1000)
-                    })
-                
-                logger.info(f"Whisper extracted {len(word_timestamps)} word timestamps")
-            else:
-                logger.warning("Whisper didn't return word timestamps, using fallback")
-                word_timestamps = self._fallback_timestamps(audio_path, original_text)
-            
-            return word_timestamps
+            logger.info("Calling OpenAI Whisper API for word timestamps...")
+            transcription = await call_upstream(
+                "openai", lambda: self._request_transcription(audio_path), WHISPER_RETRY_POLICY
+            )
+            if not getattr(transcription, 'words', None):
+                raise Exception("Whisper returned no word timestamps")
         
         except Exception as e:
-            logger.error(f"Error getting Whisper timestamps: {str(e)}")
-            # Fallback to simple timing
-            return self._fallback_timestamps(audio_path, original_text)
+            self._degrade(video_id, "openai_whisper", "local_alignment", e)
+            return await self._fallback_timestamps(audio_path, original_text)
+        
+        # Extract word timestamps
+        word_timestamps = []
+        for word_data in transcription.words:
+            word_timestamps.append({
+                'character': word_data.word.strip(),
+                'start_time_ms': int(word_data.start * 1000),
+                'end_time_ms': int(word_data.end * 1000)
+            })
+        
+        logger.info(f"Whisper extracted {len(word_timestamps)} word timestamps")
+        return word_timestamps
     
-    def _fallback_timestamps(self, audio_path: Path, text: str) -> List[Dict]:
+    async def _fallback_timestamps(self, audio_path: Path, text: str) -> List[Dict]:
         """
-        Fallback method: simple time division if Whisper fails.
+        Local alignment when Whisper is unavailable: the audio is split between
+        words in proportion to their length, with extra time after punctuation
+        where the voice pauses.
         """
         words = text.split()
-        audio_duration = self._get_audio_duration(audio_path)
-        word_duration = audio_duration / len(words) if words else 1.0
+        audio_duration = await self._get_audio_duration(audio_path)
+        weights = [
+            len(word) + (4 if word[-1] in ".!?" else 2 if word[-1] in ",;:" else 1)
+            for word in words
+        ]
+        seconds_per_weight = audio_duration / sum(weights) if words else 1.0
         
         word_timestamps = []
-        for i, word in enumerate(words):
-            start_time_ms = int(i * word_duration * 1000)
-            end_time_ms = int((i + 1) * word_duration * 1000)
+        position = 0.0
+        for word, weight in zip(words, weights):
+            start_time_ms = int(position * seconds_per_weight * 1000)
+            # The voice ends on the word itself, not the pause after it
+            end_time_ms = int((position + len(word) + 1) * seconds_per_weight * 1000)
             word_timestamps.append({
                 'character': word,
                 'start_time_ms': start_time_ms,
                 'end_time_ms': end_time_ms
             })
+            position += weight
         
         return word_timestamps
 
@@ -297,9 +654,6 @@ class VideoGenerationService:
         """
         Get audio duration using FFmpeg.
         """
-        import subprocess
-        import json
-        
         cmd = [
             'ffprobe',
             '-v', 'error',
@@ -308,8 +662,8 @@ class VideoGenerationService:
             str(audio_path)
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        data = json.loads(result.stdout)
+        _, stdout = await FFmpegService.run_probe(cmd)
+        data = json.loads(stdout)
         duration = float(data.get('format', {}).get('duration', 30.0))
         
         return duration
@@ -318,120 +672,184 @@ class VideoGenerationService:
         self,
         video_id: str,
         search_query: str,
-        total_duration: float
+        total_duration: float,
+        broll_cache: Optional[BrollCache] = None
     ) -> List[Path]:
         """
         Search and download vertical B-roll clips from Pexels.
         Clips should be 2-3 seconds each to match total duration.
         QUALITY FILTER: Only HD, minimum 5s duration, curated content.
+        When Pexels is down, clips kept from earlier renders are used instead
+        (recorded as a degraded mode) rather than rendering a black video.
         """
+        # Calculate number of clips needed (2.5s avg per clip); the render estimator uses the same count
+        num_clips = broll_clip_count(total_duration)
+        
         try:
-            # Calculate number of clips needed (2.5s avg per clip)
-            num_clips = int(total_duration / 2.5) + 2  # Extra clips for variety
-            
             # Enhance search query for faith content
             if not search_query or search_query == "spirituality faith peaceful":
                 search_query = "faith prayer spiritual light hope peace nature"
             
-            # Search Pexels for vertical videos with QUALITY FILTERS
-            headers = {"Authorization": self.pexels_api_key}
-            params = {
-                "query": search_query,
-                "orientation": "portrait",  # 9:16 vertical only
-                "size": "large",  # Large/HD only
-                "per_page": min(num_clips * 2, 30),  # Request more for filtering
-                "min_duration": 5,  # Minimum 5 seconds (quality indicator)
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    "https://api.pexels.com/videos/search",
-                    headers=headers,
-                    params=params
-                ) as response:
-                    data = await response.json()
-            
-            videos = data.get("videos", [])
-            
-            # QUALITY FILTER: Sort by quality indicators
-            quality_videos = []
-            for video in videos:
-                # Filter criteria:
-                # 1. Has HD files
-                # 2. Duration > 5 seconds
-                # 3. Has proper metadata
-                duration = video.get("duration", 0)
-                video_files = video.get("video_files", [])
-                
-                if duration >= 5 and len(video_files) > 0:
-                    quality_videos.append(video)
-            
-            # Sort by duration (longer = often better quality)
-            quality_videos.sort(key=lambda v: v.get("duration", 0), reverse=True)
+            if broll_cache:
+                if search_query not in broll_cache.searches:
+                    self._stage_metric(video_id, "broll_download", "units", 1)  # Pexels requests
+                # Shared searches always fetch the maximum page so every job can use them
+                clip_links = await broll_cache.search(
+                    search_query, lambda: self.search_broll_links(search_query, MAX_BROLL_CLIPS)
+                )
+            else:
+                self._stage_metric(video_id, "broll_download", "units", 1)
+                clip_links = await self.search_broll_links(search_query, num_clips)
             
             # Download clips
             downloaded_clips = []
             
-            for idx, video in enumerate(quality_videos[:num_clips]):
-                video_files = video.get("video_files", [])
-                
-                # Find BEST quality vertical HD file
-                hd_file = None
-                best_quality = 0
-                
-                for vf in video_files:
-                    width = vf.get("width", 0)
-                    height = vf.get("height", 0)
-                    quality = vf.get("quality", "")
-                    
-                    # Must be vertical (height > width)
-                    if height > width:
-                        # Prefer HD/FHD
-                        quality_score = 0
-                        if quality == "hd":
-                            quality_score = 2
-                        elif quality == "sd":
-                            quality_score = 1
-                        
-                        # Also consider resolution
-                        quality_score += (width * height) / 1000000
-                        
-                        if quality_score > best_quality:
-                            best_quality = quality_score
-                            hd_file = vf
-                
-                if hd_file:
-                    clip_path = await self.download_video_file(
-                        video_id, idx, hd_file.get("link")
+            clip_links = clip_links[:num_clips]
+            for idx, link in enumerate(clip_links):
+                self._report_progress(video_id, "broll_download", idx / len(clip_links))
+                if broll_cache:
+                    # Shared clips are numbered in download order across the whole batch
+                    clip_path = await broll_cache.download(
+                        link,
+                        lambda link=link: self.download_video_file(
+                            broll_cache.key, broll_cache.next_clip_index(), link
+                        )
                     )
-                    if clip_path:
-                        downloaded_clips.append(clip_path)
+                else:
+                    clip_path = await self.download_video_file(video_id, idx, link)
+                if clip_path:
+                    downloaded_clips.append(clip_path)
             
+            self._stage_metric(
+                video_id, "broll_download", "bytes", sum(p.stat().st_size for p in downloaded_clips)
+            )
+            if not downloaded_clips:
+                raise Exception(f"None of {len(clip_links)} B-roll clips could be downloaded")
             logger.info(f"Downloaded {len(downloaded_clips)} HIGH-QUALITY B-roll clips")
             return downloaded_clips
         
         except Exception as e:
             logger.error(f"Error downloading B-roll: {str(e)}")
-            return []
+            clips = self._library_clips(num_clips)
+            self._degrade(video_id, "pexels", "cached_clips" if clips else "black_background", e)
+            return clips
+    
+    def _library_clips(self, count: int) -> List[Path]:
+        """Up to `count` random clips kept from earlier downloads."""
+        clips = list(self.broll_library_dir.glob("*.mp4"))
+        return random.sample(clips, min(count, len(clips)))
+    
+    def _add_to_library(self, path: Path, url: str):
+        """Keep a hard link to a downloaded clip (no copy) for degraded renders."""
+        target = self.broll_library_dir / f"{hashlib.sha1(url.encode()).hexdigest()[:16]}.mp4"
+        try:
+            if not target.exists():
+                os.link(path, target)
+            target.touch()
+            self._prune(self.broll_library_dir, BROLL_LIBRARY_MAX_FILES)
+        except OSError as e:
+            logger.warning(f"Could not add {path.name} to the B-roll library: {str(e)}")
+    
+    async def search_broll_links(self, search_query: str, num_clips: int) -> List[str]:
+        """
+        Search Pexels and return the best vertical HD file link of each result,
+        best candidates first.
+        """
+        # Search Pexels for vertical videos with QUALITY FILTERS
+        headers = {"Authorization": self.pexels_api_key}
+        params = {
+            "query": search_query,
+            "orientation": "portrait",  # 9:16 vertical only
+            "size": "large",  # Large/HD only
+            "per_page": min(num_clips * 2, 30),  # Request more for filtering
+            "min_duration": 5,  # Minimum 5 seconds (quality indicator)
+        }
+        
+        async def request():
+            async with rate_governor.limit("pexels"):
+                with span("pexels_search", query=search_query) as s:
+                    response = await api_clients.pexels.get(PEXELS_SEARCH_URL, headers=headers, params=params)
+                    s.bytes_in = len(response.content)
+                    response.raise_for_status()
+                    return response.json()
+        
+        data = await call_upstream("pexels", request)
+        videos = data.get("videos", [])
+        
+        # QUALITY FILTER: Sort by quality indicators
+        quality_videos = []
+        for video in videos:
+            # Filter criteria:
+            # 1. Has HD files
+            # 2. Duration > 5 seconds
+            # 3. Has proper metadata
+            duration = video.get("duration", 0)
+            video_files = video.get("video_files", [])
+            
+            if duration >= 5 and len(video_files) > 0:
+                quality_videos.append(video)
+        
+        # Sort by duration (longer = often better quality)
+        quality_videos.sort(key=lambda v: v.get("duration", 0), reverse=True)
+        
+        links = []
+        for video in quality_videos[:num_clips]:
+            video_files = video.get("video_files", [])
+            
+            # Find BEST quality vertical HD file
+            hd_file = None
+            best_quality = 0
+            
+            for vf in video_files:
+                width = vf.get("width", 0)
+                height = vf.get("height", 0)
+                quality = vf.get("quality", "")
+                
+                # Must be vertical (height > width)
+                if height > width:
+                    # Prefer HD/FHD
+                    quality_score = 0
+                    if quality == "hd":
+                        quality_score = 2
+                    elif quality == "sd":
+                        quality_score = 1
+                    
+                    # Also consider resolution
+                    quality_score += (width * height) / 1000000
+                    
+                    if quality_score > best_quality:
+                        best_quality = quality_score
+                        hd_file = vf
+            
+            if hd_file and hd_file.get("link"):
+                links.append(hd_file["link"])
+        
+        return links
     
     async def download_video_file(self, video_id: str, idx: int, url: str) -> Optional[Path]:
         """
-        Download a single video file.
+        Download a single video file (retried under the Pexels CDN circuit breaker).
         """
+        output_path = self.output_dir / f"{video_id}_broll_{idx}.mp4"
+        
+        async def request():
+            with span("download", index=idx) as s:
+                async with api_clients.pexels_files.stream("GET", url) as response:
+                    response.raise_for_status()
+                    with open(output_path, 'wb') as f:
+                        async for chunk in response.aiter_bytes():
+                            f.write(chunk)
+                    s.bytes_in = response.num_bytes_downloaded
+        
         try:
-            output_path = self.output_dir / f"{video_id}_broll_{idx}.mp4"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        with open(output_path, 'wb') as f:
-                            f.write(await response.read())
-                        return output_path
-            
-            return None
+            await call_upstream("pexels_files", request)
         except Exception as e:
             logger.error(f"Error downloading video file: {str(e)}")
+            output_path.unlink(missing_ok=True)
             return None
+        
+        self._add_to_library(output_path, url)
+        return output_path
     
     async def assemble_video(
         self,
@@ -441,30 +859,38 @@ class VideoGenerationService:
         word_timestamps: List,
         script_text: str,
         background_music: Optional[str],
-        duration: float
-    ) -> Path:
+        duration: float,
+        render_profile: str = "final",
+        encode_profile: str = DEFAULT_ENCODE_PROFILE,
+        multi_output: bool = False,
+        on_progress=None
+    ) -> tuple:
         """
         Assemble final video using FFmpeg with:
         - B-roll clips (2-3s cuts)
         - Karaoke captions (white → yellow)
         - Audio mixing (TTS + background music)
         - Safe zones (avoid YouTube UI)
+        Returns the output path and any extra renditions/poster by name.
         """
-        from services.ffmpeg_service import FFmpegService
-        
         ffmpeg_service = FFmpegService()
         
-        output_path = self.output_dir / f"{video_id}_final.mp4"
+        # Previews are stored next to, never over, the final output
+        suffix = "preview" if render_profile == "preview" else "final"
+        output_path = self.output_dir / f"{video_id}_{suffix}.mp4"
         
         # Assemble video
-        await ffmpeg_service.create_shorts_video(
+        extra_outputs = await ffmpeg_service.create_shorts_video(
             output_path=output_path,
             audio_path=audio_path,
             broll_clips=broll_clips,
             word_timestamps=word_timestamps,
             script_text=script_text,
             background_music=background_music,
-            duration=duration
+            duration=duration,
+            profile=encode_profile,
+            multi_output=multi_output,
+            on_progress=on_progress
         )
         
-        return output_path
\ No newline at end of file
+        return output_path, extra_outputs
\ No newline at end of file
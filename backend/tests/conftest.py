@@ -0,0 +1,242 @@
+"""
+Shared test fixtures.
+`fake_db` is an in-memory stand-in for the Motor database with the subset of
+queries and update operators the services use, so MongoDB-backed services
+can be tested without a server.
+"""
+import copy
+import os
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+_MISSING = object()
+
+
+class DuplicateKeyError(Exception):
+    """Raised like pymongo's when an insert or upsert violates a unique index."""
+
+
+class FakeResult:
+    def __init__(self, matched_count=0, modified_count=0, upserted_id=None, deleted_count=0):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+        self.deleted_count = deleted_count
+
+
+def _get(doc, path):
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, list) and part.isdigit():
+            value = value[int(part)] if int(part) < len(value) else _MISSING
+        elif isinstance(value, dict):
+            value = value.get(part, _MISSING)
+        else:
+            return _MISSING
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+def _matches_condition(value, condition):
+    if not isinstance(condition, dict) or not any(key.startswith("$") for key in condition):
+        return value == condition
+    for op, arg in condition.items():
+        present = value is not _MISSING
+        if op == "$exists":
+            ok = present == bool(arg)
+        elif op == "$ne":
+            ok = (value if present else None) != arg
+        elif op == "$in":
+            ok = (value if present else None) in arg
+        elif op == "$nin":
+            ok = (value if present else None) not in arg
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            if not present or value is None:
+                return False
+            ok = {
+                "$gt": value > arg, "$gte": value >= arg, "$lt": value < arg, "$lte": value <= arg
+            }[op]
+        else:
+            raise NotImplementedError(f"FakeCollection does not support {op}")
+        if not ok:
+            return False
+    return True
+
+
+def matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif not _matches_condition(_get(doc, key), condition):
+            return False
+    return True
+
+
+def _project(doc, projection):
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    included = [key for key, flag in projection.items() if flag and key != "_id"]
+    if included:
+        return {key: doc[key] for key in included if key in doc}
+    return {key: value for key, value in doc.items() if projection.get(key, 1)}
+
+
+def _apply_update(doc, update, inserting):
+    for op, fields in update.items():
+        if op == "$setOnInsert":
+            if inserting:
+                doc.update(copy.deepcopy(fields))
+        elif op == "$set":
+            doc.update(copy.deepcopy(fields))
+        elif op == "$unset":
+            for key in fields:
+                doc.pop(key, None)
+        elif op == "$inc":
+            for key, amount in fields.items():
+                doc[key] = doc.get(key, 0) + amount
+        elif op == "$max":
+            for key, value in fields.items():
+                doc[key] = max(doc.get(key, value), value)
+        elif op == "$push":
+            for key, value in fields.items():
+                items = doc.setdefault(key, [])
+                if isinstance(value, dict) and "$each" in value:
+                    items.extend(copy.deepcopy(value["$each"]))
+                    if "$slice" in value:
+                        doc[key] = items[value["$slice"]:] if value["$slice"] < 0 else items[:value["$slice"]]
+                else:
+                    items.append(copy.deepcopy(value))
+        elif op == "$pop":
+            for key, side in fields.items():
+                if doc.get(key):
+                    doc[key].pop(0 if side == -1 else -1)
+        else:
+            raise NotImplementedError(f"FakeCollection does not support {op}")
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction=1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self.docs.sort(key=lambda doc: _get(doc, field), reverse=order < 0)
+        return self
+
+    def skip(self, count):
+        self.docs = self.docs[count:]
+        return self
+
+    def limit(self, count):
+        if count:
+            self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs[:length] if length else list(self.docs)
+
+
+class FakeCollection:
+    """Just enough of a Motor collection for the services under test."""
+
+    def __init__(self):
+        self.docs = []
+        self.unique = []  # Field tuples with a unique index
+
+    async def create_index(self, keys, unique=False, **kwargs):
+        if unique:
+            fields = (keys,) if isinstance(keys, str) else tuple(field for field, _ in keys)
+            self.unique.append(fields)
+
+    def _check_unique(self, new_doc, ignore=None):
+        for fields in self.unique:
+            key = tuple(new_doc.get(field) for field in fields)
+            for doc in self.docs:
+                if doc is not ignore and tuple(doc.get(field) for field in fields) == key:
+                    raise DuplicateKeyError(f"duplicate key {key}")
+
+    def _equality_fields(self, query):
+        return {
+            key: value for key, value in query.items()
+            if not key.startswith("$") and not isinstance(value, dict)
+        }
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([_project(doc, projection) for doc in self.docs if matches(doc, query or {})])
+
+    async def find_one(self, query=None, projection=None):
+        for doc in self.docs:
+            if matches(doc, query or {}):
+                return _project(doc, projection)
+        return None
+
+    async def insert_one(self, doc):
+        self._check_unique(doc)
+        self.docs.append(copy.deepcopy(doc))
+
+    async def insert_many(self, docs):
+        for doc in docs:
+            await self.insert_one(doc)
+
+    async def update_one(self, query, update, upsert=False):
+        for doc in self.docs:
+            if matches(doc, query):
+                before = copy.deepcopy(doc)
+                _apply_update(doc, update, inserting=False)
+                return FakeResult(matched_count=1, modified_count=int(doc != before))
+        if not upsert:
+            return FakeResult()
+        doc = self._equality_fields(query)
+        _apply_update(doc, update, inserting=True)
+        self._check_unique(doc)
+        self.docs.append(doc)
+        return FakeResult(upserted_id=len(self.docs))
+
+    async def find_one_and_update(self, query, update, projection=None, upsert=False):
+        """Returns the document as it was before the update (pymongo's default)."""
+        for doc in self.docs:
+            if matches(doc, query):
+                before = _project(doc, projection)
+                _apply_update(doc, update, inserting=False)
+                return before
+        if upsert:
+            await self.update_one(query, update, upsert=True)
+        return None
+
+    async def delete_one(self, query):
+        for doc in self.docs:
+            if matches(doc, query):
+                self.docs.remove(doc)
+                return FakeResult(deleted_count=1)
+        return FakeResult()
+
+
+class FakeDB:
+    """Collections are created on first access, like Motor's."""
+
+    def __init__(self):
+        self.collections = {}
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+@pytest.fixture
+def fake_db():
+    return FakeDB()
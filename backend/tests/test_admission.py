@@ -0,0 +1,65 @@
+"""
+Test for render admission control.
+Verifies that:
+- An idle queue admits a large batch (judged by when its first job starts)
+- A request for more jobs than the queue can ever hold is rejected for good
+- Queued batch jobs do not count against interactive renders
+"""
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.admission import AdmissionController
+from services.render_queue import RenderQueue, RenderJob
+
+
+async def noop(**kwargs):
+    pass
+
+
+def make_controller(scratch_dir):
+    render_queue = RenderQueue(noop, concurrency=2, batch_reserved=0, max_per_user=2)
+    render_queue.avg_job_seconds = 120
+    controller = AdmissionController(render_queue, scratch_dir)
+    controller.min_free_disk_mb = 0
+    controller.job_disk_mb = 0
+    controller.max_queue_depth = 50
+    controller.max_wait_seconds = 1800
+    return controller
+
+
+def queue_jobs(controller, kind, count):
+    for i in range(count):
+        controller.render_queue.queues[kind].push(
+            RenderJob(video_id=f"{kind}{i}", user_id="alice", kind=kind, kwargs={})
+        )
+
+
+class TestAdmission:
+    """Test admission of multi-job batches"""
+
+    def test_idle_queue_admits_large_batch(self, tmp_path):
+        controller = make_controller(tmp_path)
+        assert controller.check("batch", 20) is None
+        assert controller.check("batch", 50) is None
+
+    def test_oversized_batch_is_rejected_without_retry(self, tmp_path):
+        controller = make_controller(tmp_path)
+        rejection = controller.check("batch", 60)
+        assert rejection["reason"] == "too_large"
+        assert rejection["retry_after"] is None
+
+    def test_backlog_makes_batch_wait(self, tmp_path):
+        controller = make_controller(tmp_path)
+        queue_jobs(controller, "batch", 40)
+
+        rejection = controller.check("batch", 20)
+        assert rejection["reason"] == "queue_full"
+        assert rejection["retry_after"] == 600  # 10 excess jobs on 2 slots at 120s
+
+    def test_queued_batches_do_not_block_single_renders(self, tmp_path):
+        controller = make_controller(tmp_path)
+        queue_jobs(controller, "batch", 50)
+        assert controller.check("single") is None
@@ -0,0 +1,86 @@
+"""
+Test for the pooled LLM completion cache.
+Verifies that:
+- A miss asks for the completion plus a full pool in one request
+- Pooled completions are handed out once each, oldest first
+- A pool running low is refilled in the background
+"""
+import asyncio
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.completion_cache import CompletionCache, completion_key
+
+
+def make_cache(db, pool_size=3):
+    cache = CompletionCache(pool_size=pool_size)
+    cache._db = lambda: db
+    asyncio.run(db.completion_pools.create_index("key", unique=True))
+    return cache
+
+
+def pool(db, key):
+    return next(doc for doc in db.completion_pools.docs if doc["key"] == key)
+
+
+class Generator:
+    def __init__(self):
+        self.requests = []
+
+    async def __call__(self, n):
+        self.requests.append(n)
+        start = sum(self.requests) - n
+        return [f"script {i}" for i in range(start, start + n)]
+
+
+class TestCompletionCache:
+    """Test pooling and refills"""
+
+    def test_key_depends_on_model_temperature_and_prompt(self):
+        key = completion_key("gpt-4o-mini", 0.85, "system", "user")
+        assert key == completion_key("gpt-4o-mini", 0.85, "system", "user")
+        assert key != completion_key("gpt-4o", 0.85, "system", "user")
+        assert key != completion_key("gpt-4o-mini", 0.5, "system", "user")
+        assert key != completion_key("gpt-4o-mini", 0.85, "sys", "temuser")
+
+    def test_miss_fills_pool_and_hits_pop_in_order(self, fake_db):
+        cache = make_cache(fake_db, pool_size=3)
+        generate = Generator()
+
+        async def run():
+            first = await cache.get("k", generate)
+            second = await cache.get("k", generate)
+            return first, second
+
+        assert asyncio.run(run()) == (("script 0", False), ("script 1", True))
+        assert generate.requests == [4]
+        assert pool(fake_db, "k")["completions"] == ["script 2", "script 3"]
+
+    def test_low_pool_is_refilled(self, fake_db):
+        cache = make_cache(fake_db, pool_size=2)
+        generate = Generator()
+
+        async def run():
+            texts = [(await cache.get("k", generate))[0] for _ in range(3)]
+            await asyncio.gather(*cache._refills.values())
+            return texts
+
+        texts = asyncio.run(run())
+        assert len(set(texts)) == 3  # Nothing handed out twice
+        assert generate.requests == [3, 2]
+        assert len(pool(fake_db, "k")["completions"]) == 2
+        assert "refilling_until" not in pool(fake_db, "k")
+
+    def test_disabled_cache_always_generates(self, fake_db):
+        cache = make_cache(fake_db, pool_size=0)
+        generate = Generator()
+
+        async def run():
+            return [await cache.get("k", generate) for _ in range(2)]
+
+        asyncio.run(run())
+        assert generate.requests == [1, 1]
+        assert fake_db.completion_pools.docs == []
@@ -0,0 +1,27 @@
+"""
+Test for encode profile selection.
+Verifies that:
+- Final renders use the requested profile, else the default
+- Preview-only profiles are rejected for final renders
+"""
+import os
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.encode_profiles import DEFAULT_ENCODE_PROFILE, PREVIEW_ENCODE_PROFILE, resolve_encode_profile
+
+
+class TestResolveEncodeProfile:
+    """Test final-render profile selection"""
+
+    def test_requested_or_default(self):
+        assert resolve_encode_profile("archive") == "archive"
+        assert resolve_encode_profile(None) == DEFAULT_ENCODE_PROFILE
+
+    def test_preview_profile_rejected(self):
+        with pytest.raises(ValueError):
+            resolve_encode_profile(PREVIEW_ENCODE_PROFILE)
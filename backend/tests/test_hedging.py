@@ -0,0 +1,113 @@
+"""
+Test for hedged upstream calls.
+Verifies that:
+- Fast calls are not hedged and feed the latency window
+- A slow primary is hedged, the faster call wins and the loser is cancelled
+- A failing call only fails the request when both calls fail
+- Latency is measured from the first request, whichever call wins
+- No more than the hedge budget of calls is hedged
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.hedging import LatencyTracker, hedged
+
+
+def call(seconds, result=None, error=None, events=None, name=None):
+    async def factory():
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            if events is not None:
+                events.append(f"{name} cancelled")
+            raise
+        if error:
+            raise error
+        return result
+    return factory
+
+
+class TestLatencyTracker:
+    """Test hedge delay selection"""
+
+    def test_default_delay_until_enough_samples(self):
+        tracker = LatencyTracker(default_delay=3.0, min_delay=0.1)
+        for _ in range(5):
+            tracker.add(1.0)
+        assert tracker.hedge_delay(0.95) == 3.0
+
+    def test_percentile_delay(self):
+        tracker = LatencyTracker(default_delay=3.0, min_delay=0.1)
+        for i in range(100):
+            tracker.add(i / 100)
+        assert tracker.hedge_delay(0.9) == pytest.approx(0.9)
+        assert tracker.expected_remaining(0.9) == pytest.approx(0.05)
+        assert tracker.expected_remaining(5.0) is None
+
+
+class TestHedged:
+    """Test hedged calls"""
+
+    def test_fast_primary_is_not_hedged(self):
+        tracker = LatencyTracker(default_delay=0.2)
+        backup_calls = []
+
+        async def backup():
+            backup_calls.append(1)
+
+        result = asyncio.run(hedged("test", call(0.01, "primary"), backup, tracker))
+        assert result == "primary"
+        assert backup_calls == []
+        assert len(tracker.samples) == 1
+
+    def test_slow_primary_loses_to_hedge(self):
+        tracker = LatencyTracker(default_delay=0.05)
+        events = []
+
+        async def run():
+            return await hedged(
+                "test",
+                call(1.0, "primary", events=events, name="primary"),
+                call(0.01, "hedge", events=events, name="hedge"),
+                tracker
+            )
+
+        assert asyncio.run(run()) == "hedge"
+        assert events == ["primary cancelled"]
+        # The caller waited for the hedge delay too
+        assert tracker.samples[-1] >= 0.05
+
+    def test_hedge_covers_failing_call(self):
+        tracker = LatencyTracker(default_delay=0.05)
+        result = asyncio.run(hedged(
+            "test", call(0.1, error=ConnectionError("reset")), call(0.2, "hedge"), tracker
+        ))
+        assert result == "hedge"
+
+    def test_both_failing_raises_first_error(self):
+        tracker = LatencyTracker(default_delay=0.05)
+        with pytest.raises(TimeoutError):
+            asyncio.run(hedged(
+                "test", call(0.1, error=ConnectionError("a")), call(0.01, error=TimeoutError("b")), tracker
+            ))
+
+    def test_hedge_budget(self):
+        tracker = LatencyTracker(default_delay=0.01, max_hedge_rate=0.1)
+        backup_calls = []
+
+        async def backup():
+            backup_calls.append(1)
+            return "hedge"
+
+        async def run():
+            return [await hedged("test", call(0.05, "primary"), backup, tracker) for _ in range(3)]
+
+        assert asyncio.run(run()) == ["hedge", "primary", "primary"]
+        assert backup_calls == [1]
+        assert list(tracker.hedges) == [1, 0, 0]
@@ -186,5 +186,71 @@ class TestKaraokeSubtitles:
         print("✓ Time formatting test passed")
 
 
+class TestCompactKaraokeSubtitles:
+    """Test the compact (two events per group) karaoke generator"""
+
+    def _dialogue_lines(self, script_text, word_timestamps, duration):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = Path(tmpdir) / "test.ass"
+            FFmpegService.create_karaoke_subtitles_compact(
+                output_path, script_text, word_timestamps, duration
+            )
+            with open(output_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        assert "[Script Info]" in content
+        return [line for line in content.split('\n') if line.startswith('Dialogue:')]
+
+    def test_two_events_per_group(self):
+        """8 words in groups of 4 should give 4 events instead of 8"""
+        words = "One two three four five six seven eight".split()
+        word_timestamps = [
+            {'word': w, 'start': i * 0.5, 'end': i * 0.5 + 0.5} for i, w in enumerate(words)
+        ]
+        dialogue_lines = self._dialogue_lines(" ".join(words), word_timestamps, 4.0)
+
+        assert len(dialogue_lines) == 4
+        assert [line.split(',')[0] for line in dialogue_lines] == [
+            "Dialogue: 0", "Dialogue: 1", "Dialogue: 0", "Dialogue: 1"
+        ]
+
+        print("✓ Two events per group test passed")
+
+    def test_yellow_on_at_start_white_on_at_end(self):
+        """Layer 0 turns each word yellow at its start, layer 1 turns it white at its end"""
+        word_timestamps = [
+            {'word': 'First', 'start': 0.0, 'end': 0.8},
+            {'word': 'Second', 'start': 1.0, 'end': 1.6},
+            {'word': 'Third', 'start': 2.0, 'end': 3.0},
+        ]
+        yellow_line, white_line = self._dialogue_lines("First Second Third", word_timestamps, 3.0)
+
+        # Layer 0: yellow primary, white secondary; switches at 0.0s, 1.0s, 2.0s
+        assert "\\1c&H00FFFF&\\2c&HFFFFFF&" in yellow_line
+        assert "{\\k0}{\\k100}First {\\k100}Second {\\k100}Third" in yellow_line
+
+        # Layer 1: white primary, transparent secondary; switches at 0.8s, 1.6s, 3.0s
+        assert "\\1c&HFFFFFF&\\2a&HFF&" in white_line
+        assert "{\\k80}{\\k80}First {\\k140}Second {\\k0}Third" in white_line
+
+        print("✓ Karaoke timing test passed")
+
+    def test_overlapping_timestamps_never_negative(self):
+        """Whisper can return overlapping words; \\k durations must stay >= 0"""
+        word_timestamps = [
+            {'word': 'A', 'start': 0.0, 'end': 1.2},
+            {'word': 'B', 'start': 1.0, 'end': 1.1},
+        ]
+        for line in self._dialogue_lines("A B", word_timestamps, 2.0):
+            assert "\\k-" not in line
+
+        print("✓ Overlap clamping test passed")
+
+    def test_empty_script(self):
+        """Empty script should produce only the header"""
+        assert self._dialogue_lines("", [], 1.0) == []
+
+        print("✓ Compact empty script test passed")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,117 @@
+"""
+Test for the script pre-generation worker.
+Verifies that a pass only tops up pools that are short, tops up pools a
+user has taken from first, stops when the token budget is spent and backs
+off while users are generating scripts, and that pre-generated pools are
+kept per user.
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services import pregeneration
+from services.completion_cache import CompletionCache
+from services.pregeneration import PregenerationWorker, pregeneration_key
+
+
+class FakeCache(CompletionCache):
+    def __init__(self, pooled):
+        super().__init__(pool_size=3)
+        self.pooled = pooled
+        self.refills = []
+
+    async def available(self, key):
+        return self.pooled.get(key, 0)
+
+    async def refill(self, key, generate, n=None):
+        self.refills.append((key, len(await generate(n))))
+        return True
+
+
+class FakeGovernor:
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    async def try_take(self, key, cost, rate, capacity):
+        if cost > self.tokens:
+            return False
+        self.tokens -= cost
+        return True
+
+
+def prompt_source(user_id, topic, keywords, mode):
+    async def generate(n):
+        return [f"{topic} {i}" for i in range(n)]
+    return f"{topic}:{mode}", generate, 100
+
+
+def make_worker(monkeypatch, pooled, tokens):
+    cache = FakeCache(pooled)
+    monkeypatch.setattr(pregeneration, "completion_cache", cache)
+    monkeypatch.setattr(pregeneration, "rate_governor", FakeGovernor(tokens))
+    worker = PregenerationWorker(prompt_source)
+
+    async def top_requests():
+        return [
+            {"user_id": "u1", "topic": "Glaube", "keywords": [], "mode": "FAITH_EXPLICIT"},
+            {"user_id": "u1", "topic": "Hoffnung", "keywords": [], "mode": "FAITH_EXPLICIT"},
+            {"user_id": "u2", "topic": "Stille", "keywords": ["Gebet"], "mode": "STATE_BASED"}
+        ]
+
+    worker.top_requests = top_requests
+    return worker, cache
+
+
+@pytest.fixture(autouse=True)
+def healthy_openai(monkeypatch):
+    monkeypatch.setattr(pregeneration.breakers["openai"], "opened_at", None)
+
+
+class TestPregeneration:
+    """Test pool top-up passes"""
+
+    def test_tops_up_short_pools_only(self, monkeypatch):
+        worker, cache = make_worker(monkeypatch, {"Glaube:FAITH_EXPLICIT": 3, "Hoffnung:FAITH_EXPLICIT": 1}, 10000)
+
+        assert asyncio.run(worker.run_once()) == 5
+        assert cache.refills == [("Hoffnung:FAITH_EXPLICIT", 2), ("Stille:STATE_BASED", 3)]
+
+    def test_stops_when_budget_is_spent(self, monkeypatch):
+        worker, cache = make_worker(monkeypatch, {}, 400)
+
+        assert asyncio.run(worker.run_once()) == 3
+        assert cache.refills == [("Glaube:FAITH_EXPLICIT", 3)]
+
+    def test_taken_pools_are_refilled_first(self, monkeypatch):
+        worker, cache = make_worker(monkeypatch, {"Glaube:FAITH_EXPLICIT": 3, "Hoffnung:FAITH_EXPLICIT": 3}, 400)
+        key, generate, tokens = prompt_source("u3", "Dank", [], "FAITH_EXPLICIT")
+        worker.refill_soon(key, generate, tokens)
+
+        assert asyncio.run(worker.run_once()) == 3
+        assert cache.refills == [("Dank:FAITH_EXPLICIT", 3)]  # Budget spent before the top requests
+        assert worker.taken == {}
+
+    def test_taken_pool_waits_for_budget(self, monkeypatch):
+        worker, cache = make_worker(monkeypatch, {}, 0)
+        key, generate, tokens = prompt_source("u3", "Dank", [], "FAITH_EXPLICIT")
+        worker.refill_soon(key, generate, tokens)
+
+        assert asyncio.run(worker.run_once()) == 0
+        assert list(worker.taken) == [key]  # Kept for the next pass
+
+    def test_pools_are_per_user(self):
+        assert pregeneration_key("u1", "prompt") != pregeneration_key("u2", "prompt")
+        assert pregeneration_key("u1", "prompt") != "prompt"  # Apart from the shared prompt pool
+
+    def test_backs_off_while_users_generate(self, monkeypatch):
+        worker, cache = make_worker(monkeypatch, {}, 10000)
+        worker.touch()
+
+        assert not worker.idle()
+        assert asyncio.run(worker.run_once()) == 0
+        assert cache.refills == []
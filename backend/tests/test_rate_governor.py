@@ -0,0 +1,72 @@
+"""
+Test for the upstream API rate governor.
+Verifies token bucket refill and wait times, and that a shared bucket stops
+granting once its burst is spent.
+"""
+import asyncio
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.rate_governor import RateGovernor, refill, seconds_until
+
+
+def make_governor(db):
+    governor = RateGovernor()
+    governor._db = lambda: db
+    return governor
+
+
+class TestTokenBucket:
+    """Test bucket arithmetic"""
+
+    def test_refill_is_capped(self):
+        assert refill(0, 100.0, 101.0, rate=2, capacity=10) == 2
+        assert refill(9, 100.0, 200.0, rate=2, capacity=10) == 10
+        # Clock skew between workers never removes tokens
+        assert refill(5, 100.0, 99.0, rate=2, capacity=10) == 5
+
+    def test_seconds_until(self):
+        assert seconds_until(3, 1, rate=1) == 0
+        assert seconds_until(0.5, 1, rate=0.5) == 1.0
+
+    def test_burst_then_wait(self, fake_db):
+        governor = make_governor(fake_db)
+
+        async def run():
+            grants = [await governor._take("pexels:requests", 1, rate=0.01, capacity=3) for _ in range(4)]
+            return grants
+
+        grants = asyncio.run(run())
+        assert grants[:3] == [0.0, 0.0, 0.0]
+        assert grants[3] > 50  # ~100s for the next token at 0.01/s
+
+    def test_oversized_cost_waits_for_full_bucket(self, fake_db):
+        """A TTS request larger than the budget is capped, not starved forever"""
+        governor = make_governor(fake_db)
+
+        async def run():
+            return await governor._take("elevenlabs:characters", 50000, rate=100, capacity=1000)
+
+        assert asyncio.run(run()) == 0.0
+
+    def test_backoff_blocks_bucket(self, fake_db):
+        governor = make_governor(fake_db)
+
+        async def run():
+            await governor._take("openai:requests", 1, rate=5, capacity=10)
+            await governor.backoff("openai", 30)
+            return await governor._take("openai:requests", 1, rate=5, capacity=10)
+
+        assert 25 < asyncio.run(run()) <= 30
+
+    def test_unknown_upstream_is_not_limited(self, fake_db):
+        governor = make_governor(fake_db)
+
+        async def run():
+            async with governor.limit("somewhere_else"):
+                return True
+
+        assert asyncio.run(run())
@@ -0,0 +1,79 @@
+"""
+Test for the render time estimator.
+Verifies that the regression recovers a known linear relation, that
+predictions fall back to script length until enough history exists, and
+that estimated clip counts are capped like real downloads.
+"""
+import os
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("numpy")
+
+from services.render_estimator import (
+    MAX_BROLL_CLIPS, RenderEstimator, broll_clip_count, estimate_clip_count, feature_vector, fit_linear
+)
+
+
+class TestRenderEstimator:
+    """Test fitting and prediction"""
+
+    def test_fit_linear_recovers_weights(self):
+        """y = 5 + 2a + 3b is recovered from exact samples"""
+        rows = [[1.0, a, b] for a in range(5) for b in range(4)]
+        targets = [5 + 2 * r[1] + 3 * r[2] for r in rows]
+
+        weights = fit_linear(rows, targets, ridge=1e-9)
+
+        for got, expected in zip(weights, [5, 2, 3]):
+            assert abs(got - expected) < 1e-4
+
+    def test_constant_feature_does_not_break_fit(self):
+        """A feature that never varies (e.g. an unused profile) gets no weight"""
+        rows = [[1.0, float(a), 0.0] for a in range(10)]
+        targets = [10 + 4 * a for a in range(10)]
+
+        weights = fit_linear(rows, targets)
+
+        assert abs(weights[1] - 4) < 1e-2
+        assert abs(weights[2]) < 1e-9
+
+    def test_clip_count_matches_download_cap(self):
+        """Long scripts are estimated with the clip count a render can actually download"""
+        assert broll_clip_count(10.0) == 6
+        assert estimate_clip_count(100_000) == MAX_BROLL_CLIPS
+
+    def test_predictions_follow_history(self):
+        estimator = RenderEstimator()
+        history = [
+            RenderEstimator.job_features("x" * chars, concurrent_jobs=jobs)
+            for chars in range(200, 2200, 200)
+            for jobs in range(3)
+        ]
+        # 60s per 1000 characters, +30s per render running alongside
+        targets = [20 + 60 * f["script_chars"] / 1000 + 30 * f["concurrent_jobs"] for f in history]
+        estimator.weights = fit_linear([feature_vector(f) for f in history], targets)
+
+        short = estimator.predict_seconds(RenderEstimator.job_features("x" * 500))
+        busy = estimator.predict_seconds(RenderEstimator.job_features("x" * 500, concurrent_jobs=2))
+
+        assert abs(short - 50) < 5
+        assert abs(busy - short - 60) < 5
+
+    def test_fallback_without_history(self):
+        estimator = RenderEstimator()
+        final = estimator.predict_seconds(RenderEstimator.job_features("x" * 1000))
+        preview = estimator.predict_seconds(RenderEstimator.job_features("x" * 1000, render_profile="preview"))
+
+        assert final > preview >= 1.0
+
+    def test_promote_uses_no_api_units(self):
+        features = RenderEstimator.job_features("x" * 300, promote=True)
+        units = RenderEstimator.api_units(features)
+
+        assert RenderEstimator.api_cost(units) == 0.0
+        assert RenderEstimator.api_units(RenderEstimator.job_features("x" * 300))["elevenlabs_characters"] == 300
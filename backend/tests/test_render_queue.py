@@ -0,0 +1,115 @@
+"""
+Test for fair-share scheduling in the render queue.
+Verifies that:
+- Users take turns regardless of how many jobs they queued
+- Weights and per-user caps are respected
+- Previews are dispatched before finals and batch jobs
+"""
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.render_queue import FairQueue, RenderQueue, RenderJob
+
+
+def make_job(video_id, user_id, kind="batch", weight=1):
+    return RenderJob(video_id=video_id, user_id=user_id, kind=kind, kwargs={}, weight=weight)
+
+
+def drain(queue, eligible=lambda user_id: True):
+    order = []
+    while True:
+        job = queue.pop(eligible)
+        if job is None:
+            return order
+        order.append(job.video_id)
+
+
+class TestFairQueue:
+    """Test deficit round-robin between users"""
+
+    def test_users_take_turns(self):
+        """A user with many jobs does not block a user with one"""
+        queue = FairQueue()
+        for i in range(5):
+            queue.push(make_job(f"a{i}", "alice"))
+        queue.push(make_job("b0", "bob"))
+
+        assert drain(queue) == ["a0", "b0", "a1", "a2", "a3", "a4"]
+
+    def test_weighted_turns(self):
+        """A weight-2 user gets two jobs per turn"""
+        queue = FairQueue()
+        for i in range(4):
+            queue.push(make_job(f"a{i}", "alice", weight=2))
+            queue.push(make_job(f"b{i}", "bob"))
+
+        assert drain(queue) == ["a0", "a1", "b0", "a2", "a3", "b1", "b2", "b3"]
+
+    def test_ineligible_user_is_skipped(self):
+        """Users at their concurrency cap keep their place but are skipped"""
+        queue = FairQueue()
+        queue.push(make_job("a0", "alice"))
+        queue.push(make_job("b0", "bob"))
+
+        assert drain(queue, lambda user_id: user_id != "alice") == ["b0"]
+        assert len(queue) == 1
+
+    def test_remove(self):
+        queue = FairQueue()
+        queue.push(make_job("a0", "alice"))
+        queue.push(make_job("b0", "bob"))
+
+        assert queue.remove("a0")
+        assert not queue.remove("a0")
+        assert drain(queue) == ["b0"]
+
+    def test_jobs_ahead_matches_dispatch_order(self):
+        """The position estimate is exact when no caps apply"""
+        queue = FairQueue()
+        for i in range(3):
+            queue.push(make_job(f"a{i}", "alice", weight=2))
+        for i in range(3):
+            queue.push(make_job(f"b{i}", "bob"))
+
+        expected = {video_id: i for i, video_id in enumerate(["a0", "a1", "b0", "a2", "b1", "b2"])}
+        for video_id, ahead in expected.items():
+            assert queue.jobs_ahead(video_id) == ahead
+        assert queue.jobs_ahead("missing") is None
+
+
+class TestRenderQueuePriorities:
+    """Test job kind priorities and caps (without starting workers)"""
+
+    async def _noop(self, **kwargs):
+        pass
+
+    def test_priority_order(self):
+        render_queue = RenderQueue(self._noop, concurrency=4, batch_reserved=0, max_per_user=4)
+        render_queue.queues["batch"].push(make_job("batch", "alice", "batch"))
+        render_queue.queues["single"].push(make_job("single", "alice", "single"))
+        render_queue.queues["preview"].push(make_job("preview", "bob", "preview"))
+
+        assert render_queue.position("preview") == 1
+        assert render_queue.position("single") == 2
+        assert render_queue.position("batch") == 3
+        assert [render_queue._next_job().video_id for _ in range(3)] == ["preview", "single", "batch"]
+
+    def test_per_user_cap(self):
+        render_queue = RenderQueue(self._noop, concurrency=4, batch_reserved=0, max_per_user=1)
+        render_queue.queues["single"].push(make_job("a0", "alice", "single"))
+        render_queue.queues["single"].push(make_job("a1", "alice", "single"))
+
+        assert render_queue._next_job().video_id == "a0"
+        assert render_queue._next_job() is None
+        assert render_queue.running_per_user == {"alice": 1}
+
+    def test_batch_slot_budget(self):
+        render_queue = RenderQueue(self._noop, concurrency=2, batch_reserved=1, max_per_user=4)
+        render_queue.queues["batch"].push(make_job("a0", "alice"))
+        render_queue.queues["batch"].push(make_job("b0", "bob"))
+
+        assert render_queue._next_job().video_id == "a0"
+        assert render_queue._next_job() is None
@@ -0,0 +1,109 @@
+"""
+Test for upstream circuit breakers and retries.
+Verifies that:
+- Retryable failures are retried and then open the circuit
+- An open circuit fails fast and lets one trial call through after the reset
+- Client errors are not retried and do not count against the upstream
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services import resilience
+from services.resilience import (
+    CircuitBreaker, CircuitOpenError, RetryPolicy, call_upstream, is_retryable
+)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_seconds=60)
+    monkeypatch.setitem(resilience.breakers, "test", breaker)
+    monkeypatch.setitem(resilience.RETRY_POLICIES, "test", RetryPolicy(attempts=2, base_delay=0, max_delay=0))
+    return breaker
+
+
+def failing(calls, exc):
+    async def factory():
+        calls.append(1)
+        raise exc
+    return factory
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions"""
+
+    def test_opens_after_threshold_and_fails_fast(self, breaker):
+        calls = []
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                asyncio.run(call_upstream("test", failing(calls, ConnectionError("down"))))
+
+        # 2 calls x 2 attempts, the circuit opened on the third failure
+        assert breaker.state == "open"
+        assert len(calls) == 3
+
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(call_upstream("test", failing(calls, ConnectionError("down"))))
+        assert len(calls) == 3
+
+    def test_half_open_trial_closes_on_success(self, breaker):
+        for _ in range(3):
+            breaker.record_failure()
+        breaker.opened_at -= 61  # Reset period elapsed
+
+        async def ok():
+            return "fine"
+
+        assert breaker.state == "half_open"
+        assert asyncio.run(call_upstream("test", ok)) == "fine"
+        assert breaker.state == "closed"
+
+    def test_single_trial_while_half_open(self, breaker):
+        for _ in range(3):
+            breaker.record_failure()
+        breaker.opened_at -= 61
+
+        assert breaker.allow()
+        assert not breaker.allow()  # The trial call is still running
+
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+    def test_client_errors_are_not_retried(self, breaker):
+        calls = []
+        with pytest.raises(StatusError):
+            asyncio.run(call_upstream("test", failing(calls, StatusError(401))))
+
+        assert len(calls) == 1
+        assert breaker.failures == 0
+
+    def test_unexpected_errors_are_not_retried(self, breaker):
+        calls = []
+        with pytest.raises(KeyError):
+            asyncio.run(call_upstream("test", failing(calls, KeyError("videos"))))
+
+        assert len(calls) == 1
+
+
+class TestRetryable:
+    def test_classification(self):
+        assert is_retryable(ConnectionError())
+        assert is_retryable(asyncio.TimeoutError())
+        assert is_retryable(StatusError(429))
+        assert is_retryable(StatusError(503))
+        assert not is_retryable(StatusError(400))
+        assert not is_retryable(StatusError(404))
+        assert not is_retryable(KeyError("video_files"))
+        assert not is_retryable(ValueError("bad response"))
@@ -0,0 +1,90 @@
+"""
+Test for the local hook/script similarity index.
+Verifies that:
+- Texts sharing words score higher than unrelated ones
+- Incremental add/remove keep rows and lookups consistent
+- Similar examples are ranked by retention among the closest matches
+- Only the most recently used user indexes are kept
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+np = pytest.importorskip("numpy")
+
+from services.similarity_index import SimilarityIndex, UserIndex, vectorize
+
+
+ROWS = [
+    {"id": "a1", "hook_title": "Wenn Gott schweigt, hört er trotzdem zu", "resolve_script": "Stille im Gebet", "retention_percent": 61.0},
+    {"id": "a2", "hook_title": "Gottes Stille ist keine Abwesenheit", "resolve_script": "Warten auf Antwort", "retention_percent": 74.0},
+    {"id": "a3", "hook_title": "Deine Angst hat nicht das letzte Wort", "resolve_script": "Mut und Vertrauen", "retention_percent": 80.0},
+]
+
+
+def make_index(db):
+    index = SimilarityIndex()
+    asyncio.run(db.analytics_data.insert_many([{**row, "user_id": "u1"} for row in ROWS]))
+    index._db = lambda: db
+    return index
+
+
+class TestVectors:
+    def test_related_texts_score_higher(self):
+        query = vectorize("Gott schweigt")
+        related = float(vectorize("Wenn Gott schweigt, hört er zu") @ query)
+        unrelated = float(vectorize("Deine Angst hat nicht das letzte Wort") @ query)
+        assert related > unrelated
+        assert abs(float(np.linalg.norm(query)) - 1.0) < 1e-5
+
+
+class TestUserIndex:
+    def test_add_remove_keeps_rows_consistent(self):
+        index = UserIndex()
+        for i in range(100):  # Forces the matrix to grow
+            index.add(f"hook:{i}", vectorize(f"Hook Nummer {i}"), {"hook_title": str(i)})
+        index.remove("hook:3")
+        index.remove("hook:99")
+
+        assert index.size == 98
+        assert "hook:3" not in index.positions
+        results = index.search(vectorize("Hook Nummer 42"), 1)
+        assert results[0]["hook_title"] == "42"
+
+
+class TestSimilar:
+    def test_ranks_closest_matches_by_retention(self, fake_db):
+        index = make_index(fake_db)
+
+        async def run():
+            return await index.similar("u1", "Gottes Stille, wenn Gott schweigt", k=2, candidates=2)
+
+        results = asyncio.run(run())
+        assert [r["hook_title"] for r in results] == [ROWS[1]["hook_title"], ROWS[0]["hook_title"]]
+
+    def test_incremental_add_is_searchable(self, fake_db):
+        index = make_index(fake_db)
+
+        async def run():
+            await index.similar("u1", "Gott")
+            index.add("u1", "hook", {"id": "h1", "hook_text": "Hoffnung im Sturm", "avg_retention": 90.0})
+            return await index.similar("u1", "Hoffnung im Sturm", k=1)
+
+        assert asyncio.run(run())[0]["hook_title"] == "Hoffnung im Sturm"
+
+    def test_least_recently_used_index_is_evicted(self, fake_db):
+        index = make_index(fake_db)
+        index.max_users = 2
+
+        async def run():
+            for user_id in ("u1", "u2", "u1", "u3"):
+                await index.similar(user_id, "Gott")
+
+        asyncio.run(run())
+        assert list(index.users) == ["u1", "u3"]
+        assert set(index._locks) == {"u1", "u3"}
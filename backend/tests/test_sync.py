@@ -0,0 +1,78 @@
+"""
+Test for delta sync cursors.
+Verifies that:
+- Full pages continue after their last item, even when items share a timestamp
+- Changes inside the safety margin are returned but do not end a long-poll
+- The cursor handed out is the current time, not moved back by the margin
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils import sync
+from utils.sync import get_changes, new_cursor
+
+
+def stamp(seconds_ago):
+    return (datetime.utcnow() - timedelta(seconds=seconds_ago)).isoformat()
+
+
+def add_scripts(db, *items):
+    asyncio.run(db.scripts.insert_many([
+        {"id": doc_id, "user_id": "u1", "updated_at": updated_at} for doc_id, updated_at in items
+    ]))
+
+
+class TestGetChanges:
+    """Test changed-since queries"""
+
+    def test_pages_do_not_skip_items_sharing_a_timestamp(self, fake_db):
+        shared = stamp(60)
+        add_scripts(fake_db, ("c", shared), ("a", shared), ("b", shared), ("d", stamp(30)))
+
+        async def run():
+            seen, cursor = [], stamp(120)
+            for _ in range(3):
+                page = await get_changes(fake_db, "scripts", {"user_id": "u1"}, cursor, limit=2)
+                seen += [item["id"] for item in page["changed"]]
+                cursor = page["cursor"]
+            return seen, cursor
+
+        seen, cursor = asyncio.run(run())
+        assert seen == ["a", "b", "c", "d"]
+        assert "|" not in cursor  # Caught up: back to a timestamp cursor
+
+    def test_cursor_is_not_moved_back(self, fake_db):
+        before = new_cursor()
+        page = asyncio.run(get_changes(fake_db, "scripts", {"user_id": "u1"}, stamp(60)))
+        assert page["cursor"] >= before
+
+    def test_margin_changes_do_not_end_long_poll(self, fake_db, monkeypatch):
+        monkeypatch.setattr(sync, "WAIT_POLL_INTERVAL", 0.05)
+        cursor = new_cursor()
+        add_scripts(fake_db, ("late", stamp(1)))  # Stamped before the cursor, seen after it
+
+        started = time.monotonic()
+        page = asyncio.run(get_changes(fake_db, "scripts", {"user_id": "u1"}, cursor, wait=1))
+        assert time.monotonic() - started >= 0.9
+        assert [item["id"] for item in page["changed"]] == ["late"]
+
+    def test_new_change_ends_long_poll(self, fake_db, monkeypatch):
+        monkeypatch.setattr(sync, "WAIT_POLL_INTERVAL", 0.05)
+        add_scripts(fake_db, ("new", stamp(-1)))
+
+        started = time.monotonic()
+        page = asyncio.run(get_changes(fake_db, "scripts", {"user_id": "u1"}, stamp(5), wait=5))
+        assert time.monotonic() - started < 1
+        assert [item["id"] for item in page["changed"]] == ["new"]
+
+    def test_invalid_cursor(self, fake_db):
+        with pytest.raises(ValueError):
+            asyncio.run(get_changes(fake_db, "scripts", {"user_id": "u1"}, "yesterday"))
@@ -0,0 +1,71 @@
+"""
+Test for the metrics registry.
+Verifies the Prometheus text exposition of counters, gauges and histograms.
+"""
+import os
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.telemetry import Registry, external_call
+
+
+class TestRegistry:
+    """Test exposition output"""
+
+    def test_counter_and_gauge(self):
+        registry = Registry()
+        requests = registry.counter("api_requests_total", "Requests", ("api", "outcome"))
+        depth = registry.gauge("queue_depth", "Depth", ("kind",), callback=lambda: {("batch",): 3})
+
+        requests.inc(api="pexels", outcome="ok")
+        requests.inc(2, api="pexels", outcome="ok")
+        depth.set(1, kind="single")
+
+        text = registry.render()
+        assert "# TYPE api_requests_total counter" in text
+        assert 'api_requests_total{api="pexels",outcome="ok"} 3' in text
+        assert 'queue_depth{kind="batch"} 3' in text
+        assert 'queue_depth{kind="single"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=[0.1, 1])
+
+        for value in (0.05, 0.5, 0.7, 5):
+            latency.observe(value, route="/api/videos")
+
+        text = registry.render()
+        assert 'latency_seconds_bucket{route="/api/videos",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{route="/api/videos",le="1"} 3' in text
+        assert 'latency_seconds_bucket{route="/api/videos",le="+Inf"} 4' in text
+        assert 'latency_seconds_count{route="/api/videos"} 4' in text
+        assert 'latency_seconds_sum{route="/api/videos"} 6.25' in text
+
+    def test_label_escaping(self):
+        registry = Registry()
+        counter = registry.counter("odd_total", "Odd labels", ("value",))
+        counter.inc(value='say "hi"\n')
+
+        assert 'odd_total{value="say \\"hi\\"\\n"} 1' in registry.render()
+
+    def test_duplicate_names_rejected(self):
+        registry = Registry()
+        registry.counter("dup_total", "First")
+        with pytest.raises(ValueError):
+            registry.counter("dup_total", "Second")
+
+    def test_external_call_counts_errors(self):
+        from services.telemetry import EXTERNAL_API_REQUESTS
+
+        with pytest.raises(RuntimeError):
+            with external_call("test_api"):
+                raise RuntimeError("down")
+        with external_call("test_api"):
+            pass
+
+        assert EXTERNAL_API_REQUESTS.values[("test_api", "error")] == 1
+        assert EXTERNAL_API_REQUESTS.values[("test_api", "ok")] == 1
@@ -0,0 +1,79 @@
+"""
+Test for render pipeline spans.
+Verifies that spans are collected on the active trace, that child process
+resources are charged to the current span, and histogram quantiles.
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.tracing import RenderTrace, span, histogram_quantile, SPAN_BUCKETS
+from services.ffmpeg_service import FFmpegService
+
+
+class TestSpans:
+    """Test span collection"""
+
+    def test_spans_recorded_on_active_trace(self):
+        trace = RenderTrace("video-1")
+        token = trace.activate()
+        try:
+            with span("subtitles", sync=True, format="classic") as s:
+                s.bytes_out = 42
+            with pytest.raises(ValueError):
+                with span("encode"):
+                    raise ValueError("boom")
+        finally:
+            token.var.reset(token)
+
+        spans = trace.to_list()
+        assert [s["name"] for s in spans] == ["subtitles", "encode"]
+        assert spans[0]["bytes_out"] == 42
+        assert spans[0]["format"] == "classic"
+        assert spans[1]["error"] == "ValueError"
+
+    def test_no_trace_is_a_noop(self):
+        with span("download") as s:
+            s.bytes_in = 1
+        # Nothing to assert beyond not raising: spans outside a render are dropped
+
+    @pytest.mark.skipif(not os.path.exists("/proc/self/stat"), reason="needs /proc")
+    def test_child_process_cpu_charged_to_span(self):
+        async def run():
+            trace = RenderTrace("video-2")
+            trace.activate()
+            with span("normalize_clip", index=0):
+                # Busy loop for ~0.5s of CPU in a child process
+                await FFmpegService.run_ffmpeg([
+                    sys.executable, '-c',
+                    'import time\nend = time.process_time() + 0.5\nwhile time.process_time() < end: pass'
+                ])
+            return trace.to_list()[0]
+
+        result = asyncio.run(run())
+        assert result["cpu_seconds"] > 0.2
+        assert result["peak_rss_bytes"] > 0
+
+
+class TestHistogramQuantile:
+    """Test quantiles from bucket counts"""
+
+    def test_quantiles(self):
+        buckets = [0] * (len(SPAN_BUCKETS) + 1)
+        buckets[4] = 90   # <= 1s
+        buckets[7] = 10   # <= 10s
+
+        assert histogram_quantile(buckets, 0.5) == 1
+        assert histogram_quantile(buckets, 0.95) == 10
+
+    def test_empty_and_open_bucket(self):
+        buckets = [0] * (len(SPAN_BUCKETS) + 1)
+        assert histogram_quantile(buckets, 0.5) is None
+
+        buckets[-1] = 1
+        assert histogram_quantile(buckets, 0.5) is None
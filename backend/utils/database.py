@@ -30,10 +30,40 @@ async def init_database(db):
     # Videos collection
     await db.videos.create_index([("user_id", 1), ("created_at", -1)])
     await db.videos.create_index("script_id")
+    await db.videos.create_index("batch_id")
     logger.info("Videos indexes created")
     
+    # Video batches collection
+    await db.video_batches.create_index("id")
+    await db.video_batches.create_index([("user_id", 1), ("created_at", -1)])
+    logger.info("Video batches indexes created")
+    
     # Analytics Data collection (Notion CSV imports)
     await db.analytics_data.create_index([("user_id", 1), ("retention_percent", -1)])
     await db.analytics_data.create_index("id")
     await db.analytics_data.create_index("social_file")
-    logger.info("Analytics Data indexes created")
\ No newline at end of file
+    await db.pattern_snapshots.create_index("user_id", unique=True)
+    logger.info("Analytics Data indexes created")
+    
+    # Delta sync: changed-since queries and deletion tombstones
+    for collection in ("videos", "scripts", "hooks"):
+        await db[collection].create_index([("user_id", 1), ("updated_at", 1), ("id", 1)])
+    await db.sync_deletions.create_index([("collection", 1), ("user_id", 1), ("deleted_at", 1)])
+    await db.sync_deletions.create_index("expires_at", expireAfterSeconds=0)
+    logger.info("Sync indexes created")
+    
+    # Render span latency histograms (one document per span name and hour)
+    await db.span_histograms.create_index([("name", 1), ("period", 1)], unique=True)
+    await db.span_histograms.create_index("period")
+    logger.info("Span histogram indexes created")
+    
+    # Upstream API rate governor: token buckets and concurrency slots
+    await db.rate_buckets.create_index("key", unique=True)
+    await db.rate_slots.create_index([("upstream", 1), ("slot", 1)], unique=True)
+    await db.rate_slots.create_index("holder")
+    logger.info("Rate governor indexes created")
+    
+    # Pooled LLM completions per prompt
+    await db.completion_pools.create_index("key", unique=True)
+    await db.completion_pools.create_index("expires_at", expireAfterSeconds=0)
+    logger.info("Completion pool indexes created")
\ No newline at end of file
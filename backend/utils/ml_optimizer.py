@@ -1,62 +1,94 @@
 import logging
+from datetime import datetime
 from typing import List, Dict, Optional
 from database import db
 
 logger = logging.getLogger(__name__)
 
+# Snapshots keep this many examples per pattern; larger requests bypass them
+SNAPSHOT_TOP_N = 10
+
+PATTERN_NAMES = ("top_hooks", "top_dominance_lines", "top_open_loops", "top_close_patterns", "top_scripts")
+
+
+def _top(field_filter: Optional[str], projection: Dict, top_n: int) -> List[Dict]:
+    """One $facet branch: the top_n rows (already sorted by retention) with `field_filter` set."""
+    stages = []
+    if field_filter:
+        stages.append({"$match": {field_filter: {"$nin": [None, ""]}}})
+    stages.append({"$limit": top_n})
+    stages.append({"$project": {"_id": 0, **projection}})
+    return stages
+
+
+async def compute_top_performing_patterns(user_id: str, top_n: int = SNAPSHOT_TOP_N) -> Dict:
+    """
+    Top hooks, dominance lines, open loops, close patterns and full scripts
+    by retention, in a single aggregation (one sort, one $facet).
+    """
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$sort": {"retention_percent": -1}},
+        {"$facet": {
+            "top_hooks": _top(None, {"hook_title": 1, "retention_hook": 1, "retention_percent": 1}, top_n),
+            "top_dominance_lines": _top("dominance_line", {"dominance_line": 1, "retention_percent": 1}, top_n),
+            "top_open_loops": _top("open_loop", {"open_loop": 1, "retention_percent": 1}, top_n),
+            "top_close_patterns": _top("close", {"close": 1, "retention_percent": 1}, top_n),
+            "top_scripts": _top(None, {"resolve_script": 1, "retention_percent": 1, "likes": 1}, top_n)
+        }}
+    ]
+    results = await db.analytics_data.aggregate(pipeline).to_list(length=1)
+    return results[0] if results else {name: [] for name in PATTERN_NAMES}
+
+
+async def _store_snapshot(user_id: str, generation: int, patterns: Dict, upsert: bool):
+    """Store a computed snapshot unless an import or delete invalidated it meanwhile."""
+    try:
+        await db.pattern_snapshots.update_one(
+            {"user_id": user_id, "generation": generation},
+            {"$set": {"patterns": patterns, "computed_at": datetime.utcnow().isoformat()}},
+            upsert=upsert
+        )
+    except Exception as e:
+        # A duplicate key: the snapshot was invalidated while this one was computed
+        logger.info(f"Pattern snapshot for user {user_id} not stored: {str(e)}")
+
+
 async def get_top_performing_patterns(user_id: str, top_n: int = 3) -> Dict:
     """
     Get top performing patterns from analytics data.
     Returns top hooks, dominance lines, open loops, and close patterns.
+    
+    Served from the user's snapshot in `pattern_snapshots`, which is computed
+    on first use and dropped by invalidate_pattern_snapshot when their
+    analytics data changes.
     """
     try:
-        # Top hooks by retention
-        top_hooks = await db.analytics_data.find(
-            {"user_id": user_id},
-            {"_id": 0, "hook_title": 1, "retention_hook": 1, "retention_percent": 1}
-        ).sort("retention_percent", -1).limit(top_n).to_list(length=top_n)
-        
-        # Top dominance lines
-        top_dominance = await db.analytics_data.find(
-            {"user_id": user_id, "dominance_line": {"$ne": None, "$ne": ""}},
-            {"_id": 0, "dominance_line": 1, "retention_percent": 1}
-        ).sort("retention_percent", -1).limit(top_n).to_list(length=top_n)
-        
-        # Top open loops
-        top_open_loops = await db.analytics_data.find(
-            {"user_id": user_id, "open_loop": {"$ne": None, "$ne": ""}},
-            {"_id": 0, "open_loop": 1, "retention_percent": 1}
-        ).sort("retention_percent", -1).limit(top_n).to_list(length=top_n)
+        if top_n > SNAPSHOT_TOP_N:
+            return await compute_top_performing_patterns(user_id, top_n)
         
-        # Top close patterns
-        top_closes = await db.analytics_data.find(
-            {"user_id": user_id, "close": {"$ne": None, "$ne": ""}},
-            {"_id": 0, "close": 1, "retention_percent": 1}
-        ).sort("retention_percent", -1).limit(top_n).to_list(length=top_n)
+        snapshot = await db.pattern_snapshots.find_one({"user_id": user_id}, {"_id": 0})
+        if snapshot and snapshot.get("patterns"):
+            patterns = snapshot["patterns"]
+        else:
+            generation = snapshot.get("generation", 0) if snapshot else 0
+            patterns = await compute_top_performing_patterns(user_id)
+            await _store_snapshot(user_id, generation, patterns, upsert=snapshot is None)
         
-        # Top performing full scripts as examples
-        top_scripts = await db.analytics_data.find(
-            {"user_id": user_id},
-            {"_id": 0, "resolve_script": 1, "retention_percent": 1, "likes": 1}
-        ).sort("retention_percent", -1).limit(top_n).to_list(length=top_n)
-        
-        return {
-            "top_hooks": top_hooks,
-            "top_dominance_lines": top_dominance,
-            "top_open_loops": top_open_loops,
-            "top_close_patterns": top_closes,
-            "top_scripts": top_scripts
-        }
+        return {name: rows[:top_n] for name, rows in patterns.items()}
     
     except Exception as e:
         logger.error(f"Error getting top performing patterns: {str(e)}")
-        return {
-            "top_hooks": [],
-            "top_dominance_lines": [],
-            "top_open_loops": [],
-            "top_close_patterns": [],
-            "top_scripts": []
-        }
+        return {name: [] for name in PATTERN_NAMES}
+
+
+async def invalidate_pattern_snapshot(user_id: str):
+    """Drop the user's pattern snapshot after their analytics data changed."""
+    await db.pattern_snapshots.update_one(
+        {"user_id": user_id},
+        {"$inc": {"generation": 1}, "$unset": {"patterns": "", "computed_at": ""}},
+        upsert=True
+    )
 
 def generate_optimized_prompt(
     topic: str,
@@ -86,6 +118,13 @@ def generate_optimized_prompt(
             hook_text = hook.get("hook_title", "")
             examples_section += f"{i}. \"{hook_text}\" (Retention: {retention}%)\n"
     
+    if patterns.get("similar_examples"):
+        examples_section += "\n**ERFOLGREICHE BEISPIELE ZU DIESEM THEMA:**\n"
+        for i, example in enumerate(patterns["similar_examples"][:3], 1):
+            retention = example.get("retention_percent", 0)
+            example_text = example.get("hook_title", "")
+            examples_section += f"{i}. \"{example_text}\" (Retention: {retention}%)\n"
+    
     if patterns.get("top_dominance_lines") and len(patterns["top_dominance_lines"]) > 0:
         examples_section += "\n**TOP DOMINANCE LINES:**\n"
         for i, dom in enumerate(patterns["top_dominance_lines"][:3], 1):
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cursors are ISO timestamps of the server clock, or "<timestamp>|<id>" to continue
+# after a full page. For a timestamp cursor, changes are queried from this margin
+# before it, so writes stamped just before a sync but committed just after it are
+# picked up by the next sync (clients may see an item twice, never miss one).
+SYNC_SAFETY_MARGIN = timedelta(seconds=2)
+
+# How long deletions are remembered; older cursors get a full reset
+DELETION_RETENTION = timedelta(days=7)
+
+MAX_WAIT_SECONDS = 30
+WAIT_POLL_INTERVAL = 1.0
+
+
+def now_iso() -> str:
+    """Timestamp format used for updated_at (same as created_at)."""
+    return datetime.utcnow().isoformat()
+
+
+def new_cursor() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def parse_cursor(cursor: str) -> Tuple[datetime, Optional[str]]:
+    """The cursor's timestamp, and the id of the last item returned for a page cursor."""
+    timestamp, _, last_id = cursor.partition("|")
+    try:
+        return datetime.fromisoformat(timestamp), last_id or None
+    except ValueError:
+        raise ValueError("Invalid sync cursor")
+
+
+async def record_deletion(db, collection: str, doc_id: str, user_id: str):
+    """
+    Remember a deleted document so delta syncs can report it.
+    `expires_at` drives the TTL index; `deleted_at` is compared with cursors.
+    """
+    now = datetime.utcnow()
+    await db.sync_deletions.insert_one({
+        "collection": collection,
+        "id": doc_id,
+        "user_id": user_id,
+        "deleted_at": now.isoformat(),
+        "expires_at": now + DELETION_RETENTION
+    })
+
+
+async def get_changes(
+    db,
+    collection: str,
+    query: Dict,
+    since: str,
+    limit: int = 500,
+    wait: int = 0
+) -> Dict:
+    """
+    Return documents of `collection` matching `query` that changed after `since`,
+    ids deleted after `since`, and the cursor for the next call.
+
+    Changes are ordered by (updated_at, id); when a page is full the cursor
+    continues after its last item, so items sharing a timestamp are not skipped.
+
+    With `wait` > 0 the call long-polls: it re-checks every second, up to `wait`
+    seconds, until something changed after `since` (changes only inside the
+    safety margin are returned, but do not end the wait).
+    """
+    since_time, last_id = parse_cursor(since)
+
+    if datetime.utcnow() - since_time > DELETION_RETENTION:
+        # Deletions older than the retention window are gone; the client must re-fetch
+        return {"reset": True, "changed": [], "deleted": [], "cursor": new_cursor()}
+
+    since_iso = since_time.isoformat()
+    if last_id is None:
+        lower = (since_time - SYNC_SAFETY_MARGIN).isoformat()
+        changed_filter = {"updated_at": {"$gt": lower}}
+    else:
+        # Page continuation: exact, the margin was applied on the first page
+        lower = since_iso
+        changed_filter = {"$or": [
+            {"updated_at": {"$gt": since_iso}},
+            {"updated_at": since_iso, "id": {"$gt": last_id}}
+        ]}
+
+    deadline = asyncio.get_running_loop().time() + min(max(wait, 0), MAX_WAIT_SECONDS)
+
+    while True:
+        cursor = new_cursor()
+
+        changed = await db[collection].find(
+            {**query, **changed_filter},
+            {"_id": 0}
+        ).sort([("updated_at", 1), ("id", 1)]).limit(limit).to_list(length=limit)
+
+        deleted = await db.sync_deletions.find(
+            {"collection": collection, "user_id": query["user_id"], "deleted_at": {"$gt": lower}},
+            {"_id": 0, "id": 1, "deleted_at": 1}
+        ).to_list(length=None)
+
+        if len(changed) == limit:
+            # More pending: continue after the last item we returned
+            cursor = f"{changed[-1]['updated_at']}|{changed[-1]['id']}"
+
+        new = (
+            last_id is not None
+            or len(changed) == limit
+            or any(item["updated_at"] > since_iso for item in changed)
+            or any(d["deleted_at"] > since_iso for d in deleted)
+        )
+
+        if ((changed or deleted) and new) or asyncio.get_running_loop().time() >= deadline:
+            return {
+                "reset": False,
+                "changed": changed,
+                "deleted": [d["id"] for d in deleted],
+                "cursor": cursor
+            }
+
+        await asyncio.sleep(WAIT_POLL_INTERVAL)
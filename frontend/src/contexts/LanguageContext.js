@@ -82,6 +82,7 @@ const translations = {
     character_count: 'Karakterszám',
     hook_type: 'Hook Típus',
     generated_with_analytics: 'ML-optimalizált',
+    pre_generated: 'Előre generált',
     copy: 'Másolás',
     copied: 'Vágólapra másolva!',
     
@@ -291,6 +292,7 @@ const translations = {
     character_count: 'Zeichenzahl',
     hook_type: 'Hook-Typ',
     generated_with_analytics: 'ML-optimiert',
+    pre_generated: 'Vorab generiert',
     copy: 'Kopieren',
     copied: 'In Zwischenablage kopiert!',
     
@@ -500,6 +502,7 @@ const translations = {
     character_count: 'Character Count',
     hook_type: 'Hook Type',
     generated_with_analytics: 'ML-optimized',
+    pre_generated: 'Pre-generated',
     copy: 'Copy',
     copied: 'Copied to clipboard!',
     
@@ -709,6 +712,7 @@ const translations = {
     character_count: 'Liczba znaków',
     hook_type: 'Typ Hooka',
     generated_with_analytics: 'Zoptymalizowany ML',
+    pre_generated: 'Wygenerowany wcześniej',
     copy: 'Kopiuj',
     copied: 'Skopiowano do schowka!',
     
@@ -918,6 +922,7 @@ const translations = {
     character_count: 'Aantal tekens',
     hook_type: 'Hook Type',
     generated_with_analytics: 'ML-geoptimaliseerd',
+    pre_generated: 'Vooraf gegenereerd',
     copy: 'Kopiëren',
     copied: 'Gekopieerd naar klembord!',
     
@@ -0,0 +1,29 @@
+// Parse "event: ...\ndata: ..." blocks of a Server-Sent Events body
+export const parseEvents = (chunk) => chunk
+  .split('\n\n')
+  .filter(block => block.includes('data: '))
+  .map(block => {
+    const event = block.match(/^event: (.*)$/m)?.[1] || 'message';
+    const data = JSON.parse(block.match(/^data: (.*)$/m)[1]);
+    return { event, data };
+  });
+
+// Read a fetch() response as Server-Sent Events, calling onEvent(event, data) for each.
+// Used instead of EventSource so the JWT goes in the Authorization header, not the URL.
+export const readEvents = async (res, onEvent) => {
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) return;
+    buffer += decoder.decode(value, { stream: true });
+    const end = buffer.lastIndexOf('\n\n');
+    if (end === -1) continue;
+    const events = parseEvents(buffer.slice(0, end));
+    buffer = buffer.slice(end + 2);
+    for (const { event, data } of events) {
+      onEvent(event, data);
+    }
+  }
+};
@@ -9,9 +9,12 @@ import { Switch } from '../../components/ui/switch';
 import { Badge } from '../../components/ui/badge';
 import { toast } from 'sonner';
 import { Sparkles, Copy, CheckCircle, XCircle, Plus, X } from 'lucide-react';
+import { readEvents } from '../../lib/sse';
+
+const API_URL = process.env.REACT_APP_BACKEND_URL;
 
 export default function ScriptGenerator() {
-  const { api } = useAuth();
+  const { api, token } = useAuth();
   const { t } = useLanguage();
   const [topic, setTopic] = useState('');
   const [keywords, setKeywords] = useState([]);
@@ -20,6 +23,7 @@ export default function ScriptGenerator() {
   const [useAnalytics, setUseAnalytics] = useState(false);
   const [loading, setLoading] = useState(false);
   const [generatedScript, setGeneratedScript] = useState(null);
+  const [streamingText, setStreamingText] = useState('');
   const [insights, setInsights] = useState(null);
 
   useEffect(() => {
@@ -55,22 +59,42 @@ export default function ScriptGenerator() {
     }
 
     setLoading(true);
+    setGeneratedScript(null);
+    setStreamingText('');
 
     try {
-      const endpoint = useAnalytics ? '/scripts/generate-optimized' : '/scripts/generate';
-      const res = await api.post(endpoint, {
-        topic,
-        mode,
-        keywords,
-        use_analytics: useAnalytics,
-        top_n_examples: 3
+      // Stream the text as it is written; the saved script arrives last
+      const endpoint = useAnalytics ? '/scripts/generate-optimized/stream' : '/scripts/generate/stream';
+      const res = await fetch(`${API_URL}/api${endpoint}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', Authorization: `Bearer ${token}` },
+        body: JSON.stringify({
+          topic,
+          mode,
+          keywords,
+          use_analytics: useAnalytics,
+          top_n_examples: 3
+        })
       });
+      if (!res.ok) {
+        const body = await res.json().catch(() => ({}));
+        throw new Error(body.detail);
+      }
 
-      setGeneratedScript(res.data);
-      toast.success(t('script_success') || 'Script generated successfully!');
+      await readEvents(res, (event, data) => {
+        if (event === 'token') {
+          setStreamingText(prev => prev + data.text);
+        } else if (event === 'script') {
+          setGeneratedScript(data);
+          toast.success(t('script_success') || 'Script generated successfully!');
+        } else if (event === 'error') {
+          throw new Error(data.detail);
+        }
+      });
     } catch (error) {
-      toast.error(error.response?.data?.detail || t('script_failed') || 'Script generation failed');
+      toast.error(error.message || t('script_failed') || 'Script generation failed');
     } finally {
+      setStreamingText('');
       setLoading(false);
     }
   };
@@ -241,6 +265,12 @@ export default function ScriptGenerator() {
                   </div>
                 )}
 
+                {generatedScript.pre_generated && (
+                  <Badge className="bg-zinc-700 text-zinc-300">
+                    {t('pre_generated') || 'Pre-generated'}
+                  </Badge>
+                )}
+
                 {/* Hook Info */}
                 <div className="p-4 bg-amber-400/5 border border-amber-400/20 rounded-lg">
                   <div className="flex items-center justify-between mb-2">
@@ -302,6 +332,12 @@ export default function ScriptGenerator() {
                   </div>
                 </div>
               </div>
+            ) : streamingText ? (
+              <div className="p-4 bg-zinc-800 border border-zinc-700 rounded-lg">
+                <p className="font-mono text-sm text-zinc-300 whitespace-pre-wrap leading-relaxed">
+                  {streamingText}
+                </p>
+              </div>
             ) : (
               <div className="text-center py-12 text-zinc-500">
                 <Sparkles className="mx-auto mb-4 text-zinc-600" size={48} />
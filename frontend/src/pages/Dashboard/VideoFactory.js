@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../../contexts/AuthContext';
 import { Button } from '../../components/ui/button';
 import { Input } from '../../components/ui/input';
@@ -14,6 +14,7 @@ import {
   SelectValue,
 } from '../../components/ui/select';
 import { Slider } from '../../components/ui/slider';
+import { Progress } from '../../components/ui/progress';
 import { toast } from 'sonner';
 import {
   Play,
@@ -29,17 +30,36 @@ import {
   Mic,
   Edit,
   Save,
-  X
+  X,
+  Ban
 } from 'lucide-react';
+import { readEvents } from '../../lib/sse';
+
+const API_URL = process.env.REACT_APP_BACKEND_URL;
+const FINAL_STATUSES = ['completed', 'failed', 'preview_ready', 'cancelled'];
+const MAX_RECONNECT_DELAY = 30000; // ms between attempts to reopen a dropped progress stream
+
+// Fallbacks the backend used when an external service was down
+const DEGRADED_MODES = {
+  cached_tts: 'korábbi hangfelvétel',
+  local_alignment: 'becsült felirat-időzítés',
+  cached_clips: 'korábbi B-roll klipek',
+  black_background: 'fekete háttér'
+};
 
 export default function VideoFactory() {
-  const { api } = useAuth();
+  const { api, token } = useAuth();
   const [scripts, setScripts] = useState([]);
   const [videos, setVideos] = useState([]);
   const [selectedScript, setSelectedScript] = useState('');
   const [loading, setLoading] = useState(true);
   const [generating, setGenerating] = useState(false);
 
+  // Live render progress from the SSE stream, by video id
+  const [progress, setProgress] = useState({});
+  const eventStreams = useRef({}); // AbortController (or pending reconnect) per video id
+  const unmounted = useRef(false);
+
   // Script Editing State
   const [isEditingScript, setIsEditingScript] = useState(false);
   const [editedScriptText, setEditedScriptText] = useState('');
@@ -73,10 +93,60 @@ export default function VideoFactory() {
   useEffect(() => {
     fetchData();
     loadVoicePreferences();
-    const interval = setInterval(fetchVideos, 10000); // Poll every 10s
-    return () => clearInterval(interval);
+    // Close all progress streams on unmount
+    return () => {
+      unmounted.current = true;
+      Object.values(eventStreams.current).forEach(stream => stream.abort());
+    };
   }, []);
 
+  // Follow a video's progress events until it reaches a final status. A stream
+  // that drops earlier (network, server restart) is reopened with backoff.
+  const subscribe = (videoId, attempt = 0) => {
+    const controller = new AbortController();
+    let finished = false;
+    eventStreams.current[videoId] = controller;
+
+    fetch(`${API_URL}/api/videos/${videoId}/events`, {
+      headers: { Authorization: `Bearer ${token}` },
+      signal: controller.signal
+    })
+      .then(res => {
+        if (res.status === 404) {
+          finished = true; // Deleted in the meantime
+          return;
+        }
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        return readEvents(res, (event, data) => {
+          if (event !== 'progress') return;
+          attempt = 0;
+          setProgress(prev => ({ ...prev, [videoId]: data }));
+          if (FINAL_STATUSES.includes(data.status)) {
+            finished = true;
+            controller.abort();
+            fetchVideos();
+          }
+        });
+      })
+      .catch(() => {})
+      .finally(() => {
+        delete eventStreams.current[videoId];
+        if (finished || unmounted.current) return;
+
+        const delay = Math.min(MAX_RECONNECT_DELAY, 1000 * 2 ** attempt);
+        const timer = setTimeout(() => subscribe(videoId, attempt + 1), delay);
+        eventStreams.current[videoId] = { abort: () => clearTimeout(timer) };
+        fetchVideos(); // Catch up on the status while reconnecting
+      });
+  };
+
+  // Subscribe to progress events of every unfinished video instead of polling
+  useEffect(() => {
+    videos
+      .filter(video => !FINAL_STATUSES.includes(video.status) && !eventStreams.current[video.id])
+      .forEach(video => subscribe(video.id));
+  }, [videos]);
+
   const fetchData = async () => {
     try {
       await Promise.all([fetchScripts(), fetchVideos()]);
@@ -165,6 +235,16 @@ export default function VideoFactory() {
     }
   };
 
+  const handleCancel = async (videoId) => {
+    try {
+      await api.post(`/videos/${videoId}/cancel`);
+      toast.success('Generálás leállítva');
+      fetchVideos();
+    } catch (error) {
+      toast.error('Leállítás sikertelen: ' + (error.response?.data?.detail || error.message));
+    }
+  };
+
   // Start editing script
   const startEditingScript = () => {
     const scriptData = scripts.find(s => s.id === selectedScript);
@@ -233,7 +313,13 @@ export default function VideoFactory() {
         fetchVideos();
       }, 2000);
     } catch (error) {
-      toast.error(error.response?.data?.detail || 'Videó generálás sikertelen');
+      const detail = error.response?.data?.detail;
+      if (error.response?.status === 429) {
+        // Render host is saturated: detail carries retry_after and estimated_start
+        toast.error(`A szerver túlterhelt, próbáld újra ${Math.ceil(detail.retry_after / 60)} perc múlva`);
+      } else {
+        toast.error(detail || 'Videó generálás sikertelen');
+      }
     } finally {
       setGenerating(false);
     }
@@ -249,6 +335,8 @@ export default function VideoFactory() {
         return <CheckCircle className="text-green-400" size={20} />;
       case 'failed':
         return <XCircle className="text-red-400" size={20} />;
+      case 'cancelled':
+        return <Ban className="text-zinc-400" size={20} />;
       default:
         return <Clock className="text-zinc-500" size={20} />;
     }
@@ -259,14 +347,16 @@ export default function VideoFactory() {
       queued: 'bg-yellow-400/10 text-yellow-400 border-yellow-400/20',
       processing: 'bg-blue-400/10 text-blue-400 border-blue-400/20',
       completed: 'bg-green-400/10 text-green-400 border-green-400/20',
-      failed: 'bg-red-400/10 text-red-400 border-red-400/20'
+      failed: 'bg-red-400/10 text-red-400 border-red-400/20',
+      cancelled: 'bg-zinc-400/10 text-zinc-400 border-zinc-400/20'
     };
 
     const labels = {
       queued: 'Sorban',
       processing: 'Generálás...',
       completed: 'Kész',
-      failed: 'Hiba'
+      failed: 'Hiba',
+      cancelled: 'Leállítva'
     };
 
     return (
@@ -612,9 +702,18 @@ export default function VideoFactory() {
                     className="p-3 bg-zinc-800/50 rounded-lg border border-zinc-700 space-y-2"
                   >
                     <div className="flex items-center justify-between">
-                      {getStatusIcon(video.status)}
-                      {getStatusBadge(video.status)}
+                      {getStatusIcon(progress[video.id]?.status || video.status)}
+                      {getStatusBadge(progress[video.id]?.status || video.status)}
                     </div>
+
+                    {(progress[video.id]?.status || video.status) === 'processing' && (
+                      <div className="space-y-1">
+                        <Progress value={progress[video.id]?.percent ?? video.progress ?? 0} />
+                        <p className="text-zinc-500 text-xs">
+                          {progress[video.id]?.stage || video.stage || '...'} · {Math.round(progress[video.id]?.percent ?? video.progress ?? 0)}%
+                        </p>
+                      </div>
+                    )}
                     
                     <div className="text-sm">
                       <p className="text-zinc-400 truncate">
@@ -627,6 +726,18 @@ export default function VideoFactory() {
                       )}
                     </div>
 
+                    {['queued', 'processing'].includes(progress[video.id]?.status || video.status) && (
+                      <Button
+                        onClick={() => handleCancel(video.id)}
+                        size="sm"
+                        variant="outline"
+                        className="w-full"
+                      >
+                        <Ban size={16} className="mr-1" />
+                        Leállítás
+                      </Button>
+                    )}
+
                     {video.status === 'completed' && (
                       <Button
                         onClick={() => handleDownload(video.id)}
@@ -643,6 +754,12 @@ export default function VideoFactory() {
                         {video.error}
                       </p>
                     )}
+
+                    {video.degraded?.length > 0 && (
+                      <p className="text-xs text-amber-400 break-words">
+                        Tartalék mód: {video.degraded.map((d) => DEGRADED_MODES[d.mode] || d.mode).join(', ')}
+                      </p>
+                    )}
                   </div>
                 ))
               )}